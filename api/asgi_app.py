@@ -0,0 +1,177 @@
+"""Mode de service asynchrone (ASGI)
+
+Les flux MJPEG et les événements WebSocket sont servis par des coroutines
+sur une seule boucle asyncio : une connexion ouverte ne coûte plus un
+thread. Les routes JSON Flask existantes sont réutilisées telles quelles
+via un adaptateur WSGI -> ASGI (requêtes courtes, pool de threads borné).
+
+Dépendances optionnelles : uvicorn, asgiref (python-socketio est déjà requis).
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import socketio
+from asgiref.wsgi import WsgiToAsgi
+
+from api import routes
+from config.settings import settings, OptimizedSettings
+
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+flask_asgi = WsgiToAsgi(routes.app)
+
+# Encodage JPEG hors de la boucle, pool partagé par tous les clients
+encode_pool = ThreadPoolExecutor(max_workers=settings.ASGI_ENCODE_WORKERS, thread_name_prefix="StreamEncode")
+loop = None
+
+
+def emit_threadsafe(event, data, room=None):
+    """Émettre un événement depuis un thread hors de la boucle asyncio"""
+    if loop is None or loop.is_closed():
+        return
+    asyncio.run_coroutine_threadsafe(sio.emit(event, data, to=room), loop)
+
+
+async def _maybe_await(result):
+    """enter_room/leave_room sont des coroutines selon la version de python-socketio"""
+    if asyncio.iscoroutine(result):
+        await result
+
+
+# WEBSOCKET EVENTS
+
+
+@sio.event
+async def connect(sid, environ):
+    """Nouvelle connexion WebSocket"""
+    await sio.emit('status', {'message': 'Connecté au système Smart Classroom'}, to=sid)
+    print("📡 Nouvelle connexion WebSocket (ASGI)")
+
+@sio.event
+async def disconnect(sid):
+    """Déconnexion WebSocket"""
+    print('📡 Client WebSocket déconnecté (ASGI)')
+
+@sio.on('request_stats')
+async def handle_stats_request(sid):
+    """Demande de statistiques en temps réel"""
+    try:
+        if routes.face_recognizer:
+            stats = await asyncio.get_running_loop().run_in_executor(
+                None, routes.face_recognizer.get_database_stats)
+            await sio.emit('stats_update', stats, to=sid)
+    except Exception as e:
+        await sio.emit('error', {'message': str(e)}, to=sid)
+
+@sio.on('request_capture_status')
+async def handle_capture_status_request(sid):
+    """Demande du statut de capture"""
+    await sio.emit('capture_status_update', routes.capture_status, to=sid)
+
+@sio.on('subscribe_dashboard')
+async def handle_dashboard_subscribe(sid, data=None):
+    """Abonner un dashboard aux deltas d'une salle (toutes si absente)"""
+    room = (data or {}).get('room')
+    await _maybe_await(sio.enter_room(sid, routes.DashboardPublisher.channel(room)))
+    await sio.emit('dashboard_delta', routes.dashboard_publisher.snapshot(room), to=sid)
+
+@sio.on('unsubscribe_dashboard')
+async def handle_dashboard_unsubscribe(sid, data=None):
+    """Désabonner un dashboard"""
+    await _maybe_await(sio.leave_room(sid, routes.DashboardPublisher.channel((data or {}).get('room'))))
+
+
+# FLUX MJPEG
+
+
+async def _wait_disconnect(receive, disconnected: asyncio.Event):
+    """Surveiller la déconnexion du client HTTP"""
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            disconnected.set()
+            return
+
+async def mjpeg_stream(scope, receive, send, fast=False, camera=None):
+    """Flux MJPEG servi par une coroutine"""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    profile = query.get('profile', ['fast' if fast else None])[0]
+    camera = camera or query.get('camera', [None])[0]
+    headers = [(b'content-type', b'multipart/x-mixed-replace; boundary=frame')]
+    if not fast:
+        headers += [(key.lower().encode(), value.encode()) for key, value in routes.STREAM_HEADERS.items()]
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+
+    disconnected = asyncio.Event()
+    watcher = asyncio.create_task(_wait_disconnect(receive, disconnected))
+    frame_interval = 0.033 if fast else 1.0 / 25
+    running_loop = asyncio.get_running_loop()
+
+    try:
+        while not disconnected.is_set():
+            started = running_loop.time()
+            try:
+                chunk, live = await running_loop.run_in_executor(
+                    encode_pool, routes.render_stream_chunk, profile, fast, camera)
+            except Exception as e:
+                print(f"Erreur streaming ASGI: {e}")
+                chunk, live = (None if fast else routes.error_chunk(profile)), False
+
+            if chunk is not None:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+            # Caméra arrêtée : image d'attente à faible cadence
+            interval = frame_interval if live else OptimizedSettings.STREAM_IDLE_INTERVAL
+            await asyncio.sleep(max(0.0, interval - (running_loop.time() - started)))
+    except (ConnectionError, OSError):
+        pass
+    finally:
+        watcher.cancel()
+
+STREAM_ROUTES = {
+    '/api/camera/stream': False,
+    '/api/camera/stream/fast': True,
+}
+
+def camera_stream_name(path):
+    """Nom de caméra de /api/cameras/<nom>/stream (None sinon)"""
+    parts = path.strip('/').split('/')
+    if len(parts) == 4 and parts[:2] == ['api', 'cameras'] and parts[3] == 'stream':
+        return parts[2]
+    return None
+
+async def http_app(scope, receive, send):
+    """Routage : flux natifs asynchrones, le reste vers Flask"""
+    if scope['type'] == 'http' and scope['path'] in STREAM_ROUTES:
+        await mjpeg_stream(scope, receive, send, fast=STREAM_ROUTES[scope['path']])
+    elif scope['type'] == 'http' and camera_stream_name(scope['path']):
+        await mjpeg_stream(scope, receive, send, camera=camera_stream_name(scope['path']))
+    else:
+        await flask_asgi(scope, receive, send)
+
+asgi_app = socketio.ASGIApp(sio, other_asgi_app=http_app)
+
+
+def run(host=None, port=None):
+    """Lancer le serveur ASGI (bloquant, utilisable depuis un thread)"""
+    global loop
+    import uvicorn
+
+    config = uvicorn.Config(
+        asgi_app,
+        host=host or settings.API_HOST,
+        port=port or settings.API_PORT,
+        log_level='warning',
+        lifespan='off'
+    )
+    server = uvicorn.Server(config)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    routes.event_emitter = emit_threadsafe
+    try:
+        loop.run_until_complete(server.serve())
+    finally:
+        routes.event_emitter = None
+        loop.close()
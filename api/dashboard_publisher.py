@@ -0,0 +1,131 @@
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+class DashboardPublisher:
+    """Publication des mises à jour du dashboard par WebSocket
+
+    Les composants publient des deltas au fil de l'eau. Les deltas sont
+    fusionnés par (salle, type, clé) et envoyés par lot toutes les
+    `flush_interval` secondes : N dashboards ouverts coûtent un seul calcul
+    et un envoi par salle au lieu de N boucles de polling.
+    """
+
+    ALL_ROOMS = "*"
+
+    def __init__(self, emit_fn: Callable, flush_interval: float = 0.5, default_room: Optional[str] = None):
+        self.emit_fn = emit_fn
+        self.flush_interval = flush_interval
+        self.default_room = default_room
+
+        # Source optionnelle des statistiques caméra (fps, active)
+        self.camera_stats_source: Optional[Callable] = None
+        self.camera_sample_interval = 2.0
+
+        self.pending: Dict[tuple, dict] = {}
+        self.last_values: Dict[tuple, dict] = {}
+        self.lock = threading.Lock()
+
+        self.is_running = False
+        self.thread: Optional[threading.Thread] = None
+        self.events_published = 0
+        self.events_coalesced = 0
+        self.batches_sent = 0
+
+    @classmethod
+    def channel(cls, room: Optional[str]) -> str:
+        """Nom du canal WebSocket d'une salle"""
+        return f"dashboard:{(room or cls.ALL_ROOMS).strip().lower()}"
+
+    def start(self):
+        """Démarrer le thread d'envoi"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self.thread = threading.Thread(target=self._flush_loop, daemon=True, name="DashboardPublisher")
+        self.thread.start()
+
+    def stop(self):
+        """Arrêter le thread d'envoi"""
+        self.is_running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=self.flush_interval + 0.5)
+
+    def publish(self, event_type: str, data: dict, key: Optional[str] = None,
+                room: Optional[str] = None, only_changes: bool = False):
+        """Publier un delta ; le dernier delta d'une même clé remplace les précédents"""
+        room = room or self.default_room or self.ALL_ROOMS
+        slot = (room.strip().lower(), event_type, key)
+
+        with self.lock:
+            if only_changes and self.last_values.get(slot, {}).get('data') == data:
+                return
+            update = {'type': event_type, 'key': key, 'data': data,
+                      'timestamp': datetime.now().isoformat()}
+            if slot in self.pending:
+                self.events_coalesced += 1
+            self.pending[slot] = update
+            self.last_values[slot] = update
+            self.events_published += 1
+
+    def snapshot(self, room: Optional[str] = None) -> dict:
+        """Dernières valeurs connues, envoyées à un dashboard qui s'abonne"""
+        room_key = (room or self.ALL_ROOMS).strip().lower()
+        with self.lock:
+            updates = [update for (update_room, _, _), update in self.last_values.items()
+                       if room_key == self.ALL_ROOMS or update_room in (room_key, self.ALL_ROOMS)]
+        return {'room': room, 'updates': updates}
+
+    def _flush_loop(self):
+        """Envoyer les deltas fusionnés par lot"""
+        last_camera_sample = 0.0
+
+        while self.is_running:
+            time.sleep(self.flush_interval)
+
+            now = time.time()
+            if self.camera_stats_source and now - last_camera_sample >= self.camera_sample_interval:
+                last_camera_sample = now
+                try:
+                    self.publish('camera', self.camera_stats_source(), key='camera', only_changes=True)
+                except Exception as e:
+                    print(f"Erreur statistiques caméra dashboard: {e}")
+
+            self.flush()
+
+    def flush(self):
+        """Envoyer immédiatement les deltas en attente"""
+        with self.lock:
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, {}
+
+        by_room: Dict[str, list] = {}
+        for (room, _, _), update in pending.items():
+            by_room.setdefault(room, []).append(update)
+
+        everything = []
+        for room, updates in by_room.items():
+            everything.extend(updates)
+            if room != self.ALL_ROOMS:
+                self._emit(self.channel(room), room, updates)
+        # Les dashboards sans salle reçoivent tout
+        self._emit(self.channel(None), None, everything)
+
+    def _emit(self, channel: str, room: Optional[str], updates: list):
+        try:
+            self.emit_fn('dashboard_delta', {'room': room, 'updates': updates}, channel)
+            self.batches_sent += 1
+        except Exception as e:
+            print(f"Erreur envoi dashboard: {e}")
+
+    def get_stats(self) -> dict:
+        """Statistiques de publication"""
+        return {
+            'events_published': self.events_published,
+            'events_coalesced': self.events_coalesced,
+            'batches_sent': self.batches_sent,
+            'pending': len(self.pending)
+        }
@@ -0,0 +1,69 @@
+"""Service central de reconnaissance faciale (mode client/serveur)
+
+    python -m api.recognition_service --host 0.0.0.0 --port 5100
+
+Le service tient le seul index (dataset) et regroupe les demandes de
+toutes les salles ; les boîtiers s'y connectent avec
+RECOGNITION_BACKEND=remote et RECOGNITION_SERVICE_URL.
+
+POST /recognize  {"room": "B204", "faces": ["<jpeg base64>", ...]}
+              -> {"results": [{"name": ..., "confidence": ...}, ...]}
+GET  /health     statistiques de regroupement par salle
+"""
+
+import argparse
+import binascii
+import logging
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from flask import Flask, jsonify, request
+
+from config.settings import settings
+from core.recognition_backends import decode_face, shared_recognition_service
+from utils.log_config import setup_logging
+
+app = Flask(__name__)
+log = logging.getLogger(__name__)
+
+
+@app.route('/recognize', methods=['POST'])
+def recognize():
+    payload = request.get_json(silent=True) or {}
+    faces = payload.get('faces') or []
+    if not faces or len(faces) > settings.RECOGNITION_BATCH_SIZE:
+        return jsonify({'error': f'1 à {settings.RECOGNITION_BATCH_SIZE} visages attendus'}), 400
+    try:
+        images = [decode_face(face) for face in faces]
+    except (ValueError, binascii.Error) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        # Sous le délai du client : il reçoit le 503 avant d'abandonner
+        results = shared_recognition_service().recognize_many(
+            images, payload.get('room'), timeout=settings.RECOGNITION_SERVICE_DEADLINE)
+    except FutureTimeout:
+        log.warning("Reconnaissance trop lente (%s visage(s), salle %s)", len(images), payload.get('room'))
+        return jsonify({'error': 'Délai de reconnaissance dépassé'}), 503
+    return jsonify({'results': [{'name': name, 'confidence': float(confidence)}
+                                for name, confidence in results]})
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify({'success': True, 'service': shared_recognition_service().get_stats()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service central de reconnaissance faciale")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=settings.RECOGNITION_SERVICE_PORT)
+    args = parser.parse_args()
+
+    setup_logging(settings.LOGS_PATH)
+    shared_recognition_service()  # Charger l'index avant la première salle
+    # Un thread par requête : les demandes simultanées forment les lots
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,12 +4,16 @@ import base64
 import threading
 import time
 from flask import Flask, request, jsonify, render_template
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import json
 from datetime import datetime
 from pathlib import Path
 from flask import send_from_directory
 from flask import Response
+from api.dashboard_publisher import DashboardPublisher
+from core.stream_encoder import placeholder_chunk, error_chunk
+from utils.metrics import metrics
+from config.settings import OptimizedSettings, settings as app_settings
 
 # CORRECTION: Chemin  vers les templates
 BASE_DIR = Path(__file__).parent.parent  
@@ -37,6 +41,8 @@ face_recognizer = None
 attention_tracker = None
 emotion_analyzer = None
 door_controller = None
+stream_encoder = None
+cameras = {}  # Caméras nommées {nom: CameraPipeline}, dont la principale
 
 # Variables globales pour la capture web
 current_capture = None
@@ -48,6 +54,10 @@ capture_status = {
     'message': ''
 }
 
+# Import en masse en cours (utils.bulk_enrollment.BulkEnrollment)
+current_import = None
+import_status = {'active': False, 'phase': None, 'message': ''}
+
 # CLASSE DE CAPTURE WEB INTÉGRÉE
 
 
@@ -190,6 +200,22 @@ class WebFaceCapture:
 # FONCTIONS UTILITAIRES
 
 
+# Émetteur WebSocket actif : Flask-SocketIO par défaut, remplacé par
+# api.asgi_app quand le serveur tourne en mode ASGI
+event_emitter = None
+
+def push_event(event, data, room=None):
+    """Émettre un événement WebSocket depuis n'importe quel thread"""
+    if event_emitter is not None:
+        event_emitter(event, data, room)
+    else:
+        socketio.emit(event, data, to=room)
+
+
+# Deltas du dashboard poussés par WebSocket (remplace le polling)
+dashboard_publisher = DashboardPublisher(push_event, default_room=app_settings.CLASSROOM)
+
+
 def update_capture_status(status_update):
     """Callback pour mettre à jour le statut de capture"""
     global capture_status
@@ -197,7 +223,7 @@ def update_capture_status(status_update):
     
     # Envoyer via WebSocket pour mise à jour temps réel
     try:
-        socketio.emit('capture_status_update', capture_status)
+        push_event('capture_status_update', capture_status)
     except Exception as e:
         print(f"Erreur WebSocket: {e}")
 
@@ -361,32 +387,29 @@ def get_emotion_chart_data():
 
 @app.route('/api/dashboard/performance', methods=['GET'])
 def get_performance_metrics():
-    """Métriques de performance du système"""
+    """Métriques de performance du système (latences par étape incluses)"""
     try:
-        import psutil
-        import random
-        
-        # Métriques système réelles si possible
+        # Métriques système réelles si psutil est disponible
         try:
-            cpu_percent = psutil.cpu_percent()
-            memory_info = psutil.virtual_memory()
-            memory_mb = round(memory_info.used / 1024 / 1024)
-        except:
-            # Valeurs simulées si psutil n'est pas disponible
-            cpu_percent = random.randint(10, 30)
-            memory_mb = random.randint(100, 500)
+            import psutil
+            cpu_usage = f"{psutil.cpu_percent()}%"
+            memory_usage = f"{round(psutil.virtual_memory().used / 1024 / 1024)} MB"
+        except ImportError:
+            cpu_usage = memory_usage = 'N/A'
         
-        metrics = {
-            'camera_fps': 30 if (camera_manager and camera_manager.is_active) else 0,
-            'detections_per_min': random.randint(5, 15),
-            'cpu_usage': f"{cpu_percent}%",
-            'memory_usage': f"{memory_mb} MB",
-            'errors_per_hour': random.randint(0, 2)
+        metrics_data = {
+            'camera_fps': round(camera_manager.fps, 1) if (camera_manager and camera_manager.is_active) else 0,
+            'detections_per_min': metrics.rate('faces_detected', 60),
+            'cpu_usage': cpu_usage,
+            'memory_usage': memory_usage,
+            'errors_per_hour': metrics.rate('errors', 3600)
         }
         
         return jsonify({
             'success': True,
-            'metrics': metrics,
+            'metrics': metrics_data,
+            'pipeline': metrics.snapshot(),
+            'recognition': main_system.recognition_scheduler.get_stats() if main_system else None,
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -402,6 +425,11 @@ def get_performance_metrics():
             'error': str(e)
         })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Métriques au format texte Prometheus"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/dashboard/alerts', methods=['GET'])
 def get_system_alerts():
     """Obtenir les alertes système"""
@@ -560,10 +588,16 @@ def camera_status():
     try:
         if main_system and hasattr(main_system, 'camera_manager'):
             is_active = main_system.camera_manager.is_active
+            health = main_system.camera_manager.get_health()
+            if health['state'] == 'reconnecting':
+                message = 'Caméra déconnectée, reconnexion en cours'
+            else:
+                message = 'Caméra active' if is_active else 'Caméra arrêtée'
             return jsonify({
                 'success': True, 
                 'active': is_active,
-                'message': 'Caméra active' if is_active else 'Caméra arrêtée'
+                'message': message,
+                'health': health
             })
         else:
             return jsonify({'success': False, 'active': False, 'message': 'Système non initialisé'})
@@ -598,13 +632,56 @@ def stop_camera():
     except Exception as e:
         return jsonify({'success': False, 'message': f'Erreur: {str(e)}'})
 
+def resolve_camera(name=None):
+    """(camera_manager, stream_encoder) d'une caméra nommée (défaut : principale)
+    
+    (None, None) si la caméra est inconnue ou le système non initialisé.
+    """
+    if name:
+        pipeline = cameras.get(name)
+        return (pipeline.camera_manager, pipeline.stream_encoder) if pipeline else (None, None)
+    if main_system:
+        return main_system.camera_manager, stream_encoder
+    return None, None
+
+def render_stream_chunk(profile=None, fast=False, camera=None):
+    """Morceau multipart de la frame courante pour un profil de flux
+    
+    Partagé par le serveur threadé et le mode ASGI ; l'encodage est fait
+    une seule fois par frame et par profil par l'encodeur de la caméra.
+    Retourne (morceau, en_direct). En mode rapide, le morceau est None
+    quand la caméra n'a pas de frame.
+    """
+    manager, encoder = resolve_camera(camera)
+    if manager and manager.is_active and encoder:
+        encoded = encoder.get_encoded(profile)
+        if encoded is not None:
+            return encoded.chunk, True
+    
+    # Caméra inactive ou pas de frame disponible
+    return (None if fast else placeholder_chunk(profile)), False
+
+STREAM_HEADERS = {
+    'Cache-Control': 'no-cache, no-store, must-revalidate',
+    'Pragma': 'no-cache',
+    'Expires': '0',
+    'Connection': 'close'
+}
+
 @app.route('/api/camera/stream')
-def video_stream_optimized():
-    """Stream vidéo optimisé pour réduire la latence"""
+@app.route('/api/cameras/<name>/stream')
+def video_stream_optimized(name=None):
+    """Stream vidéo optimisé (?profile=thumbnail|tablet|projector|...)
+    
+    Caméra principale par défaut ; /api/cameras/<nom>/stream ou
+    ?camera=<nom> pour une caméra de settings.CAMERAS.
+    """
+    profile = request.args.get('profile')
+    camera = name or request.args.get('camera')
+    
     def generate_frames_optimized():
         last_frame_time = 0
         frame_interval = 1.0 / 25  # 25 FPS pour le web (plus fluide que 30)
-        jpeg_quality = 75  # Qualité réduite pour moins de latence
         
         while True:
             try:
@@ -615,101 +692,35 @@ def video_stream_optimized():
                     time.sleep(0.01)  # Petite pause
                     continue
                 
-                if main_system and main_system.camera_manager and main_system.camera_manager.is_active:
-                    # Utiliser la version rapide pour le streaming
-                    frame = main_system.camera_manager.get_latest_frame_fast()
-                    
-                    if frame is not None:
-                        # Optimisations d'image pour le streaming
-                        # 1. Réduire la taille si nécessaire
-                        h, w = frame.shape[:2]
-                        if w > 640:
-                            frame = cv2.resize(frame, (640, int(h * 640 / w)), 
-                                             interpolation=cv2.INTER_AREA)
-                        
-                        # 2. Compression JPEG optimisée
-                        encode_params = [
-                            cv2.IMWRITE_JPEG_QUALITY, jpeg_quality,
-                            cv2.IMWRITE_JPEG_OPTIMIZE, 1,
-                            cv2.IMWRITE_JPEG_PROGRESSIVE, 1
-                        ]
-                        
-                        ret, buffer = cv2.imencode('.jpg', frame, encode_params)
-                        
-                        if ret:
-                            frame_bytes = buffer.tobytes()
-                            last_frame_time = current_time
-                            
-                            yield (b'--frame\r\n'
-                                   b'Content-Type: image/jpeg\r\n'
-                                   b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n'
-                                   b'\r\n' + frame_bytes + b'\r\n')
-                        else:
-                            # Frame d'erreur
-                            yield get_error_frame()
-                    else:
-                        # Pas de frame disponible
-                        yield get_placeholder_frame_optimized()
-                else:
-                    # Caméra inactive
-                    yield get_placeholder_frame_optimized()
+                last_frame_time = current_time
+                chunk, live = render_stream_chunk(profile, camera=camera)
+                yield chunk
                 
-                # Petite pause pour éviter la surcharge CPU
-                time.sleep(0.005)  # 5ms
+                if live:
+                    # Petite pause pour éviter la surcharge CPU
+                    time.sleep(0.005)  # 5ms
+                else:
+                    # Caméra arrêtée : image d'attente à faible cadence
+                    time.sleep(OptimizedSettings.STREAM_IDLE_INTERVAL)
                 
             except Exception as e:
                 print(f"Erreur streaming optimisé: {e}")
-                yield get_error_frame()
-                time.sleep(0.1)
+                yield error_chunk(profile)
+                time.sleep(OptimizedSettings.STREAM_IDLE_INTERVAL)
     
     return Response(
         generate_frames_optimized(),
         mimetype='multipart/x-mixed-replace; boundary=frame',
-        headers={
-            'Cache-Control': 'no-cache, no-store, must-revalidate',
-            'Pragma': 'no-cache',
-            'Expires': '0',
-            'Connection': 'close'
-        }
+        headers=STREAM_HEADERS
     )
 
 def get_placeholder_frame_optimized():
-    """Frame placeholder optimisée"""
-    import numpy as np
-    
-    # Créer une image plus petite pour réduire la latence
-    placeholder = np.zeros((360, 480, 3), dtype=np.uint8)
-    
-    # Ajouter du texte
-    cv2.putText(placeholder, "Camera Inactive", (120, 160),
-               cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-    cv2.putText(placeholder, "Click 'Start Camera'", (100, 200),
-               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
-    
-    # Encoder avec compression rapide
-    ret, buffer = cv2.imencode('.jpg', placeholder, [cv2.IMWRITE_JPEG_QUALITY, 60])
-    frame_bytes = buffer.tobytes() if ret else b''
-    
-    return (b'--frame\r\n'
-            b'Content-Type: image/jpeg\r\n'
-            b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n'
-            b'\r\n' + frame_bytes + b'\r\n')
+    """Frame placeholder (précalculée)"""
+    return placeholder_chunk()
 
 def get_error_frame():
-    """Frame d'erreur optimisée"""
-    import numpy as np
-    
-    error_frame = np.zeros((360, 480, 3), dtype=np.uint8)
-    cv2.putText(error_frame, "Stream Error", (150, 180),
-               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-    
-    ret, buffer = cv2.imencode('.jpg', error_frame, [cv2.IMWRITE_JPEG_QUALITY, 50])
-    frame_bytes = buffer.tobytes() if ret else b''
-    
-    return (b'--frame\r\n'
-            b'Content-Type: image/jpeg\r\n'
-            b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n'
-            b'\r\n' + frame_bytes + b'\r\n')
+    """Frame d'erreur (précalculée)"""
+    return error_chunk()
 
 
 # ROUTE OPTIMISÉE POUR TESTER LA LATENCE
@@ -718,25 +729,17 @@ def get_error_frame():
 @app.route('/api/camera/stream/fast')
 def video_stream_ultra_fast():
     """Stream ultra-rapide pour test de latence"""
+    profile = request.args.get('profile', 'fast')
+    camera = request.args.get('camera')
+    
     def generate_frames_ultra_fast():
         while True:
             try:
-                if main_system and main_system.camera_manager and main_system.camera_manager.is_active:
-                    frame = main_system.camera_manager.get_latest_frame_fast()
-                    
-                    if frame is not None:
-                        # Compression maximale pour vitesse
-                        ret, buffer = cv2.imencode('.jpg', frame, [
-                            cv2.IMWRITE_JPEG_QUALITY, 50,
-                            cv2.IMWRITE_JPEG_OPTIMIZE, 0
-                        ])
-                        
-                        if ret:
-                            yield (b'--frame\r\n'
-                                   b'Content-Type: image/jpeg\r\n\r\n' + 
-                                   buffer.tobytes() + b'\r\n')
+                chunk, live = render_stream_chunk(profile, fast=True, camera=camera)
+                if chunk is not None:
+                    yield chunk
                 
-                time.sleep(0.033)  # ~30 FPS
+                time.sleep(0.033 if live else OptimizedSettings.STREAM_IDLE_INTERVAL)  # ~30 FPS
                 
             except Exception as e:
                 break
@@ -746,26 +749,89 @@ def video_stream_ultra_fast():
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
+@app.route('/api/cameras', methods=['GET'])
+def list_cameras():
+    """Caméras nommées, leur état et leur part de l'inférence partagée"""
+    inference = main_system.inference_scheduler.get_stats() if main_system else {}
+    return jsonify({
+        'success': True,
+        'main': app_settings.MAIN_CAMERA,
+        'cameras': {name: dict(pipeline.get_stats(), inference=inference.get(name))
+                    for name, pipeline in cameras.items()}
+    })
+
+@app.route('/api/camera/profiles', methods=['GET'])
+def get_stream_profiles():
+    """Profils de flux disponibles et statistiques d'encodage"""
+    return jsonify({
+        'success': True,
+        'default': OptimizedSettings.DEFAULT_STREAM_PROFILE,
+        'profiles': OptimizedSettings.STREAM_PROFILES,
+        'encoder': stream_encoder.get_stats() if stream_encoder else None
+    })
+
+# Préfixe d'ETag propre à ce processus (frame_seq repart de 0 au redémarrage)
+SNAPSHOT_ETAG_EPOCH = format(int(time.time()), 'x')
+
+def wants_jpeg_snapshot():
+    """Mode binaire demandé (?format=jpeg ou Accept: image/jpeg prioritaire sur JSON)"""
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt.lower() in ('jpeg', 'jpg')
+    accept = request.accept_mimetypes
+    return accept['image/jpeg'] > accept['application/json']
+
 @app.route('/api/camera/snapshot')
-def camera_snapshot():
-    """Prendre un snapshot de la caméra"""
+@app.route('/api/cameras/<name>/snapshot')
+def camera_snapshot(name=None):
+    """Prendre un snapshot de la caméra
+    
+    Par défaut JSON (image base64). Avec ?format=jpeg, renvoie l'image
+    brute avec un ETag tiré du numéro de frame : un client qui revient
+    avec If-None-Match reçoit 304 tant que la frame n'a pas changé.
+    ?profile= choisit la taille/qualité (profil 'snapshot' par défaut).
+    """
+    profile = request.args.get('profile', 'snapshot')
+    camera = name or request.args.get('camera')
+    binary = wants_jpeg_snapshot()
     try:
-        if main_system and main_system.camera_manager and main_system.camera_manager.is_active:
-            frame = main_system.camera_manager.get_frame()
-            if frame is not None:
+        manager, encoder = resolve_camera(camera)
+        if manager and manager.is_active and encoder:
+            profile = encoder.resolve_profile(profile)
+            tag = f"{SNAPSHOT_ETAG_EPOCH}-{camera or app_settings.MAIN_CAMERA}-{profile}"
+            
+            if binary:
+                # Vérifier l'ETag avant tout encodage
+                seq = manager.frame_seq  # Sans décoder la frame
+                etag = f"{tag}-{seq}"
+                if request.if_none_match.contains(etag):
+                    response = Response(status=304)
+                    response.set_etag(etag)
+                    response.headers['Cache-Control'] = 'no-cache'
+                    return response
+            
+            # Frame encodée partagée avec les flux du même profil
+            encoded = encoder.get_encoded(profile)
+            if encoded is not None:
+                if binary:
+                    response = Response(encoded.jpeg, mimetype='image/jpeg')
+                    response.set_etag(f"{tag}-{encoded.seq}")
+                    response.headers['Cache-Control'] = 'no-cache'
+                    return response
+                
                 # Encoder en base64 pour JSON
-                ret, buffer = cv2.imencode('.jpg', frame)
-                if ret:
-                    img_base64 = base64.b64encode(buffer).decode('utf-8')
-                    return jsonify({
-                        'success': True,
-                        'image': f'data:image/jpeg;base64,{img_base64}',
-                        'timestamp': datetime.now().isoformat()
-                    })
+                img_base64 = base64.b64encode(encoded.jpeg).decode('utf-8')
+                return jsonify({
+                    'success': True,
+                    'image': f'data:image/jpeg;base64,{img_base64}',
+                    'timestamp': datetime.now().isoformat()
+                })
         
-        return jsonify({'success': False, 'message': 'Caméra inactive ou indisponible'})
+        response = jsonify({'success': False, 'message': 'Caméra inactive ou indisponible'})
+        return (response, 503) if binary else response
     except Exception as e:
-        return jsonify({'success': False, 'message': f'Erreur: {str(e)}'})
+        response = jsonify({'success': False, 'message': f'Erreur: {str(e)}'})
+        return (response, 500) if binary else response
 
 
 # ROUTES RECONNAISSANCE
@@ -956,6 +1022,83 @@ def trigger_capture():
         return jsonify({'success': False, 'message': f'Erreur: {str(e)}'})
 
 
+# ROUTES IMPORT EN MASSE
+
+
+def update_import_status(status_update):
+    """Callback d'avancement de l'import en masse"""
+    import_status.update(status_update)
+    try:
+        push_event('import_progress', import_status)
+    except Exception as e:
+        print(f"Erreur WebSocket: {e}")
+
+def _run_import(enrollment):
+    try:
+        enrollment.run()
+    finally:
+        import_status['active'] = False
+
+@app.route('/api/students/import', methods=['POST'])
+def start_bulk_import():
+    """Importer un zip envoyé (champ "file") ou un zip/dossier du serveur ({"path": ...})
+    
+    Relancer le même import reprend au dernier point de reprise ;
+    avancement poussé par WebSocket ('import_progress').
+    """
+    global current_import
+    
+    try:
+        if import_status['active']:
+            return jsonify({'success': False, 'message': 'Un import est déjà en cours'})
+        
+        from werkzeug.utils import secure_filename
+        from utils.bulk_enrollment import BulkEnrollment
+        
+        if 'file' in request.files:
+            upload = request.files['file']
+            filename = secure_filename(upload.filename or '')
+            if not filename.lower().endswith('.zip'):
+                return jsonify({'success': False, 'message': 'Archive .zip attendue'})
+            app_settings.IMPORTS_PATH.mkdir(parents=True, exist_ok=True)
+            source = app_settings.IMPORTS_PATH / filename
+            upload.save(str(source))
+            restart = request.form.get('restart') == '1'
+        else:
+            data = request.get_json(silent=True) or {}
+            source = Path(data.get('path', '')).expanduser()
+            restart = bool(data.get('restart'))
+            if not data.get('path') or not source.exists():
+                return jsonify({'success': False, 'message': 'Chemin de zip ou de dossier introuvable'})
+        
+        # Vecteurs partagés avec le reconnaisseur du système
+        store = getattr(face_recognizer, 'embeddings', None)
+        current_import = BulkEnrollment(source, store=store, callback=update_import_status, restart=restart)
+        import_status.clear()
+        import_status.update(current_import.status, active=True)
+        threading.Thread(target=_run_import, args=(current_import,), daemon=True, name="BulkImport").start()
+        
+        return jsonify({'success': True, 'message': f'Import démarré ({current_import.job_id})',
+                        'status': import_status})
+        
+    except Exception as e:
+        import_status['active'] = False
+        return jsonify({'success': False, 'message': f'Erreur: {str(e)}'})
+
+@app.route('/api/students/import/status', methods=['GET'])
+def get_import_status():
+    """Avancement de l'import en masse"""
+    return jsonify({'success': True, 'status': import_status})
+
+@app.route('/api/students/import/stop', methods=['POST'])
+def stop_bulk_import():
+    """Interrompre l'import (reprise possible)"""
+    if current_import and import_status.get('active'):
+        current_import.stop()
+        return jsonify({'success': True, 'message': 'Arrêt demandé, reprise possible'})
+    return jsonify({'success': False, 'message': 'Aucun import en cours'})
+
+
 # ROUTES LOGS
 
 
@@ -973,6 +1116,21 @@ def get_logs(log_type):
         return jsonify({'logs': [], 'count': 0, 'error': str(e)})
 
 
+# ROUTES EMPLOI DU TEMPS
+
+
+@app.route('/api/schedule/current', methods=['GET'])
+def get_current_schedule():
+    """Créneau en cours dans la salle, présents et absents"""
+    try:
+        if main_system:
+            return jsonify({'success': True, **main_system.get_slot_status()})
+        else:
+            return jsonify({'success': False, 'message': 'Système non initialisé'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erreur: {str(e)}'})
+
+
 # ROUTES PORTE
 
 
@@ -981,13 +1139,25 @@ def open_door():
     """Ouvrir la porte"""
     try:
         if door_controller and door_controller.is_connected:
+            # Commande mise en file, le thread série s'occupe de l'envoi
             success = door_controller.open_door(reason="manual")
-            return jsonify({'success': success, 'message': 'Porte ouverte' if success else 'Erreur ouverture'})
+            return jsonify({'success': success, 'message': 'Ouverture demandée' if success else 'File de commandes pleine'})
         else:
             return jsonify({'success': False, 'message': 'Contrôleur de porte non connecté'})
     except Exception as e:
         return jsonify({'success': False, 'message': f'Erreur: {str(e)}'})
 
+@app.route('/api/door/status', methods=['GET'])
+def door_status():
+    """Obtenir l'état de la liaison série et les latences d'acquittement"""
+    try:
+        if door_controller:
+            return jsonify({'success': True, 'door': door_controller.get_stats()})
+        else:
+            return jsonify({'success': False, 'message': 'Contrôleur de porte non initialisé'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erreur: {str(e)}'})
+
 @app.route('/api/door/test', methods=['POST'])
 def test_door():
     """Test de la porte avec reconnaissance automatique"""
@@ -1096,6 +1266,18 @@ def handle_capture_status_request():
     """Demande du statut de capture"""
     emit('capture_status_update', capture_status)
 
+@socketio.on('subscribe_dashboard')
+def handle_dashboard_subscribe(data=None):
+    """Abonner un dashboard aux deltas d'une salle (toutes si absente)"""
+    room = (data or {}).get('room')
+    join_room(DashboardPublisher.channel(room))
+    emit('dashboard_delta', dashboard_publisher.snapshot(room))
+
+@socketio.on('unsubscribe_dashboard')
+def handle_dashboard_unsubscribe(data=None):
+    """Désabonner un dashboard"""
+    leave_room(DashboardPublisher.channel((data or {}).get('room')))
+
 
 # ROUTES LÉGACY (COMPATIBILITÉ)
 
@@ -0,0 +1,295 @@
+"""Traitement différé d'un cours enregistré
+
+    python batch_process.py cours.mp4 --start 2026-10-19T08:30 --workers 4
+
+La vidéo est découpée en tranches de BATCH_CHUNK_SECONDS traitées par un
+pool de processus ; chaque processus charge une seule fois détecteur et
+reconnaisseur, puis lit ses tranches directement dans le fichier (pas de
+frame transmise entre processus). Reconnaissance complète toutes les
+BATCH_RECOGNITION_INTERVAL secondes de vidéo, noms suivis par position
+entre deux. Les résultats sont fusionnés dans l'ordre chronologique et
+écrits dans les CSV habituels de SmartClassroomLogger, horodatés à
+l'heure de l'enregistrement (`--start`, défaut : date de modification
+du fichier moins la durée de la vidéo).
+
+Les CSV sont complétés, pas remplacés : une présence déjà enregistrée
+pour l'étudiant à cette date est ignorée, mais relancer la même vidéo
+ajoute de nouveau ses mesures d'attention et d'émotion. Pour un essai
+ou un retraitement, écrire dans un autre dossier (`--output-dir`).
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import cv2
+
+from config.settings import settings
+from core.attention_tracker import SimplifiedAttentionTracker
+from core.emotion_analyzer import SimplifiedEmotionAnalyzer
+from core.face_detector import FaceDetector
+from core.face_recognizer import FaceRecognizer
+from core.frame_context import FrameContext
+from core.recognition_backends import RECOGNITION_BACKENDS, create_face_recognizer
+from data.logger import SmartClassroomLogger
+from data.models import AttendanceRecord
+from utils.helpers import ScheduleManager
+
+log = logging.getLogger("batch_process")
+
+UNRECOGNIZED = ("Inconnu", "Erreur", "Base_vide")
+
+# Modèles du processus worker (chargés par _init_worker)
+_worker = {}
+
+
+def _init_worker(recognition_backend=None):
+    """Charger les modèles une fois par processus du pool"""
+    # Un thread OpenCV par processus : le parallélisme vient du pool
+    cv2.setNumThreads(1)
+    _worker.update({
+        'detector': FaceDetector(),
+        'recognizer': create_face_recognizer(recognition_backend)
+    })
+
+
+def _nearest_name(box, tracked):
+    """Nom du visage reconnu le plus proche (suivi entre deux reconnaissances)"""
+    x, y, w, h = box
+    center = (x + w / 2, y + h / 2)
+    best, best_distance = "Inconnu", max(w, h)
+    for (tx, ty, tw, th), name in tracked:
+        distance = ((tx + tw / 2 - center[0]) ** 2 + (ty + th / 2 - center[1]) ** 2) ** 0.5
+        if distance < best_distance:
+            best, best_distance = name, distance
+    return best
+
+
+def process_chunk(path, first, last, fps, start, step, recognition_interval):
+    """Analyser les frames [first, last[ de la vidéo (une frame sur `step`)
+
+    Retourne les premières apparitions par étudiant et les mesures
+    d'attention/émotion de la tranche, triées par horodatage.
+    """
+    detector = _worker['detector']
+    recognizer = _worker['recognizer']
+    # Historiques propres à la tranche (mouvements, intervalle des émotions)
+    attention_tracker = SimplifiedAttentionTracker(None)
+    emotion_analyzer = SimplifiedEmotionAnalyzer(None)
+
+    result = {'first': first, 'attendance': {}, 'attention': [], 'emotions': [],
+              'frames': 0, 'faces': 0, 'recognitions': 0}
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise RuntimeError(f"Lecture impossible: {path}")
+
+    try:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, first)
+        tracked = []
+        last_recognition = None
+
+        for index in range(first, last):
+            # Frames non analysées : grab() avance sans décoder l'image
+            if (index - first) % step:
+                if not capture.grab():
+                    break
+                continue
+            ok, frame = capture.read()
+            if not ok:
+                break
+
+            at = start + timedelta(seconds=index / fps)
+            context = FrameContext(frame, seq=index, timestamp=at.timestamp())
+            result['frames'] += 1
+
+            boxes = [tuple(int(v) for v in face) for face in detector.detect_faces_optimized(context)]
+            if not boxes:
+                continue
+            result['faces'] += len(boxes)
+
+            if last_recognition is None or (index - last_recognition) / fps >= recognition_interval:
+                names = [name for name, _ in recognizer.recognize_batch([context.crop(box) for box in boxes])]
+                last_recognition = index
+                result['recognitions'] += len(boxes)
+                for name in names:
+                    if name not in UNRECOGNIZED:
+                        result['attendance'].setdefault(name, at)
+            else:
+                names = [_nearest_name(box, tracked) for box in boxes]
+            tracked = [(box, name) for box, name in zip(boxes, names) if name not in UNRECOGNIZED]
+
+            result['attention'].extend(attention_tracker.update_tracking(frame, boxes, names, at=at))
+            for box, name in tracked:
+                record = emotion_analyzer.analyze_emotion(context.crop_gray(box), name, at=at)
+                if record:
+                    result['emotions'].append(record)
+    finally:
+        capture.release()
+
+    return result
+
+
+def video_info(path):
+    """(frames, fps) de la vidéo"""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise RuntimeError(f"Lecture impossible: {path}")
+    try:
+        frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+    finally:
+        capture.release()
+    if frames <= 0:
+        raise RuntimeError(f"Nombre de frames inconnu: {path}")
+    return frames, fps
+
+
+def plan_chunks(frames, fps, chunk_seconds, step):
+    """Tranches [first, last[ alignées sur le pas d'échantillonnage"""
+    size = max(step, int(round(chunk_seconds * fps / step)) * step)
+    return [(first, min(first + size, frames)) for first in range(0, frames, size)]
+
+
+def merge_results(results, logger, schedule_manager=None):
+    """Écrire les résultats de toutes les tranches dans l'ordre chronologique
+
+    Une seule présence par étudiant (sa première apparition dans la vidéo),
+    cours et salle résolus à cet instant par l'EDT ; aucune si le CSV en
+    contient déjà une pour l'étudiant ce jour-là (vidéo déjà traitée).
+    """
+    schedule_manager = schedule_manager or ScheduleManager()
+    first_seen = {}
+    for result in results:
+        for name, at in result['attendance'].items():
+            if name not in first_seen or at < first_seen[name]:
+                first_seen[name] = at
+    logged = {(row['student_name'], row['timestamp'][:10])
+              for row in logger.get_recent_logs('attendance', sys.maxsize)}
+    already = [name for name, at in first_seen.items() if (name, at.date().isoformat()) in logged]
+    for name in already:
+        del first_seen[name]
+    if already:
+        log.info("Présences déjà enregistrées ignorées: %s", ", ".join(sorted(already)))
+
+    events = []
+    for name, at in first_seen.items():
+        course, room = schedule_manager.check_student_schedule(name, at=at)
+        has_class = course is not None
+        if has_class and settings.CLASSROOM and room.strip().lower() != settings.CLASSROOM.strip().lower():
+            has_class = False
+        record = AttendanceRecord(student_name=name, timestamp=at, has_class=has_class,
+                                  course=course, classroom=room)
+        events.append((at, 0, logger.log_attendance, record))
+    for result in results:
+        events.extend((record.timestamp, 1, logger.log_attention, record) for record in result['attention'])
+        events.extend((record.timestamp, 2, logger.log_emotion, record) for record in result['emotions'])
+
+    events.sort(key=lambda event: event[:2])
+    for _, _, write, record in events:
+        write(record)
+    return {'attendance': len(first_seen),
+            'attendance_skipped': len(already),
+            'attention': sum(len(result['attention']) for result in results),
+            'emotions': sum(len(result['emotions']) for result in results)}
+
+
+def process_video(path, start=None, workers=None, chunk_seconds=None, sample_interval=None,
+                  recognition_interval=None, recognition_backend=None, logger=None):
+    """Traiter une vidéo enregistrée et écrire les logs ; retourne un résumé"""
+    workers = workers or settings.BATCH_WORKERS
+    chunk_seconds = chunk_seconds or settings.BATCH_CHUNK_SECONDS
+    sample_interval = sample_interval or settings.BATCH_SAMPLE_INTERVAL
+    recognition_interval = recognition_interval or settings.BATCH_RECOGNITION_INTERVAL
+
+    frames, fps = video_info(path)
+    duration = frames / fps
+    if start is None:
+        start = datetime.fromtimestamp(os.path.getmtime(path)) - timedelta(seconds=duration)
+    step = max(1, int(round(fps * sample_interval)))
+    chunks = plan_chunks(frames, fps, chunk_seconds, step)
+    log.info("%s: %.0f s de vidéo (%s frames à %.1f fps), %s tranche(s), %s worker(s), début %s",
+             path, duration, frames, fps, len(chunks), workers, start.isoformat())
+
+    # Vecteurs du dataset à jour avant le pool : les workers ne font que comparer
+    if (recognition_backend or settings.RECOGNITION_BACKEND) != 'remote':
+        FaceRecognizer().sync_embeddings(force=True)
+
+    started = time.perf_counter()
+    results = []
+
+    def done(result, processed):
+        results.append(result)
+        elapsed = time.perf_counter() - started
+        log.info("Tranche %s/%s terminée (%.0f s de vidéo en %.0f s, x%.1f temps réel)",
+                 len(results), len(chunks), processed, elapsed, processed / elapsed if elapsed else 0)
+
+    processed = 0.0
+    args = (fps, start, step, recognition_interval)
+    if workers == 1:
+        # Sans pool : pas de coût de démarrage des processus
+        _init_worker(recognition_backend)
+        for first, last in chunks:
+            result = process_chunk(path, first, last, *args)
+            processed += (last - first) / fps
+            done(result, processed)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(recognition_backend,)) as executor:
+            futures = {executor.submit(process_chunk, path, first, last, *args): (first, last)
+                       for first, last in chunks}
+            for future in as_completed(futures):
+                first, last = futures[future]
+                processed += (last - first) / fps
+                done(future.result(), processed)
+
+    summary = merge_results(results, logger or SmartClassroomLogger())
+    elapsed = time.perf_counter() - started
+    summary.update({
+        'video_seconds': round(duration, 1),
+        'elapsed_seconds': round(elapsed, 1),
+        'realtime_factor': round(duration / elapsed, 1) if elapsed else 0,
+        'frames_analyzed': sum(result['frames'] for result in results),
+        'faces': sum(result['faces'] for result in results),
+        'recognitions': sum(result['recognitions'] for result in results)
+    })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Présence, attention et émotions d'un cours enregistré")
+    parser.add_argument('video', help="Fichier vidéo du cours")
+    parser.add_argument('--start', type=datetime.fromisoformat,
+                        help="Début de l'enregistrement (ISO, ex. 2026-10-19T08:30)")
+    parser.add_argument('--workers', type=int, default=settings.BATCH_WORKERS)
+    parser.add_argument('--chunk-seconds', type=float, default=settings.BATCH_CHUNK_SECONDS)
+    parser.add_argument('--sample-interval', type=float, default=settings.BATCH_SAMPLE_INTERVAL,
+                        help="Secondes de vidéo entre deux frames analysées")
+    parser.add_argument('--recognition-interval', type=float, default=settings.BATCH_RECOGNITION_INTERVAL,
+                        help="Secondes entre deux reconnaissances complètes")
+    parser.add_argument('--recognition-backend', choices=sorted(RECOGNITION_BACKENDS),
+                        default=settings.RECOGNITION_BACKEND)
+    parser.add_argument('--output-dir', type=Path,
+                        help="Dossier des CSV produits (défaut : logs/, complétés)")
+    args = parser.parse_args()
+
+    if args.output_dir:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        settings.LOGS_PATH = args.output_dir
+    # Le logger configure la journalisation (fichier et console)
+    logger = SmartClassroomLogger()
+    summary = process_video(args.video, args.start, args.workers, args.chunk_seconds,
+                            args.sample_interval, args.recognition_interval,
+                            args.recognition_backend, logger)
+    print(f" {args.video}: {summary['video_seconds']} s traitées en {summary['elapsed_seconds']} s "
+          f"(x{summary['realtime_factor']} temps réel)")
+    print(f" Présences: {summary['attendance']} (déjà enregistrées: {summary['attendance_skipped']}), "
+          f"attention: {summary['attention']}, émotions: {summary['emotions']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Comparer la recherche exacte et les index approchés (rappel et latence)
+
+    python -m benchmarks.bench_ann --sizes 10000 50000 100000
+    python -m benchmarks.bench_ann --store --backends exact ivf hnsw
+
+Sans --store, la galerie est synthétique : `--per-student` images
+bruitées autour d'un vecteur par étudiant (2622 = dimension de VGG-Face
+dans deepface 0.0.79), requêtes = nouvelles images bruitées d'étudiants
+tirés au hasard. Le bruit par défaut (2.0) resserre les similarités des
+voisins (l'IVF descend vers 0.6 de rappel à 10k) ; ces chiffres
+comparent les index entre eux, seul --store (galerie = EmbeddingStore
+du modèle configuré, requêtes = vecteurs de la galerie perturbés) donne
+le rappel réel.
+Le rappel@k compare les k voisins de chaque index à ceux de la
+recherche exacte ; « identité » : même étudiant que l'exacte au rang 1.
+La latence est mesurée requête par requête (usage de la reconnaissance).
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import save_results, summarize_ms
+from core.ann_index import ANN_BACKENDS, ExactIndex, build_index
+
+
+def normalize(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_gallery(size, per_student, dim, noise, queries, rng):
+    """(galerie, étudiant de chaque image, requêtes)"""
+    students = max(1, size // per_student)
+    centers = rng.standard_normal((students, dim)).astype(np.float32)
+    owners = np.arange(size) % students
+    gallery = normalize(centers[owners] + noise * rng.standard_normal((size, dim)).astype(np.float32))
+    picked = rng.integers(0, students, queries)
+    probes = normalize(centers[picked] + noise * rng.standard_normal((queries, dim)).astype(np.float32))
+    return gallery, owners, probes
+
+
+def store_gallery(noise, queries, rng):
+    """Galerie réelle (EmbeddingStore) et requêtes perturbées"""
+    from config.settings import settings
+    from data.embedding_store import EmbeddingStore
+
+    names, gallery, _ = EmbeddingStore(settings.RECOGNITION_MODEL).matrix()
+    if not len(names):
+        raise SystemExit("EmbeddingStore vide : lancer python -m utils.bulk_enrollment --reindex")
+    _, owners = np.unique(names, return_inverse=True)
+    picked = rng.integers(0, len(gallery), queries)
+    scale = noise / np.sqrt(gallery.shape[1])
+    probes = normalize(gallery[picked] + scale * rng.standard_normal((queries, gallery.shape[1])).astype(np.float32))
+    return gallery, owners, probes
+
+
+def run_index(index, probes, k):
+    """Voisins et durées, une requête à la fois"""
+    durations = []
+    neighbours = []
+    for probe in probes:
+        start = time.perf_counter()
+        indices, _ = index.search(probe[None, :], k)
+        durations.append(time.perf_counter() - start)
+        neighbours.append(indices[0])
+    return np.array(neighbours), durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des index de vecteurs de visages")
+    parser.add_argument('--sizes', type=int, nargs='*', default=[10000, 50000])
+    parser.add_argument('--store', action='store_true', help="Galerie réelle (EmbeddingStore)")
+    parser.add_argument('--backends', nargs='*', default=list(ANN_BACKENDS))
+    parser.add_argument('--dim', type=int, default=2622, help="Dimension (2622 = VGG-Face, deepface 0.0.79)")
+    parser.add_argument('--per-student', type=int, default=20)
+    parser.add_argument('--noise', type=float, default=2.0,
+                        help="Bruit relatif des images synthétiques (plus fort = voisins moins séparés)")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmarks/results/ann.json')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    galleries = ([('store',) + store_gallery(args.noise, args.queries, rng)] if args.store else
+                 [(size,) + synthetic_gallery(size, args.per_student, args.dim, args.noise, args.queries, rng)
+                  for size in args.sizes])
+
+    results = {}
+    for size, gallery, owners, probes in galleries:
+        key = f"{len(gallery)}x{gallery.shape[1]}"
+        print(f"\nGalerie {key} ({size}), {len(probes)} requêtes, k={args.k}")
+        reference, _ = run_index(ExactIndex(gallery), probes, args.k)
+        results[key] = {}
+        for name in args.backends:
+            start = time.perf_counter()
+            index = build_index(gallery, name)
+            build_time = time.perf_counter() - start
+            if index.name != name:
+                print(f"{name}: bibliothèque absente, ignoré")
+                continue
+
+            neighbours, durations = run_index(index, probes, args.k)
+            recall_k = np.mean([len(set(found) & set(expected)) / len(expected)
+                                for found, expected in zip(neighbours, reference)])
+            recall_1 = float(np.mean(neighbours[:, 0] == reference[:, 0]))
+            identity = float(np.mean(owners[neighbours[:, 0]] == owners[reference[:, 0]]))
+            results[key][name] = {
+                'build_s': round(build_time, 3),
+                'latency_ms': summarize_ms(durations),
+                'recall_at_1': round(recall_1, 4),
+                f'recall_at_{args.k}': round(float(recall_k), 4),
+                'identity_agreement': round(identity, 4),
+            }
+            summary = results[key][name]
+            print(f"{name:6s} construction {build_time:7.2f} s  p50 {summary['latency_ms']['p50']:8.3f} ms  "
+                  f"p95 {summary['latency_ms']['p95']:8.3f} ms  rappel@1 {recall_1:.3f}  "
+                  f"rappel@{args.k} {recall_k:.3f}  identité {identity:.3f}")
+
+    save_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Comparer les détecteurs de visages (latence et rappel) sur des frames enregistrées
+
+    python -m benchmarks.bench_detectors --source enregistrements/salle1.mp4
+    python -m benchmarks.bench_detectors --source frames/ --annotations frames/visages.json
+
+Sans annotations, la référence est l'union des détections de tous les
+backends (--reference pour en choisir un) : le rappel mesure alors la
+part des visages trouvés par au moins un détecteur.
+Format des annotations : {"<index de frame>": [[x, y, w, h], ...]}.
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.common import load_frames, save_results, summarize_ms
+from core.detector_backends import DETECTOR_BACKENDS, HaarBackend, create_detector_backend
+
+
+def iou(a, b):
+    """Intersection sur union de deux boîtes (x, y, w, h)"""
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    inter_w = max(0, min(ax2, bx2) - max(a[0], b[0]))
+    inter_h = max(0, min(ay2, by2) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union else 0.0
+
+
+def match(predicted, expected, threshold):
+    """Nombre de boîtes attendues retrouvées (appariement glouton par IoU)"""
+    remaining = list(predicted)
+    found = 0
+    for box in expected:
+        best = max(remaining, key=lambda p: iou(p, box), default=None)
+        if best is not None and iou(best, box) >= threshold:
+            remaining.remove(best)
+            found += 1
+    return found
+
+
+def merge_boxes(box_lists, threshold):
+    """Union de plusieurs jeux de boîtes (doublons fusionnés par IoU)"""
+    merged = []
+    for boxes in box_lists:
+        for box in boxes:
+            if all(iou(box, other) < threshold for other in merged):
+                merged.append(box)
+    return merged
+
+
+def run_detector(backend, frames, target_width, repeat):
+    """Détections par frame et durées"""
+    durations = []
+    detections = []
+    for iteration in range(repeat):
+        for frame in frames:
+            start = time.perf_counter()
+            found = backend.detect(frame, target_width)
+            durations.append(time.perf_counter() - start)
+            if iteration == 0:
+                detections.append(found)
+    return detections, durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des détecteurs de visages")
+    parser.add_argument('--source', required=True, help="Vidéo ou dossier de frames enregistrées")
+    parser.add_argument('--annotations', help="Vérité terrain JSON (index de frame -> boîtes)")
+    parser.add_argument('--backends', nargs='*', default=list(DETECTOR_BACKENDS))
+    parser.add_argument('--widths', type=int, nargs='*', default=[320, 640], help="Largeurs de travail")
+    parser.add_argument('--reference', help="Backend de référence (défaut : union de tous)")
+    parser.add_argument('--iou', type=float, default=0.4)
+    parser.add_argument('--max-frames', type=int, default=200)
+    parser.add_argument('--step', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--output', default='benchmarks/results/detectors.json')
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.max_frames, args.step)
+    print(f"{len(frames)} frames {frames[0].shape[1]}x{frames[0].shape[0]} chargées")
+
+    runs = {}
+    for name in args.backends:
+        backend = create_detector_backend(name)
+        if backend.name != name:
+            print(f"{name}: modèle absent, ignoré")
+            continue
+        # Le SSD a une entrée fixe : une seule largeur
+        widths = args.widths if hasattr(backend, 'target_width') else [None]
+        for width in widths:
+            key = f"{name}@{width}" if width else name
+            detections, durations = run_detector(backend, frames, width, args.repeat)
+            runs[key] = {
+                'boxes': [[d.box for d in found] for found in detections],
+                'confidences': [[d.confidence for d in found] for found in detections],
+                'latency': summarize_ms(durations),
+                'landmarks': any(d.landmarks for found in detections for d in found),
+            }
+            print(f"{key}: {runs[key]['latency']['mean']:.1f} ms/frame")
+
+    if args.annotations:
+        with open(args.annotations, encoding='utf-8') as f:
+            annotations = json.load(f)
+        truth = [[tuple(box) for box in annotations.get(str(i), [])] for i in range(len(frames))]
+        reference_name = 'annotations'
+    elif args.reference:
+        reference_key = next(key for key in runs if key.split('@')[0] == args.reference)
+        truth = runs[reference_key]['boxes']
+        reference_name = reference_key
+    else:
+        truth = [merge_boxes([run['boxes'][i] for run in runs.values()], args.iou)
+                 for i in range(len(frames))]
+        reference_name = 'union'
+
+    total_expected = sum(len(boxes) for boxes in truth)
+    results = {'reference': reference_name, 'faces_in_reference': total_expected, 'detectors': {}}
+    for key, run in runs.items():
+        found = sum(match(run['boxes'][i], truth[i], args.iou) for i in range(len(frames)))
+        predicted = sum(len(boxes) for boxes in run['boxes'])
+        results['detectors'][key] = {
+            'latency_ms': run['latency'],
+            'recall': round(found / total_expected, 3) if total_expected else None,
+            'precision': round(found / predicted, 3) if predicted else None,
+            'faces_per_frame': round(predicted / len(frames), 2),
+            'landmarks': run['landmarks'],
+        }
+
+    haar_keys = [key for key in runs if key.startswith(HaarBackend.name)]
+    print(f"\nRéférence: {reference_name} ({total_expected} visages)")
+    for key, summary in results['detectors'].items():
+        marker = "  (Haar)" if key in haar_keys else ""
+        print(f"{key:12s} p50 {summary['latency_ms']['p50']:7.1f} ms  p95 {summary['latency_ms']['p95']:7.1f} ms  "
+              f"rappel {summary['recall']}  précision {summary['precision']}{marker}")
+
+    save_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Comparer les encodeurs JPEG du flux sur des frames enregistrées
+
+    python -m benchmarks.bench_jpeg --source enregistrements/salle1.mp4
+"""
+
+import argparse
+import time
+
+import cv2
+
+from benchmarks.common import load_frames, save_results, summarize_ms
+from config.settings import OptimizedSettings
+from core.jpeg_encoders import SUBSAMPLING_MODES, available_encoders, get_jpeg_encoder
+
+
+def resize_to_width(frame, width):
+    h, w = frame.shape[:2]
+    if w <= width:
+        return frame
+    return cv2.resize(frame, (width, int(h * width / w)), interpolation=cv2.INTER_AREA)
+
+
+def bench_encoder(encoder, frames, quality, subsampling, optimize=False, progressive=False, repeat=1):
+    """Mesurer le temps et la taille d'encodage"""
+    durations = []
+    sizes = []
+    for _ in range(repeat):
+        for frame in frames:
+            start = time.perf_counter()
+            data = encoder.encode(frame, quality=quality, subsampling=subsampling,
+                                  optimize=optimize, progressive=progressive)
+            durations.append(time.perf_counter() - start)
+            sizes.append(len(data) if data else 0)
+    summary = summarize_ms(durations)
+    summary['avg_kb'] = round(sum(sizes) / len(sizes) / 1024, 1)
+    summary['fps_one_core'] = round(1000 / summary['mean'], 1) if summary['mean'] else 0
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des encodeurs JPEG du flux")
+    parser.add_argument('--source', required=True, help="Vidéo ou dossier de frames enregistrées")
+    parser.add_argument('--max-frames', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--subsampling', nargs='*', default=['420', '444'], choices=SUBSAMPLING_MODES)
+    parser.add_argument('--output', default='benchmarks/results/jpeg.json')
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.max_frames)
+    print(f"{len(frames)} frames {frames[0].shape[1]}x{frames[0].shape[0]} chargées")
+
+    encoders = available_encoders()
+    print(f"Encodeurs disponibles: {', '.join(encoders)}")
+
+    results = {}
+    for profile_name, profile in OptimizedSettings.STREAM_PROFILES.items():
+        scaled = [resize_to_width(frame, profile['width']) for frame in frames]
+        for encoder_name in encoders:
+            encoder = get_jpeg_encoder(encoder_name)
+            variants = [(sub, False, False) for sub in args.subsampling]
+            # Ancien réglage du flux principal, pour comparaison
+            variants.append(('420', True, True))
+            for subsampling, optimize, progressive in variants:
+                label = f"{profile_name}/{encoder_name}/{subsampling}"
+                if optimize or progressive:
+                    label += "/optimize+progressive"
+                summary = bench_encoder(encoder, scaled, profile['quality'], subsampling,
+                                        optimize, progressive, args.repeat)
+                results[label] = summary
+                print(f"{label:45s} {summary['mean']:7.2f} ms (p95 {summary['p95']:6.2f})"
+                      f"  {summary['avg_kb']:6.1f} Ko  {summary['fps_one_core']:7.1f} fps")
+
+    save_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
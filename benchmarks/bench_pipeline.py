@@ -0,0 +1,279 @@
+"""Benchmark de bout en bout du pipeline SmartClassroomSystemFixed
+
+Source synthétique (visages découpés collés en grille) ou enregistrée :
+
+    python -m benchmarks.bench_pipeline --faces-dir visages/ --faces 1 4 8 --students 10 100
+    python -m benchmarks.bench_pipeline --source enregistrements/salle1.mp4 --students 50
+
+Chaque scénario tourne dans un dossier temporaire (dataset et logs) : les
+étudiants inscrits sont générés à partir des mêmes images de visages, la
+mesure porte sur les temps, pas sur la justesse de la reconnaissance.
+"""
+
+import argparse
+import contextlib
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from benchmarks.common import IMAGE_EXTENSIONS, save_results, summarize_ms
+from config.settings import settings
+from core.frame_sources import FrameSource, create_frame_source
+
+
+class SyntheticClassroomSource(FrameSource):
+    """Frames 640x480 avec `faces_per_frame` visages disposés en grille"""
+
+    name = "synthetic"
+
+    def __init__(self, face_images, faces_per_frame: int, frames: int = 2700,
+                 fps: float = 0, variants: int = 8, seed: int = 0):
+        super().__init__()
+        self.total = frames
+        self.fps = fps
+        self.frames_read = 0
+        self.started_at = 0.0
+        self.faces_per_frame = faces_per_frame
+
+        # Quelques variantes précalculées (léger décalage des visages) :
+        # la génération ne pèse pas sur la mesure
+        rng = np.random.default_rng(seed)
+        self.variants = [self._render(face_images, faces_per_frame, rng) for _ in range(variants)]
+
+    @staticmethod
+    def _render(face_images, count, rng):
+        frame = np.full((480, 640, 3), 90, dtype=np.uint8)
+        frame += rng.integers(0, 20, frame.shape, dtype=np.uint8)
+        if count == 0:
+            return frame
+
+        cols = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / cols)
+        cell_w, cell_h = 640 // cols, 480 // rows
+        size = int(min(cell_w, cell_h) * 0.8)
+        for i in range(count):
+            face = cv2.resize(face_images[i % len(face_images)], (size, size))
+            jitter_x, jitter_y = rng.integers(0, max(1, min(cell_w, cell_h) - size), 2)
+            x = (i % cols) * cell_w + int(jitter_x)
+            y = (i // cols) * cell_h + int(jitter_y)
+            frame[y:y + size, x:x + size] = face
+        return frame
+
+    def open(self) -> bool:
+        self.frames_read = 0
+        self.exhausted = False
+        self.started_at = time.perf_counter()
+        return True
+
+    def read(self):
+        if self.frames_read >= self.total:
+            self.exhausted = True
+            return False, None
+        frame = self.variants[self.frames_read % len(self.variants)].copy()
+        self.frames_read += 1
+        if self.fps:
+            delay = self.started_at + self.frames_read / self.fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return True, frame
+
+    def is_opened(self) -> bool:
+        return not self.exhausted
+
+    def describe(self) -> dict:
+        return {'type': self.name, 'width': 640, 'height': 480, 'fps': self.fps,
+                'faces_per_frame': self.faces_per_frame, 'frame_total': self.total}
+
+
+def load_face_images(faces_dir):
+    """Images de visages (découpées) utilisées pour la source et l'inscription"""
+    files = sorted(f for f in Path(faces_dir).rglob('*') if f.suffix.lower() in IMAGE_EXTENSIONS)
+    images = [img for img in (cv2.imread(str(f)) for f in files) if img is not None]
+    if not images:
+        raise ValueError(f"Aucune image de visage dans {faces_dir}")
+    return images
+
+
+def enroll_students(dataset_path: Path, count: int, face_images, images_per_student: int = 3):
+    """Créer `count` étudiants fictifs dans un dataset temporaire"""
+    for i in range(count):
+        student_dir = dataset_path / f"student_{i:05d}"
+        student_dir.mkdir(parents=True, exist_ok=True)
+        for j in range(images_per_student):
+            face = face_images[(i * images_per_student + j) % len(face_images)]
+            cv2.imwrite(str(student_dir / f"{j}.jpg"), face)
+
+
+def timed(obj, attr, durations):
+    """Remplacer une méthode d'instance par une version chronométrée"""
+    original = getattr(obj, attr)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            durations.append(time.perf_counter() - start)
+
+    setattr(obj, attr, wrapper)
+
+
+def stream_client(encoder, profile, fps, stop_event):
+    """Client de flux simulé : demande la frame encodée à cadence fixe"""
+    while not stop_event.is_set():
+        encoder.get_encoded(profile)
+        time.sleep(1.0 / fps)
+
+
+def run_scenario(args, faces_per_frame, students, face_images):
+    """Exécuter un scénario et retourner ses mesures"""
+    from main import SmartClassroomSystemFixed
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        tmp = Path(tmp)
+        original = (settings.DATASET_PATH, settings.LOGS_PATH, settings.CLASSROOM)
+        settings.DATASET_PATH = Path(args.dataset) if args.dataset else tmp / "dataset"
+        settings.LOGS_PATH = tmp / "logs"
+        settings.CLASSROOM = None
+
+        try:
+            if not args.dataset:
+                enroll_students(settings.DATASET_PATH, students, face_images)
+
+            if args.source:
+                source = create_frame_source(args.source)
+            else:
+                source = SyntheticClassroomSource(face_images, faces_per_frame, args.frames, args.fps)
+
+            system = SmartClassroomSystemFixed(source)
+
+            detection_times, recognition_times, log_times = [], [], []
+            faces_found = []
+            # Vecteurs du dataset calculés avant la mesure (sinon "Base_vide")
+            system.face_recognizer.sync_embeddings(force=True)
+            timed(system.face_recognizer, 'recognize_face', recognition_times)
+            timed(system.logger, '_write_csv', log_times)
+
+            detect = system.face_detector.detect_faces_optimized
+
+            def detect_and_count(frame, *a, **kw):
+                start = time.perf_counter()
+                faces = detect(frame, *a, **kw)
+                detection_times.append(time.perf_counter() - start)
+                faces_found.append(len(faces))
+                return faces
+
+            system.face_detector.detect_faces_optimized = detect_and_count
+
+            stop_clients = threading.Event()
+            started = time.perf_counter()
+            if not system.start(connect_door=False, connect_api=False):
+                raise RuntimeError("Impossible de démarrer la source de frames")
+
+            clients = [threading.Thread(target=stream_client, daemon=True,
+                                        args=(system.stream_encoder, profile, args.stream_fps, stop_clients))
+                       for profile in args.stream_profiles for _ in range(args.stream_clients)]
+            for client in clients:
+                client.start()
+
+            system.camera_manager.source_finished.wait(timeout=args.duration)
+            capture_elapsed = time.perf_counter() - started
+            frames_captured = system.camera_manager.frame_count
+
+            # Laisser la dernière reconnaissance se terminer
+            deadline = time.time() + 10
+            while (system.recognition_in_progress or not system.face_recognition_queue.empty()) \
+                    and time.time() < deadline:
+                time.sleep(0.05)
+
+            stop_clients.set()
+            status = system.get_queue_status()
+            stream_stats = system.stream_encoder.get_stats()
+            system.stop()
+        finally:
+            settings.DATASET_PATH, settings.LOGS_PATH, settings.CLASSROOM = original
+
+    elapsed = time.perf_counter() - started
+    with_faces = sum(1 for n in faces_found if n)
+    lost = status['recognitions_skipped'] + status['recognition_queue_full']
+
+    # Le premier appel DeepFace charge le modèle
+    recognition = summarize_ms(recognition_times[1:])
+    recognition['first_call_ms'] = round(recognition_times[0] * 1000, 1) if recognition_times else None
+
+    return {
+        'faces_per_frame': faces_per_frame if not args.source else None,
+        'students': students if not args.dataset else None,
+        'source': args.source or 'synthetic',
+        'elapsed_s': round(elapsed, 2),
+        'capture': {
+            'frames': frames_captured,
+            'fps': round(frames_captured / capture_elapsed, 1) if capture_elapsed else 0,
+            'processed_frames': status['frame_count'],
+        },
+        'detection': dict(summarize_ms(detection_times),
+                          faces_avg=round(float(np.mean(faces_found)), 2) if faces_found else 0,
+                          frames_with_faces=with_faces),
+        'recognition': dict(recognition,
+                            successful=status['successful_recognitions'],
+                            failed=status['failed_recognitions']),
+        'queues': {
+            'recognitions_skipped': status['recognitions_skipped'],
+            'recognition_queue_full': status['recognition_queue_full'],
+            'recognition_drop_rate': round(lost / with_faces, 3) if with_faces else 0,
+            'emotions_replaced': status['emotions_replaced'],
+        },
+        'logs': dict(summarize_ms(log_times),
+                     writes_per_s=round(len(log_times) / elapsed, 1) if elapsed else 0,
+                     capacity_per_s=round(len(log_times) / sum(log_times), 1) if log_times else 0),
+        'stream': stream_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout du pipeline")
+    parser.add_argument('--faces-dir', help="Visages découpés (source synthétique et inscriptions)")
+    parser.add_argument('--source', help="Vidéo ou dossier enregistré à la place de la source synthétique")
+    parser.add_argument('--dataset', help="Dataset existant à la place des étudiants générés")
+    parser.add_argument('--faces', type=int, nargs='*', default=[1, 4, 8], help="Visages par frame")
+    parser.add_argument('--students', type=int, nargs='*', default=[10, 100], help="Étudiants inscrits")
+    parser.add_argument('--frames', type=int, default=2700, help="Frames de la source synthétique")
+    parser.add_argument('--fps', type=float, default=0, help="Cadence synthétique (0 = au plus vite)")
+    parser.add_argument('--duration', type=float, default=300, help="Durée max d'un scénario (s)")
+    parser.add_argument('--stream-profiles', nargs='*', default=['default', 'thumbnail'])
+    parser.add_argument('--stream-clients', type=int, default=1, help="Clients simulés par profil")
+    parser.add_argument('--stream-fps', type=float, default=25)
+    parser.add_argument('--verbose', action='store_true', help="Afficher les traces du système")
+    parser.add_argument('--output', default='benchmarks/results/pipeline.json')
+    args = parser.parse_args()
+
+    if not args.faces_dir and not (args.source and args.dataset):
+        parser.error("--faces-dir est requis (sauf avec --source et --dataset)")
+    face_images = load_face_images(args.faces_dir) if args.faces_dir else []
+
+    faces_values = [None] if args.source else args.faces
+    students_values = [None] if args.dataset else args.students
+
+    results = []
+    for faces_per_frame in faces_values:
+        for students in students_values:
+            print(f"Scénario: {faces_per_frame} visage(s)/frame, {students} étudiant(s)")
+            with open(os.devnull, 'w') as devnull, \
+                    (contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)):
+                result = run_scenario(args, faces_per_frame, students, face_images)
+            results.append(result)
+            print(f"  capture {result['capture']['fps']} fps, détection p95 {result['detection']['p95']} ms, "
+                  f"reconnaissance p95 {result['recognition']['p95']} ms, "
+                  f"pertes {result['queues']['recognition_drop_rate']:.0%}")
+
+    save_results({'scenarios': results}, args.output)
+
+
+if __name__ == '__main__':
+    main()
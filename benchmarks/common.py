@@ -0,0 +1,75 @@
+import json
+import os
+import platform
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_frames(source: str, max_frames: int = 200, step: int = 1) -> List[np.ndarray]:
+    """Charger des frames enregistrées (dossier d'images ou fichier vidéo)"""
+    path = Path(source)
+    frames = []
+
+    if path.is_dir():
+        files = sorted(f for f in path.rglob('*') if f.suffix.lower() in IMAGE_EXTENSIONS)
+        for image_path in files[::step][:max_frames]:
+            frame = cv2.imread(str(image_path))
+            if frame is not None:
+                frames.append(frame)
+    else:
+        cap = cv2.VideoCapture(str(path))
+        index = 0
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % step == 0:
+                frames.append(frame)
+            index += 1
+        cap.release()
+
+    if not frames:
+        raise ValueError(f"Aucune frame lisible dans {source}")
+    return frames
+
+
+def percentile(values, pct: float) -> float:
+    """Percentile (0 si aucune valeur)"""
+    return float(np.percentile(values, pct)) if len(values) else 0.0
+
+
+def summarize_ms(durations) -> dict:
+    """Résumé de durées (secondes) en millisecondes"""
+    values = np.asarray(durations, dtype=float) * 1000
+    return {
+        'count': int(len(values)),
+        'mean': round(float(values.mean()), 3) if len(values) else 0.0,
+        'p50': round(percentile(values, 50), 3),
+        'p95': round(percentile(values, 95), 3),
+        'p99': round(percentile(values, 99), 3),
+        'max': round(float(values.max()), 3) if len(values) else 0.0,
+    }
+
+
+def save_results(results: dict, output: str):
+    """Sauvegarder les résultats en JSON avec le contexte machine"""
+    payload = {
+        'timestamp': datetime.now().isoformat(),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, default=str)
+    print(f"Résultats sauvegardés: {output}")
@@ -9,15 +9,93 @@ class Settings:
     DATASET_PATH = BASE_DIR / "dataset"
     LOGS_PATH = BASE_DIR / "logs"
     EDT_PATH = BASE_DIR / "data" / "edt.csv"
+    EMBEDDINGS_PATH = BASE_DIR / "data" / "embeddings"   # Vecteurs du dataset, un fichier par modèle
+    IMPORTS_PATH = BASE_DIR / "data" / "imports"         # Points de reprise des imports en masse
+    
+    # Salle surveillée par ce poste (colonne "salle" de l'EDT), None = aucune
+    CLASSROOM = None
     
     # Caméra
     CAMERA_INDEX = 0
     CAMERA_WIDTH = 640
     CAMERA_HEIGHT = 480
+    # Source des frames : "camera", un index, un fichier vidéo ou un dossier d'images
+    CAMERA_SOURCE = os.getenv("CAMERA_SOURCE", "camera")
+    CAMERA_SOURCE_REALTIME = True   # Vidéo/dossier : respecter la cadence d'origine
+    CAMERA_SOURCE_LOOP = False      # Rejouer en boucle à la fin
+    CAMERA_SOURCE_FPS = 30          # Cadence d'un dossier d'images
+    # Caméra MJPEG sous Linux (V4L2) : relayer ses JPEG au flux sans
+    # décodage/réencodage ; les frames ne sont décodées que pour l'analyse
+    CAMERA_MJPEG_PASSTHROUGH = os.getenv("CAMERA_MJPEG_PASSTHROUGH", "0") == "1"
+    # Backend de capture : "auto" (DirectShow sous Windows, V4L2 sous Linux),
+    # "dshow", "msmf", "v4l2", "gstreamer" ou "any"
+    CAMERA_BACKEND = os.getenv("CAMERA_BACKEND", "auto")
+    CAMERA_GST_PIPELINE = os.getenv(
+        "CAMERA_GST_PIPELINE",
+        "v4l2src device={device} ! image/jpeg,width={width},height={height},framerate={fps}/1 "
+        "! jpegdec ! videoconvert ! video/x-raw,format=BGR ! appsink drop=true max-buffers=1 sync=false"
+    )
+    # Reconnexion automatique de la caméra (backoff exponentiel, secondes)
+    CAMERA_READ_FAILURES_BEFORE_RECONNECT = 10
+    CAMERA_RECONNECT_INITIAL_DELAY = 0.5
+    CAMERA_RECONNECT_MAX_DELAY = 30.0
+    
+    # Caméras nommées supplémentaires dans le même processus (modèles
+    # partagés) : CAMERAS="porte=1;couloir=/chemin/video.mp4". La caméra
+    # principale (CAMERA_SOURCE) s'appelle MAIN_CAMERA et seule elle
+    # alimente le suivi d'attention.
+    MAIN_CAMERA = "main"
+    CAMERAS = dict(map(str.strip, item.split("=", 1)) for item in os.getenv("CAMERAS", "").split(";") if "=" in item)
+    DOOR_CAMERA = os.getenv("DOOR_CAMERA", MAIN_CAMERA)  # Caméra du test de la porte
+    # Workers d'inférence servant les caméras à tour de rôle ; > 1 seulement
+    # avec un détecteur réentrant (les backends DNN se sérialisent par verrou)
+    INFERENCE_WORKERS = 1
+    
+    # Reconnaissance à la porte : prioritaire sur l'analyse de la salle,
+    # objectif de latence (p95, attente comprise) et délai maximal
+    DOOR_RECOGNITION_SLO_MS = 500
+    DOOR_RECOGNITION_TIMEOUT = 3.0
+    
+    # Détection de visages : "haar", "yunet" (cv2.FaceDetectorYN) ou "ssd" (res10 Caffe)
+    FACE_DETECTOR_BACKEND = os.getenv("FACE_DETECTOR_BACKEND", "haar")
+    FACE_DETECTOR_MIN_CONFIDENCE = 0.6
+    MODELS_PATH = BASE_DIR / "models"
+    YUNET_MODEL = "face_detection_yunet_2023mar.onnx"
+    SSD_PROTOTXT = "deploy.prototxt"
+    SSD_MODEL = "res10_300x300_ssd_iter_140000.caffemodel"
+    
+    # Mode grand amphi : capture haute résolution, détection en tuiles
+    # parallèles (le flux web reste en 640 px via les profils de flux)
+    LARGE_ROOM_MODE = os.getenv("LARGE_ROOM_MODE", "0") == "1"
+    LARGE_ROOM_CAPTURE_WIDTH = 1920
+    LARGE_ROOM_CAPTURE_HEIGHT = 1080
+    DETECTION_TILE_SIZE = 640
+    DETECTION_TILE_OVERLAP = 0.2    # Chevauchement > taille d'un visage au bord d'une tuile
+    DETECTION_WORKERS = None        # None = nombre de cœurs
+    DETECTION_NMS_IOU = 0.4
     
     # Reconnaissance faciale
     RECOGNITION_MODEL = "VGG-Face"
     RECOGNITION_THRESHOLD = 60
+    RECOGNITION_DISTANCE_THRESHOLD = 0.4  # Distance cosinus de référence (VGG-Face)
+    EMBEDDING_SYNC_INTERVAL = 10.0        # Secondes entre deux comparaisons dataset/vecteurs
+    # Index des vecteurs : "auto" (recherche exacte sous ANN_MIN_GALLERY_SIZE
+    # images, puis hnswlib, faiss ou IVF NumPy selon ce qui est installé),
+    # "exact", "ivf", "hnsw" ou "faiss"
+    ANN_BACKEND = os.getenv("ANN_BACKEND", "auto")
+    ANN_MIN_GALLERY_SIZE = int(os.getenv("ANN_MIN_GALLERY_SIZE", "20000"))
+    ANN_IVF_NPROBE = 8      # Listes IVF explorées par requête (sur ~racine(N))
+    ANN_HNSW_M = 16         # Voisins par nœud du graphe HNSW
+    ANN_HNSW_EF = 64        # Largeur de recherche HNSW (rappel / latence)
+    # "local" (DeepFace sur ce boîtier), "remote" (service central, voir
+    # api/recognition_service.py) ou "inprocess" (service simulé localement)
+    RECOGNITION_BACKEND = os.getenv("RECOGNITION_BACKEND", "local")
+    RECOGNITION_SERVICE_URL = os.getenv("RECOGNITION_SERVICE_URL", "http://127.0.0.1:5100")
+    RECOGNITION_SERVICE_PORT = 5100
+    RECOGNITION_SERVICE_TIMEOUT = 2.0    # Client : attente max d'une réponse
+    RECOGNITION_SERVICE_DEADLINE = 1.5   # Service : délai du lot, sous celui du client (503 reçu à temps)
+    RECOGNITION_BATCH_SIZE = 16       # Visages par lot côté service
+    RECOGNITION_BATCH_WINDOW = 0.02   # Attente max (s) pour compléter un lot
     DETECTION_INTERVAL = 60
     COOLDOWN_SECONDS = 5
     
@@ -25,20 +103,47 @@ class Settings:
     WINDOW_SIZE = 30
     ATTENTION_THRESHOLD_MULTIPLIER = 1.5
     CALIBRATION_DURATION = 2.0
-    
+
+    # Traitement différé de cours enregistrés (batch_process.py)
+    BATCH_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+    BATCH_CHUNK_SECONDS = 60.0       # Durée de vidéo par tâche du pool
+    BATCH_SAMPLE_INTERVAL = 0.5      # Secondes de vidéo entre deux frames analysées
+    BATCH_RECOGNITION_INTERVAL = 5.0 # Reconnaissance complète ; entre-temps, noms suivis par position
+
+    # Import en masse d'étudiants (utils/bulk_enrollment.py)
+    ENROLL_WORKERS = BATCH_WORKERS
+    ENROLL_DEDUP_DISTANCE = 6        # Distance de Hamming (dHash 64 bits) : image quasi identique
+    ENROLL_CHECKPOINT_EVERY = 50     # Images traitées entre deux sauvegardes de la reprise
+
     # Communication série
-    SERIAL_PORT = "COM5"
+    SERIAL_PORT = "COM7"        # Port préféré, testé en premier
+    SERIAL_PORT_CACHE = BASE_DIR / "data" / "last_serial_port.txt"
+    SERIAL_HANDSHAKE = "PING"
+    SERIAL_HANDSHAKE_REPLIES = ("PONG", "READY")
     BAUD_RATE = 9600
+    SERIAL_BOOT_DELAY = 2.0     # Redémarrage de l'Arduino à l'ouverture du port
+    SERIAL_ACK_TIMEOUT = 1.0    # Attente max d'une réponse par commande
+    SERIAL_QUEUE_SIZE = 16      # Commandes en attente d'envoi
     
     # API
     API_HOST = "localhost"
     API_PORT = 8000
     DEBUG = True
+    WEB_SERVER_MODE = "threading"  # "threading" (Flask-SocketIO) ou "asgi" (uvicorn)
+    ASGI_ENCODE_WORKERS = 2        # Threads d'encodage partagés par les flux ASGI
+    
+    # Instrumentation (latences par étape, /metrics)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+    
+    # Logs : niveau global, niveaux par module, limitation des répétitions
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")   # "DEBUG" pour les traces détaillées
+    LOG_LEVELS = {}                              # ex. {"core.camera_manager": "DEBUG"}
+    LOG_RATE_LIMIT = (5, 10.0)                   # 5 messages identiques max par 10 s
     
     @classmethod
     def create_directories(cls):
         """Créer les dossiers nécessaires"""
-        for path in [cls.DATASET_PATH, cls.LOGS_PATH]:
+        for path in [cls.DATASET_PATH, cls.LOGS_PATH, cls.EMBEDDINGS_PATH, cls.IMPORTS_PATH]:
             path.mkdir(parents=True, exist_ok=True)
 
 settings = Settings()
@@ -56,6 +161,27 @@ class OptimizedSettings:
     
     # Seuils optimisés
     MIN_FACE_SIZE = 5000  
+    
+    # Profils de flux vidéo (?profile=...) : chaque profil est redimensionné
+    # et encodé une seule fois par frame, quel que soit le nombre de clients
+    STREAM_PROFILES = {
+        'default':   {'width': 640,  'quality': 75},
+        'fast':      {'width': 640,  'quality': 50, 'passthrough': False},  # Toujours réencodé (débit)
+        'thumbnail': {'width': 320,  'quality': 60},
+        'tablet':    {'width': 480,  'quality': 70},
+        'projector': {'width': 1280, 'quality': 85},
+        'snapshot':  {'width': 1920, 'quality': 95},  # Pleine résolution (/api/camera/snapshot)
+    }
+    DEFAULT_STREAM_PROFILE = 'default'
+    STREAM_IDLE_INTERVAL = 1.0  # Cadence de l'image d'attente quand la caméra est arrêtée
+    
+    # Encodage JPEG du flux : "auto" (libjpeg-turbo si installé), "opencv", "turbojpeg"
+    # Options par profil : 'subsampling' ("444", "422", "420", "gray"),
+    # 'optimize' et 'progressive' (coûteux, à éviter en direct),
+    # 'passthrough' (défaut True) : relayer le JPEG de la caméra si aucune
+    # réduction n'est nécessaire (CAMERA_MJPEG_PASSTHROUGH)
+    JPEG_ENCODER = "auto"
+    JPEG_SUBSAMPLING = "420"
 
 
 
@@ -0,0 +1,221 @@
+import logging
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+
+log = logging.getLogger(__name__)
+
+ADD_BLOCK_SIZE = 256  # Vecteurs insérés par prise du verrou (graphes HNSW)
+
+
+def _top_k(similarities: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """k meilleurs indices par ligne (similarité décroissante) et distances cosinus"""
+    k = min(k, similarities.shape[1])
+    if k == 1:
+        top = similarities.argmax(axis=1)[:, None]
+    else:
+        part = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(-similarities, part, axis=1).argsort(axis=1)
+        top = np.take_along_axis(part, order, axis=1)
+    return top, 1.0 - np.take_along_axis(similarities, top, axis=1)
+
+
+class ExactIndex:
+    """Recherche exacte : un produit matriciel sur toute la galerie"""
+
+    name = "exact"
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def add(self, vectors: np.ndarray):
+        """Ajouter des vecteurs (identifiants à la suite des existants)"""
+        self.vectors = np.concatenate([self.vectors.reshape(-1, vectors.shape[1]), vectors])
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, distances cosinus), tableaux Q x k ; vecteurs normalisés"""
+        vectors = self.vectors
+        if not len(vectors):
+            return np.full((len(queries), k), -1), np.full((len(queries), k), np.inf)
+        return _top_k(queries @ vectors.T, k)
+
+
+class IVFIndex:
+    """Index IVF en NumPy pur (k-means sphérique, listes inversées)
+
+    La galerie est répartie entre ~racine(N) centroïdes ; une requête ne
+    compare que les vecteurs des `nprobe` listes les plus proches. Pas de
+    dépendance : repli quand hnswlib et faiss sont absents. Les vecteurs
+    ajoutés rejoignent la liste de leur centroïde (non réentraîné).
+    """
+
+    name = "ivf"
+
+    def __init__(self, vectors: np.ndarray, nlist: Optional[int] = None, nprobe: Optional[int] = None,
+                 iterations: int = 10, seed: int = 0):
+        self.vectors = vectors
+        count = len(vectors)
+        self.nlist = max(1, min(count, nlist or int(np.sqrt(count))))
+        self.nprobe = min(self.nlist, nprobe or settings.ANN_IVF_NPROBE)
+
+        # Entraînement sur un échantillon (64 vecteurs par liste suffisent)
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(count, min(count, self.nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), self.nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            filled = np.bincount(assignment, minlength=self.nlist) > 0
+            centroids[filled] = sums[filled]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        self.centroids = centroids
+
+        # Affectation de toute la galerie par blocs (mémoire bornée)
+        assignment = np.concatenate([(vectors[start:start + 8192] @ centroids.T).argmax(axis=1)
+                                     for start in range(0, count, 8192)])
+        order = np.argsort(assignment, kind='stable')
+        bounds = np.searchsorted(assignment[order], np.arange(self.nlist + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(self.nlist)]
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def add(self, vectors: np.ndarray):
+        assignment = (vectors @ self.centroids.T).argmax(axis=1)
+        with self.lock:
+            ids = np.arange(len(self.vectors), len(self.vectors) + len(vectors))
+            for i in np.unique(assignment):
+                self.lists[i] = np.concatenate([self.lists[i], ids[assignment == i]])
+            self.vectors = np.concatenate([self.vectors, vectors])
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        with self.lock:
+            return self._search(queries, k)
+
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        probes = _top_k(queries @ self.centroids.T, self.nprobe)[0]
+        indices = np.full((len(queries), k), -1)
+        distances = np.full((len(queries), k), np.inf)
+        for row, query in enumerate(queries):
+            candidates = np.concatenate([self.lists[probe] for probe in probes[row]])
+            if not len(candidates):
+                continue
+            top, distance = _top_k((self.vectors[candidates] @ query)[None, :], k)
+            found = top.shape[1]
+            indices[row, :found] = candidates[top[0]]
+            distances[row, :found] = distance[0]
+        return indices, distances
+
+
+class HnswIndex:
+    """Graphe HNSW via hnswlib (dépendance optionnelle)"""
+
+    name = "hnsw"
+
+    def __init__(self, vectors: np.ndarray, m: Optional[int] = None, ef: Optional[int] = None,
+                 ef_construction: int = 200):
+        import hnswlib
+
+        self.count = len(vectors)
+        self.index = hnswlib.Index(space='cosine', dim=vectors.shape[1])
+        self.index.init_index(max_elements=max(1, self.count), ef_construction=ef_construction,
+                              M=m or settings.ANN_HNSW_M)
+        self.index.add_items(vectors, np.arange(self.count))
+        self.ef = ef or settings.ANN_HNSW_EF
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def add(self, vectors: np.ndarray):
+        """Insérer dans le graphe existant, par blocs (les recherches passent entre deux)"""
+        for start in range(0, len(vectors), ADD_BLOCK_SIZE):
+            block = vectors[start:start + ADD_BLOCK_SIZE]
+            with self.lock:
+                capacity = self.index.get_max_elements()
+                if self.count + len(block) > capacity:
+                    self.index.resize_index(max(2 * capacity, self.count + len(block)))
+                self.index.add_items(block, np.arange(self.count, self.count + len(block)))
+                self.count += len(block)
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        with self.lock:
+            k = min(k, self.count)
+            self.index.set_ef(max(self.ef, k))
+            labels, distances = self.index.knn_query(queries, k=k)
+        return labels.astype(np.int64), distances
+
+
+class FaissIndex:
+    """Graphe HNSW de faiss-cpu, produit scalaire (dépendance optionnelle)"""
+
+    name = "faiss"
+
+    def __init__(self, vectors: np.ndarray, m: Optional[int] = None, ef: Optional[int] = None):
+        import faiss
+
+        self.count = len(vectors)
+        self.index = faiss.IndexHNSWFlat(vectors.shape[1], m or settings.ANN_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        self.index.hnsw.efConstruction = 200
+        self.index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        self.ef = ef or settings.ANN_HNSW_EF
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def add(self, vectors: np.ndarray):
+        for start in range(0, len(vectors), ADD_BLOCK_SIZE):
+            block = np.ascontiguousarray(vectors[start:start + ADD_BLOCK_SIZE], dtype=np.float32)
+            with self.lock:
+                self.index.add(block)
+                self.count += len(block)
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        with self.lock:
+            self.index.hnsw.efSearch = max(self.ef, k)
+            similarities, labels = self.index.search(np.ascontiguousarray(queries, dtype=np.float32), k)
+        return labels.astype(np.int64), 1.0 - similarities
+
+
+ANN_BACKENDS = {
+    ExactIndex.name: ExactIndex,
+    IVFIndex.name: IVFIndex,
+    HnswIndex.name: HnswIndex,
+    FaissIndex.name: FaissIndex,
+}
+
+
+def build_index(vectors: np.ndarray, name: Optional[str] = None, **kwargs):
+    """Index d'une galerie de vecteurs normalisés (défaut : settings.ANN_BACKEND)
+
+    "auto" : recherche exacte sous settings.ANN_MIN_GALLERY_SIZE vecteurs
+    (rappel parfait, un produit matriciel suffit), sinon hnswlib, faiss
+    ou à défaut l'IVF NumPy. Une bibliothèque optionnelle absente fait
+    revenir à l'IVF NumPy.
+    """
+    name = name or settings.ANN_BACKEND
+    if name == 'auto':
+        if len(vectors) < settings.ANN_MIN_GALLERY_SIZE:
+            return ExactIndex(vectors)
+        candidates = [HnswIndex.name, FaissIndex.name, IVFIndex.name]
+    elif name in ANN_BACKENDS:
+        candidates = [name, IVFIndex.name]
+    else:
+        raise ValueError(f"Index de vecteurs inconnu: {name}")
+
+    for candidate in candidates:
+        try:
+            return ANN_BACKENDS[candidate](vectors, **(kwargs if candidate == name else {}))
+        except ImportError as e:
+            if candidate == name:
+                log.warning("Index %s indisponible (%s), retour à l'IVF NumPy", name, e)
+    return IVFIndex(vectors)
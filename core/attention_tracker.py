@@ -1,4 +1,5 @@
 import cv2
+import logging
 import numpy as np
 import time
 from collections import deque
@@ -7,6 +8,8 @@ from data.models import AttentionStatus, AttentionRecord
 from datetime import datetime
 import random
 
+log = logging.getLogger(__name__)
+
 class SimplifiedAttentionTracker:
     """Système de suivi d'attention simplifié sans trackers OpenCV"""
     
@@ -19,20 +22,23 @@ class SimplifiedAttentionTracker:
         self.face_history = {}  # {nom: {'positions': deque, 'last_status': status}}
         self.window_size = 30
         
-        print("ℹ️ Système d'attention en mode simplifié (sans trackers OpenCV)")
+        log.info("Système d'attention en mode simplifié (sans trackers OpenCV)")
     
     def calibrate(self, frame, faces, duration=2.0):
         """Calibration simplifiée"""
         self.is_calibrated = True
         self.attention_threshold = 12.0  # Seuil fixe
-        print(f"✅ Calibration attention: seuil = {self.attention_threshold}")
+        log.info("Calibration attention: seuil = %s", self.attention_threshold)
         return True
     
     def update_tracking(self, frame: np.ndarray, new_faces: List[Tuple[int, int, int, int]], 
-                       face_names: List[str]) -> List[AttentionRecord]:
-        """Mettre à jour le suivi simplifié et retourner les enregistrements"""
+                       face_names: List[str], at: Optional[datetime] = None) -> List[AttentionRecord]:
+        """Mettre à jour le suivi simplifié et retourner les enregistrements
+        
+        `at` : instant de la frame (vidéo enregistrée), maintenant par défaut
+        """
         records = []
-        current_time = datetime.now()
+        current_time = at or datetime.now()
         
         try:
             for (x, y, w, h), name in zip(new_faces, face_names):
@@ -73,10 +79,10 @@ class SimplifiedAttentionTracker:
                         self.face_history[name]['last_status'] = status
                         self.face_history[name]['last_update'] = current_time
                         
-                        print(f"📊 Attention {name}: {status.value} (std_x:{std_x:.1f}, std_y:{std_y:.1f})")
+                        log.debug("Attention %s: %s (std_x:%.1f, std_y:%.1f)", name, status.value, std_x, std_y)
         
         except Exception as e:
-            print(f"⚠️ Erreur suivi attention: {e}")
+            log.error("Erreur suivi attention: %s", e)
         
         return records
     
@@ -1,23 +1,47 @@
 
 
 import cv2
+import logging
 import threading
 import time
 import queue
 from typing import Optional, Callable
 from config.settings import settings
+from core.frame_context import FrameContext
+from core.frame_sources import FrameSource, create_frame_source
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
 
 class OptimizedCameraManager:
     """Gestionnaire de caméra optimisé pour réduire la latence"""
     
-    def __init__(self):
-        self.cap: Optional[cv2.VideoCapture] = None
+    def __init__(self, source=None):
+        # None = settings.CAMERA_SOURCE ; sinon spécification ou FrameSource
+        self.source_spec = source
+        self.source: Optional[FrameSource] = None
+        self.source_finished = threading.Event()  # Fin d'une vidéo/dossier rejoué
         self.is_active = False
-        self.frame = None
+        self.frame_seq = 0  # Numéro de frame, jamais remis à zéro
         self.frame_lock = threading.Lock()
+        
+        # Frame courante et ses vues dérivées (réduites, grises, visages) ;
+        # en passthrough MJPEG, la frame n'est décodée qu'à la demande
+        self.context: Optional[FrameContext] = None
         self.capture_thread = None
         self.callbacks = []
         
+        # Santé de la connexion : "stopped", "streaming" ou "reconnecting"
+        self.state = "stopped"
+        self.wake_event = threading.Event()  # Interrompt les attentes (stop)
+        self.read_failures = 0  # Échecs de lecture consécutifs
+        self.disconnects = 0
+        self.reconnects = 0
+        self.reconnect_attempts = 0
+        self.last_frame_at = None
+        self.disconnected_at = None
+        self.downtime = 0.0
+        
         # Buffer circulaire pour éviter l'accumulation
         self.frame_buffer = queue.Queue(maxsize=2)
         
@@ -36,103 +60,105 @@ class OptimizedCameraManager:
         self.stream_width = 640
         self.stream_height = 480
         
-        print("📹 CameraManager optimisé initialisé")
+        # Mode grand amphi : frames gardées en haute résolution pour la
+        # détection ; le flux web est réduit par get_scaled_frame()
+        self.large_room = settings.LARGE_ROOM_MODE
+        if self.large_room:
+            self.capture_width = settings.LARGE_ROOM_CAPTURE_WIDTH
+            self.capture_height = settings.LARGE_ROOM_CAPTURE_HEIGHT
+        else:
+            self.capture_width = self.stream_width
+            self.capture_height = self.stream_height
+        
+        log.info("CameraManager optimisé initialisé")
     
     def start(self) -> bool:
         """Démarrer la caméra avec optimisations"""
         if self.is_active:
-            print("📹 Caméra déjà active")
+            log.debug("Caméra déjà active")
             return True
         
         try:
-            # Configuration optimisée de la caméra
-            self.cap = cv2.VideoCapture(settings.CAMERA_INDEX, cv2.CAP_DSHOW)  # DirectShow sur Windows
-            
-            if not self.cap.isOpened():
-                print(f" Impossible d'ouvrir la caméra à l'index {settings.CAMERA_INDEX}")
-                # Essayer d'autres indices
-                for i in range(1, 5):
-                    print(f" Test caméra index {i}...")
-                    self.cap = cv2.VideoCapture(i, cv2.CAP_DSHOW)
-                    if self.cap.isOpened():
-                        print(f" Caméra trouvée à l'index {i}")
-                        settings.CAMERA_INDEX = i
-                        break
-                    self.cap.release()
-                else:
-                    print(" Aucune caméra trouvée")
-                    return False
-            
-            # OPTIMISATIONS CRITIQUES
-            # Réduire la résolution de capture pour améliorer les performances
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.stream_width)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.stream_height)
-            
-            # Optimiser le FPS
-            self.cap.set(cv2.CAP_PROP_FPS, self.target_fps)
-            
-            # TRÈS IMPORTANT : Réduire le buffer au minimum
-            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-            
-            # Optimisations codec
-            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
-            
-            # Optimisations pour réduire la latence
-            self.cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.25)  # Réduire l'auto-exposition
+            # Caméra, vidéo enregistrée ou dossier d'images (settings.CAMERA_SOURCE)
+            self.source = create_frame_source(self.source_spec, self.capture_width,
+                                              self.capture_height, self.target_fps)
+            if not self.source.open():
+                self.source.release()
+                return False
             
             # Tester la capture
-            ret, test_frame = self.cap.read()
+            ret, test_frame = self.source.read()
             if not ret:
-                print(" Impossible de capturer depuis la caméra")
-                self.cap.release()
+                log.error("Impossible de capturer depuis la caméra")
+                self.source.release()
                 return False
             
             # Vérifier les paramètres réels
-            actual_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            actual_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            actual_fps = self.cap.get(cv2.CAP_PROP_FPS)
-            
-            print(f" Caméra configurée: {actual_width}x{actual_height} @ {actual_fps}fps")
+            info = self.source.describe()
+            log.info("Source %s configurée: %sx%s @ %sfps",
+                     info['type'], info.get('width'), info.get('height'), info.get('fps'))
             
             # Démarrer le thread de capture optimisé
+            self.source_finished.clear()
+            self.wake_event.clear()
+            self.read_failures = 0
+            self.state = "streaming"
             self.is_active = True
             self.capture_thread = threading.Thread(target=self._optimized_capture_loop, daemon=True)
             self.capture_thread.start()
             
-            print(" Thread de capture optimisé démarré")
+            log.info("Thread de capture optimisé démarré")
             return True
             
         except Exception as e:
-            print(f" Erreur démarrage caméra: {e}")
-            if self.cap:
-                self.cap.release()
+            log.error("Erreur démarrage caméra: %s", e)
+            if self.source:
+                self.source.release()
             return False
     
     def _optimized_capture_loop(self):
         """Boucle de capture ultra-optimisée"""
-        print(" Démarrage de la boucle de capture optimisée")
+        log.debug("Démarrage de la boucle de capture optimisée")
         
         # Variables pour le contrôle du timing
         last_frame_time = time.time()
         frame_skip_count = 0
         max_skips = 2  # Skip maximum 2 frames si on est en retard
         
-        while self.is_active and self.cap and self.cap.isOpened():
+        while self.is_active and self.source:
             try:
+                if not self.source.is_opened():
+                    # Caméra perdue : reconnexion ; source enregistrée : fin
+                    if self.source.live and self._reconnect():
+                        continue
+                    break
+                
                 current_time = time.time()
                 
                 # Lecture non-bloquante avec timeout
-                ret, frame = self.cap.read()
+                with metrics.timer('capture'):
+                    ret, frame = self.source.read()
                 
                 if ret and frame is not None:
-                    # Redimensionner si nécessaire pour optimiser
-                    if frame.shape[1] != self.stream_width or frame.shape[0] != self.stream_height:
-                        frame = cv2.resize(frame, (self.stream_width, self.stream_height), 
-                                         interpolation=cv2.INTER_LINEAR)
+                    self.read_failures = 0
+                    self.last_frame_at = current_time
+                    
+                    if isinstance(frame, bytes):
+                        # JPEG brut de la caméra (passthrough) : ni décodage ni
+                        # redimensionnement ici, la taille est celle du pilote
+                        context = FrameContext.from_jpeg(frame, self.frame_seq + 1, current_time)
+                    else:
+                        # Redimensionner si nécessaire pour optimiser (sauf grand amphi)
+                        wrong_size = frame.shape[1] != self.stream_width or frame.shape[0] != self.stream_height
+                        if wrong_size and not self.large_room:
+                            frame = cv2.resize(frame, (self.stream_width, self.stream_height), 
+                                             interpolation=cv2.INTER_LINEAR)
+                        context = FrameContext(frame, self.frame_seq + 1, current_time)
                     
                     # Mise à jour thread-safe ultra-rapide
                     with self.frame_lock:
-                        self.frame = frame
+                        self.context = context
+                        self.frame_seq = context.seq
                     
                     # Vider le buffer si trop plein (évite l'accumulation)
                     while not self.frame_buffer.empty():
@@ -143,11 +169,12 @@ class OptimizedCameraManager:
                     
                     # Ajouter la nouvelle frame
                     try:
-                        self.frame_buffer.put_nowait(frame)
+                        self.frame_buffer.put_nowait(context)
                     except queue.Full:
                         pass  # Ignorer si le buffer est plein
                     
                     # Statistiques FPS
+                    metrics.inc('frames_captured')
                     self.frame_count += 1
                     self.fps_frame_count += 1
                     
@@ -159,11 +186,17 @@ class OptimizedCameraManager:
                     # Notifier les callbacks (de manière optimisée)
                     if self.callbacks and self.frame_count % 3 == 0:  # Callback 1 frame sur 3
                         try:
-                            for callback in self.callbacks:
-                                callback(frame)
+                            with metrics.timer('callback'):
+                                for callback in self.callbacks:
+                                    callback(context)
                         except Exception as e:
                             # Ne pas laisser les erreurs callback bloquer la capture
-                            pass
+                            metrics.inc('errors')
+                    
+                    # Une source enregistrée gère sa propre cadence et
+                    # livre toutes ses frames (résultats reproductibles)
+                    if not self.source.live:
+                        continue
                     
                     # Contrôle de timing intelligent
                     elapsed = current_time - last_frame_time
@@ -180,61 +213,139 @@ class OptimizedCameraManager:
                     
                     last_frame_time = time.time()
                 
+                elif self.source.exhausted:
+                    log.info("Fin de la source enregistrée")
+                    break
+                
                 else:
-                    print("⚠ Échec de capture, pause...")
-                    time.sleep(0.01)  # Pause courte
+                    self._on_read_failure()
                     
             except Exception as e:
-                print(f" Erreur dans la boucle de capture: {e}")
-                time.sleep(0.01)
+                metrics.inc('errors')
+                log.error("Erreur dans la boucle de capture: %s", e)
+                self._on_read_failure()
         
-        print(" Boucle de capture optimisée terminée")
+        if self.source and self.source.exhausted:
+            self.is_active = False
+            self.source_finished.set()
+        self.state = "stopped"
+        log.debug("Boucle de capture optimisée terminée")
+    
+    def _on_read_failure(self):
+        """Lecture échouée : pause croissante, puis reconnexion si la caméra reste muette"""
+        self.read_failures += 1
+        source = self.source  # None si stop() est en cours
+        if source and source.live and self.read_failures >= settings.CAMERA_READ_FAILURES_BEFORE_RECONNECT:
+            log.warning("Caméra muette (%s lectures échouées), reconnexion", self.read_failures)
+            self._reconnect()
+            return
+        log.debug("Échec de capture (%s consécutifs), pause...", self.read_failures)
+        # 10 ms, 20 ms, 40 ms... plafonné : pas de boucle active
+        self.wake_event.wait(min(0.01 * 2 ** (self.read_failures - 1), 0.5))
+    
+    def _reconnect(self) -> bool:
+        """Rouvrir la caméra avec un backoff exponentiel
+        
+        La source est libérée pendant l'attente puis rouverte, ce qui
+        ré-énumère les périphériques (la caméra peut changer d'index après
+        un débranchement USB). Retourne False si la caméra a été arrêtée.
+        """
+        source = self.source
+        self.state = "reconnecting"
+        self.disconnects += 1
+        self.disconnected_at = time.time()
+        metrics.inc('camera_disconnects')
+        
+        # Les clients voient l'image d'attente plutôt qu'une frame figée
+        with self.frame_lock:
+            self.context = None
+        
+        delay = settings.CAMERA_RECONNECT_INITIAL_DELAY
+        while self.is_active:
+            source.release()
+            if self.wake_event.wait(delay):
+                break  # stop() pendant l'attente
+            
+            self.reconnect_attempts += 1
+            try:
+                if source.open() and source.read()[0]:
+                    if not self.is_active:
+                        break
+                    self.downtime += time.time() - self.disconnected_at
+                    log.info("Caméra reconnectée après %.1fs (%s)",
+                             time.time() - self.disconnected_at, source.describe())
+                    self.disconnected_at = None
+                    self.read_failures = 0
+                    self.reconnects += 1
+                    metrics.inc('camera_reconnects')
+                    self.state = "streaming"
+                    return True
+            except Exception as e:
+                log.debug("Erreur de réouverture caméra: %s", e)
+            
+            delay = min(delay * 2, settings.CAMERA_RECONNECT_MAX_DELAY)
+            log.warning("Caméra indisponible, nouvel essai dans %.1fs", delay)
+        
+        source.release()
+        return False
     
     def get_frame(self):
         """Obtenir la frame la plus récente"""
+        context = self.get_frame_context()
+        return context.frame.copy() if context is not None else None
+    
+    def get_frame_with_seq(self):
+        """Frame la plus récente SANS copie (lecture seule) et son numéro"""
+        context = self.get_frame_context()
+        if context is None:
+            return None, self.frame_seq
+        return context.frame, context.seq
+    
+    def get_frame_context(self) -> Optional[FrameContext]:
+        """Contexte de la frame courante (vues dérivées partagées)"""
         with self.frame_lock:
-            return self.frame.copy() if self.frame is not None else None
+            return self.context
+    
+    def get_scaled_frame(self, max_width):
+        """Frame courante réduite à `max_width`, calculée une fois par frame
+        
+        Retourne (frame, numéro). La frame est partagée : ne pas la modifier.
+        """
+        context = self.get_frame_context()
+        if context is None:
+            return None, self.frame_seq
+        scaled, _ = context.scaled(max_width)
+        return scaled, context.seq
     
     def get_web_frame(self, max_width=640, quality=85):
-        """Obtenir une frame optimisée pour le web avec compression"""
-        with self.frame_lock:
-            if self.frame is not None:
-                frame = self.frame.copy()
-                
-                # Redimensionner si nécessaire
-                h, w = frame.shape[:2]
-                if w > max_width:
-                    scale = max_width / w
-                    new_h = int(h * scale)
-                    frame = cv2.resize(frame, (max_width, new_h), 
-                                     interpolation=cv2.INTER_AREA)  # INTER_AREA pour downscaling
-                
-                return frame
-            return None
+        """Obtenir une frame optimisée pour le web"""
+        frame, _ = self.get_scaled_frame(max_width)
+        return frame.copy() if frame is not None else None
     
     def get_latest_frame_fast(self):
         """Version ultra-rapide pour le streaming"""
         try:
-            return self.frame_buffer.get_nowait()
+            return self.frame_buffer.get_nowait().frame
         except queue.Empty:
             return self.get_frame()
     
     def stop(self):
         """Arrêter la caméra"""
-        if not self.is_active:
+        if not self.is_active and not self.source:
             return
         
-        print(" Arrêt de la caméra optimisée...")
+        log.info("Arrêt de la caméra optimisée...")
         self.is_active = False
+        self.wake_event.set()
         
         # Attendre que le thread se termine
         if self.capture_thread and self.capture_thread.is_alive():
             self.capture_thread.join(timeout=1.0)
         
         # Libérer la caméra
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        if self.source:
+            self.source.release()
+            self.source = None
         
         # Vider le buffer
         while not self.frame_buffer.empty():
@@ -245,22 +356,29 @@ class OptimizedCameraManager:
         
         # Réinitialiser les variables
         with self.frame_lock:
-            self.frame = None
+            self.context = None
         
         self.frame_count = 0
-        print(" Caméra optimisée arrêtée")
+        self.state = "stopped"
+        if self.disconnected_at:
+            self.downtime += time.time() - self.disconnected_at
+            self.disconnected_at = None
+        log.info("Caméra optimisée arrêtée")
     
     def add_callback(self, callback: Callable):
-        """Ajouter un callback pour les nouvelles frames"""
+        """Ajouter un callback pour les nouvelles frames
+        
+        Le callback reçoit un FrameContext (frame brute dans `.frame`).
+        """
         if callback not in self.callbacks:
             self.callbacks.append(callback)
-            print(f" Callback ajouté ({len(self.callbacks)} total)")
+            log.debug("Callback ajouté (%s total)", len(self.callbacks))
     
     def remove_callback(self, callback: Callable):
         """Supprimer un callback"""
         if callback in self.callbacks:
             self.callbacks.remove(callback)
-            print(f" Callback supprimé ({len(self.callbacks)} restant)")
+            log.debug("Callback supprimé (%s restant)", len(self.callbacks))
     
     def get_stats(self) -> dict:
         """Obtenir les statistiques de performance"""
@@ -269,10 +387,26 @@ class OptimizedCameraManager:
             'frame_count': self.frame_count,
             'fps': round(self.fps, 1),
             'target_fps': self.target_fps,
-            'resolution': f"{self.stream_width}x{self.stream_height}",
+            'resolution': f"{self.capture_width}x{self.capture_height}",
+            'large_room': self.large_room,
             'callbacks_count': len(self.callbacks),
             'buffer_size': self.frame_buffer.qsize(),
-            'has_frame': self.frame is not None
+            'has_frame': self.context is not None,
+            'source': self.source.describe() if self.source else None,
+            'health': self.get_health()
+        }
+    
+    def get_health(self) -> dict:
+        """État de la connexion caméra (reconnexions, temps d'indisponibilité)"""
+        now = time.time()
+        return {
+            'state': self.state,
+            'read_failures': self.read_failures,
+            'disconnects': self.disconnects,
+            'reconnects': self.reconnects,
+            'reconnect_attempts': self.reconnect_attempts,
+            'last_frame_age_s': round(now - self.last_frame_at, 2) if self.last_frame_at else None,
+            'downtime_s': round(self.downtime + (now - self.disconnected_at if self.disconnected_at else 0), 1)
         }
     
     def __del__(self):
@@ -0,0 +1,58 @@
+import logging
+from typing import Dict
+
+from config.settings import settings
+from core.camera_manager import OptimizedCameraManager
+from core.stream_encoder import StreamEncoder
+
+log = logging.getLogger(__name__)
+
+
+class CameraPipeline:
+    """Caméra nommée : capture (thread propre) et encodage de son flux web
+
+    Les modèles (détection, reconnaissance) ne sont pas ici : ils sont
+    partagés par toutes les caméras via l'InferenceScheduler du système.
+    `attention` : la caméra alimente le suivi d'attention (vue de salle).
+    """
+
+    def __init__(self, name: str, source=None, attention: bool = False):
+        self.name = name
+        self.attention = attention
+        self.camera_manager = OptimizedCameraManager(source)
+        self.stream_encoder = StreamEncoder(self.camera_manager)
+        self.frame_count = 0  # Frames reçues par le callback de traitement
+
+    def start(self) -> bool:
+        return self.camera_manager.start()
+
+    def stop(self):
+        self.camera_manager.stop()
+
+    def get_stats(self) -> dict:
+        stats = self.camera_manager.get_stats()
+        stats.update({'name': self.name, 'attention': self.attention,
+                      'encoder': self.stream_encoder.get_stats()})
+        return stats
+
+
+def create_camera_pipelines(main_source=None) -> Dict[str, CameraPipeline]:
+    """Caméra principale (settings.CAMERA_SOURCE) puis settings.CAMERAS
+
+    La caméra principale est la vue de salle : elle seule alimente le
+    suivi d'attention.
+    """
+    pipelines = {settings.MAIN_CAMERA: CameraPipeline(settings.MAIN_CAMERA, main_source, attention=True)}
+    for name, source in settings.CAMERAS.items():
+        if name in pipelines:
+            log.warning("Caméra %s déjà définie, ignorée", name)
+            continue
+        pipelines[name] = CameraPipeline(name, source)
+    return pipelines
+
+
+def door_camera_name(pipelines: Dict[str, CameraPipeline]) -> str:
+    """Caméra utilisée pour le test de la porte (défaut : principale)"""
+    if settings.DOOR_CAMERA in pipelines:
+        return settings.DOOR_CAMERA
+    return settings.MAIN_CAMERA
@@ -0,0 +1,158 @@
+import cv2
+import logging
+import threading
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+from config.settings import settings
+from core.frame_context import as_context
+
+log = logging.getLogger(__name__)
+
+
+class Detection(NamedTuple):
+    """Visage détecté, en coordonnées de la frame d'origine"""
+    box: Tuple[int, int, int, int]                     # x, y, w, h
+    confidence: float
+    landmarks: Optional[Tuple[Tuple[int, int], ...]] = None  # yeux, nez, coins de la bouche
+
+
+class HaarBackend:
+    """Cascade de Haar OpenCV (historique, sans modèle à télécharger)
+
+    Comme les autres backends, `detect` accepte une frame ou un
+    FrameContext (vues réduites/grises partagées avec les autres étapes).
+    """
+
+    name = "haar"
+
+    def __init__(self, target_width: int = 320, scale_factor: float = 1.3, min_neighbors: int = 5):
+        self.target_width = target_width
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.face_cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        )
+
+    def detect(self, frame, target_width: Optional[int] = None) -> List[Detection]:
+        gray, scale = as_context(frame).scaled_gray(target_width or self.target_width)
+        faces = self.face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors
+        )
+        return [Detection((int(x * scale), int(y * scale), int(w * scale), int(h * scale)), 1.0)
+                for (x, y, w, h) in (faces if len(faces) > 0 else [])]
+
+
+class YuNetBackend:
+    """YuNet (cv2.FaceDetectorYN, OpenCV >= 4.5.4) : boîtes, 5 points et score"""
+
+    name = "yunet"
+
+    def __init__(self, model_path: Optional[Path] = None, target_width: int = 640,
+                 score_threshold: float = 0.6, nms_threshold: float = 0.3, top_k: int = 5000):
+        model_path = Path(model_path or settings.MODELS_PATH / settings.YUNET_MODEL)
+        if not model_path.exists():
+            raise FileNotFoundError(f"Modèle YuNet introuvable: {model_path}")
+        self.target_width = target_width
+        self.detector = cv2.FaceDetectorYN.create(str(model_path), "", (320, 320),
+                                                  score_threshold, nms_threshold, top_k)
+        self.input_size = (320, 320)
+        # setInputSize puis detect sur un même objet : non réentrant
+        self.lock = threading.Lock()
+
+    def detect(self, frame, target_width: Optional[int] = None) -> List[Detection]:
+        context = as_context(frame)
+        small, scale = context.scaled(target_width or self.target_width)
+        size = (small.shape[1], small.shape[0])
+        with self.lock:
+            if size != self.input_size:
+                self.detector.setInputSize(size)
+                self.input_size = size
+            _, faces = self.detector.detect(small)
+        if faces is None:
+            return []
+
+        # Visage au bord : coordonnées hors de la frame, ramenées dedans
+        width, height = context.width, context.height
+        detections = []
+        for face in faces:
+            x, y, w, h = (face[:4] * scale).astype(int)
+            x1, y1 = max(0, int(x)), max(0, int(y))
+            x2, y2 = min(width, int(x + w)), min(height, int(y + h))
+            if x2 <= x1 or y2 <= y1:
+                continue
+            points = (face[4:14] * scale).astype(int).reshape(5, 2)
+            detections.append(Detection((x1, y1, x2 - x1, y2 - y1), float(face[14]),
+                                        tuple((min(max(int(px), 0), width - 1), min(max(int(py), 0), height - 1))
+                                              for px, py in points)))
+        return detections
+
+
+class Res10SSDBackend:
+    """SSD ResNet-10 (cv2.dnn, Caffe) : boîtes et score, entrée 300x300"""
+
+    name = "ssd"
+
+    def __init__(self, prototxt: Optional[Path] = None, model_path: Optional[Path] = None,
+                 score_threshold: float = 0.5, input_size: int = 300):
+        prototxt = Path(prototxt or settings.MODELS_PATH / settings.SSD_PROTOTXT)
+        model_path = Path(model_path or settings.MODELS_PATH / settings.SSD_MODEL)
+        for path in (prototxt, model_path):
+            if not path.exists():
+                raise FileNotFoundError(f"Modèle SSD introuvable: {path}")
+        self.net = cv2.dnn.readNetFromCaffe(str(prototxt), str(model_path))
+        self.score_threshold = score_threshold
+        self.input_size = input_size
+        # setInput puis forward sur un même réseau : non réentrant
+        self.lock = threading.Lock()
+
+    def detect(self, frame, target_width: Optional[int] = None) -> List[Detection]:
+        # Entrée fixe du réseau : `target_width` est sans effet
+        context = as_context(frame)
+        h, w = context.height, context.width
+        size = (self.input_size, self.input_size)
+        blob = cv2.dnn.blobFromImage(context.resized(size), 1.0, size, (104.0, 177.0, 123.0))
+        with self.lock:
+            self.net.setInput(blob)
+            # Copie : la sortie peut partager le tampon interne du réseau
+            output = self.net.forward().copy()  # [1, 1, N, 7] : _, _, score, x1, y1, x2, y2 (normalisés)
+
+        detections = []
+        for row in output[0, 0]:
+            score = float(row[2])
+            if score < self.score_threshold:
+                continue
+            x1, y1 = max(0, int(row[3] * w)), max(0, int(row[4] * h))
+            x2, y2 = min(w, int(row[5] * w)), min(h, int(row[6] * h))
+            if x2 > x1 and y2 > y1:
+                detections.append(Detection((x1, y1, x2 - x1, y2 - y1), score))
+        return detections
+
+
+DETECTOR_BACKENDS = {
+    HaarBackend.name: HaarBackend,
+    YuNetBackend.name: YuNetBackend,
+    Res10SSDBackend.name: Res10SSDBackend,
+}
+
+
+def create_detector_backend(name: Optional[str] = None, **kwargs):
+    """Créer un backend (défaut : settings.FACE_DETECTOR_BACKEND)
+
+    Si le modèle d'un backend DNN est absent ou non supporté par la
+    version d'OpenCV, on revient à la cascade de Haar.
+    """
+    name = name or settings.FACE_DETECTOR_BACKEND
+    if name not in DETECTOR_BACKENDS:
+        raise ValueError(f"Détecteur inconnu: {name}")
+
+    if name != HaarBackend.name:
+        kwargs.setdefault('score_threshold', settings.FACE_DETECTOR_MIN_CONFIDENCE)
+    try:
+        return DETECTOR_BACKENDS[name](**kwargs)
+    except (FileNotFoundError, AttributeError, cv2.error) as e:
+        if name == HaarBackend.name:
+            raise
+        log.warning("Détecteur %s indisponible (%s), retour à Haar", name, e)
+        return HaarBackend()
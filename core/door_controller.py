@@ -1,84 +1,319 @@
 import serial
+import threading
 import time
-from typing import Optional
+import queue
+from collections import deque
+from typing import Callable, Optional
 from config.settings import settings
 from data.models import AccessRecord
 from datetime import datetime
 
+
+class DoorCommand:
+    """Commande série en attente d'acquittement par l'Arduino"""
+
+    def __init__(self, payload: bytes, on_complete: Optional[Callable] = None):
+        self.payload = payload
+        self.on_complete = on_complete
+        self.status = "pending"  # pending, acked, error, timeout, dropped
+        self.reply: Optional[str] = None
+        self.created_at = time.time()
+        self.sent_at: Optional[float] = None
+        self.completed_at: Optional[float] = None
+        self.done = threading.Event()
+
+    @property
+    def ack_latency(self) -> Optional[float]:
+        """Temps entre l'écriture et la réponse de l'Arduino"""
+        if self.sent_at is None or self.completed_at is None or self.status != "acked":
+            return None
+        return self.completed_at - self.sent_at
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Attendre la fin de la commande, True si acquittée"""
+        self.done.wait(timeout)
+        return self.status == "acked"
+
+
 class DoorController:
-    """Contrôleur de porte via Arduino"""
-    
+    """Contrôleur de porte via Arduino (I/O série asynchrone)"""
+
     def __init__(self, logger):
         self.logger = logger
         self.serial_connection: Optional[serial.Serial] = None
         self.is_connected = False
-    
-    def connect(self) -> bool:
-        """Se connecter à l'Arduino"""
+        self.port: Optional[str] = None
+
+        # File des commandes sortantes, consommée par le thread I/O
+        self.command_queue = queue.Queue(maxsize=settings.SERIAL_QUEUE_SIZE)
+        self.io_thread: Optional[threading.Thread] = None
+        self._running = False
+        self._ready_at = 0.0
+
+        # Statistiques
+        self.stats_lock = threading.Lock()
+        self.commands_sent = 0
+        self.commands_acked = 0
+        self.commands_timeout = 0
+        self.commands_error = 0
+        self.commands_dropped = 0
+        self.unsolicited_lines = 0
+        self.last_reply: Optional[str] = None
+        self.ack_latencies = deque(maxlen=200)
+        self.queue_latencies = deque(maxlen=200)
+
+    def connect(self, port: Optional[str] = None) -> bool:
+        """Se connecter à l'Arduino sans bloquer pendant son redémarrage"""
+        if self.is_connected:
+            self.disconnect()
+
+        port = port or settings.SERIAL_PORT
         try:
-            self.serial_connection = serial.Serial(
-                settings.SERIAL_PORT, 
+            self.serial_connection = serial.serial_for_url(
+                port,
                 settings.BAUD_RATE,
-                timeout=1
+                timeout=0.05,
+                write_timeout=1
             )
-            time.sleep(2)  # Attendre la connexion
-            self.is_connected = True
-            return True
         except Exception as e:
             print(f"Erreur connexion Arduino: {e}")
+            self.serial_connection = None
             self.is_connected = False
             return False
-    
+
+        # L'Arduino redémarre à l'ouverture du port : le thread I/O
+        # attend la fin du boot avant d'écrire, l'appelant n'attend pas
+        self.port = port
+        self._ready_at = time.time() + settings.SERIAL_BOOT_DELAY
+        self._running = True
+        self.is_connected = True
+        self.io_thread = threading.Thread(target=self._io_loop, daemon=True, name="DoorSerialIO")
+        self.io_thread.start()
+        return True
+
     def disconnect(self):
         """Fermer la connexion"""
+        self._running = False
+        if self.io_thread and self.io_thread.is_alive() and self.io_thread is not threading.current_thread():
+            try:
+                self.command_queue.put_nowait(None)
+            except queue.Full:
+                pass
+            self.io_thread.join(timeout=settings.SERIAL_ACK_TIMEOUT + 0.5)
+        self.io_thread = None
+
         if self.serial_connection:
-            self.serial_connection.close()
+            try:
+                self.serial_connection.close()
+            except Exception:
+                pass
+            self.serial_connection = None
         self.is_connected = False
-    
-    def open_door(self, student_name: Optional[str] = None, reason: str = "access_granted") -> bool:
-        """Ouvrir la porte"""
+        self._drop_pending()
+
+    def _drop_pending(self):
+        """Terminer les commandes encore en file : elles ne seront jamais envoyées"""
+        while True:
+            try:
+                command = self.command_queue.get_nowait()
+            except queue.Empty:
+                break
+            if command is not None:
+                self._complete(command, "dropped")
+
+    def open_door(self, student_name: Optional[str] = None, reason: str = "access_granted",
+                  wait: bool = False) -> bool:
+        """Demander l'ouverture de la porte (non bloquant par défaut)"""
         if not self.is_connected:
             return False
-        
-        try:
-            self.serial_connection.write(b"MOVE\n")
-            self.serial_connection.write(b"OK\n")
-            
-            # Enregistrer l'accès
-            record = AccessRecord(
-                timestamp=datetime.now(),
-                student_name=student_name,
-                action="granted",
-                reason=reason
-            )
-            self.logger.log_access(record)
-            
-            return True
-        except Exception as e:
-            print(f"Erreur ouverture porte: {e}")
+
+        record = AccessRecord(
+            timestamp=datetime.now(),
+            student_name=student_name,
+            action="granted",
+            reason=reason
+        )
+
+        move = self._enqueue(b"MOVE\n")
+        if move is None:
             return False
-    
-    def send_alert(self, alert_type: str) -> bool:
-        """Envoyer une alerte"""
+        # L'accès est enregistré par le thread I/O une fois la séquence envoyée
+        ok = self._enqueue(b"OK\n", on_complete=lambda cmd: self._log_if_sent(cmd, record))
+        if ok is None:
+            return False
+
+        if wait:
+            return ok.wait(settings.SERIAL_ACK_TIMEOUT * 2 + settings.SERIAL_BOOT_DELAY)
+        return True
+
+    def send_alert(self, alert_type: str, wait: bool = False) -> bool:
+        """Envoyer une alerte (non bloquant par défaut)"""
         if not self.is_connected:
             return False
-        
-        try:
-            if alert_type == "unknown":
-                self.serial_connection.write(b"INCONNU\n")
-            elif alert_type == "error":
-                self.serial_connection.write(b"ERREUR\n")
-            
-            # Enregistrer l'alerte
-            record = AccessRecord(
-                timestamp=datetime.now(),
-                student_name=None,
-                action="denied",
-                reason=alert_type
-            )
+
+        record = AccessRecord(
+            timestamp=datetime.now(),
+            student_name=None,
+            action="denied",
+            reason=alert_type
+        )
+
+        if alert_type == "unknown":
+            payload = b"INCONNU\n"
+        elif alert_type == "error":
+            payload = b"ERREUR\n"
+        else:
+            # Pas de commande série associée, seulement le log
             self.logger.log_access(record)
-            
             return True
-        except Exception as e:
-            print(f"Erreur envoi alerte: {e}")
+
+        command = self._enqueue(payload, on_complete=lambda cmd: self._log_if_sent(cmd, record))
+        if command is None:
             return False
+
+        if wait:
+            return command.wait(settings.SERIAL_ACK_TIMEOUT + settings.SERIAL_BOOT_DELAY)
+        return True
+
+    def _enqueue(self, payload: bytes, on_complete: Optional[Callable] = None) -> Optional[DoorCommand]:
+        """Ajouter une commande à la file sortante"""
+        command = DoorCommand(payload, on_complete)
+        try:
+            self.command_queue.put_nowait(command)
+            return command
+        except queue.Full:
+            print("Erreur porte: file de commandes pleine")
+            self._complete(command, "dropped")
+            return None
+
+    def _log_if_sent(self, command: DoorCommand, record: AccessRecord):
+        """Enregistrer l'accès si la commande a bien été écrite"""
+        if command.status in ("acked", "timeout"):
+            self.logger.log_access(record)
+
+    def _io_loop(self):
+        """Thread I/O : écrit les commandes et associe les réponses"""
+        try:
+            while self._running:
+                try:
+                    command = self.command_queue.get(timeout=0.05)
+                except queue.Empty:
+                    self._read_unsolicited()
+                    continue
+
+                if command is None:
+                    break
+
+                # Attendre la fin du boot de l'Arduino
+                while self._running and time.time() < self._ready_at:
+                    time.sleep(0.05)
+                if not self._running:
+                    self._complete(command, "dropped")
+                    break
+
+                self._execute(command)
+        finally:
+            # Port perdu ou arrêt : personne d'autre ne videra la file
+            self._drop_pending()
+
+    def _execute(self, command: DoorCommand):
+        """Écrire une commande puis attendre son acquittement"""
+        try:
+            # Ignorer les lignes reçues avant l'envoi (messages de boot...)
+            self._read_unsolicited()
+            self.serial_connection.write(command.payload)
+            command.sent_at = time.time()
+            with self.stats_lock:
+                self.commands_sent += 1
+                self.queue_latencies.append(command.sent_at - command.created_at)
+
+            deadline = command.sent_at + settings.SERIAL_ACK_TIMEOUT
+            while time.time() < deadline:
+                line = self.serial_connection.readline()
+                if not line:
+                    continue
+                reply = line.decode("utf-8", errors="replace").strip()
+                if not reply:
+                    continue
+                command.reply = reply
+                self.last_reply = reply
+                if reply.upper().startswith("ERR"):
+                    self._complete(command, "error")
+                else:
+                    self._complete(command, "acked")
+                return
+
+            self._complete(command, "timeout")
+
+        except Exception as e:
+            print(f"Erreur écriture série porte: {e}")
+            self._complete(command, "error")
+            if isinstance(e, serial.SerialException):
+                # Port perdu (câble débranché...)
+                self._running = False
+                self.is_connected = False
+
+    def _read_unsolicited(self):
+        """Lire les lignes reçues hors de toute commande"""
+        try:
+            while self.serial_connection and self.serial_connection.in_waiting:
+                line = self.serial_connection.readline()
+                reply = line.decode("utf-8", errors="replace").strip()
+                if reply:
+                    self.last_reply = reply
+                    with self.stats_lock:
+                        self.unsolicited_lines += 1
+        except Exception:
+            pass
+
+    def _complete(self, command: DoorCommand, status: str):
+        """Terminer une commande et mettre à jour les statistiques"""
+        command.status = status
+        command.completed_at = time.time()
+
+        with self.stats_lock:
+            if status == "acked":
+                self.commands_acked += 1
+                self.ack_latencies.append(command.ack_latency)
+            elif status == "timeout":
+                self.commands_timeout += 1
+            elif status == "error":
+                self.commands_error += 1
+            elif status == "dropped":
+                self.commands_dropped += 1
+
+        command.done.set()
+        if command.on_complete:
+            try:
+                command.on_complete(command)
+            except Exception as e:
+                print(f"Erreur callback porte: {e}")
+
+    def get_stats(self) -> dict:
+        """Obtenir les statistiques de la liaison série"""
+        with self.stats_lock:
+            latencies = sorted(self.ack_latencies)
+            queue_latencies = list(self.queue_latencies)
+            stats = {
+                'connected': self.is_connected,
+                'port': self.port,
+                'queue_size': self.command_queue.qsize(),
+                'commands_sent': self.commands_sent,
+                'commands_acked': self.commands_acked,
+                'commands_timeout': self.commands_timeout,
+                'commands_error': self.commands_error,
+                'commands_dropped': self.commands_dropped,
+                'unsolicited_lines': self.unsolicited_lines,
+                'last_reply': self.last_reply
+            }
+
+        if latencies:
+            stats['ack_latency_ms'] = {
+                'avg': round(sum(latencies) / len(latencies) * 1000, 1),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                'max': round(latencies[-1] * 1000, 1)
+            }
+        if queue_latencies:
+            stats['queue_wait_ms'] = round(sum(queue_latencies) / len(queue_latencies) * 1000, 1)
+
+        return stats
@@ -1,10 +1,13 @@
 import cv2
+import logging
 import numpy as np
 from datetime import datetime
 from typing import Optional, Tuple
 from data.models import EmotionType, EmotionRecord
 import random
 
+log = logging.getLogger(__name__)
+
 class SimplifiedEmotionAnalyzer:
     """Analyseur d'émotions simplifié (sans DeepFace pour éviter les erreurs)"""
     
@@ -24,11 +27,15 @@ class SimplifiedEmotionAnalyzer:
             (EmotionType.DISGUST, 0.02)    # 2% disgust
         ]
         
-        print("ℹ️ Analyse d'émotions en mode simplifié")
+        log.info("Analyse d'émotions en mode simplifié")
     
-    def analyze_emotion(self, face_img: np.ndarray, student_name: str) -> Optional[EmotionRecord]:
-        """Analyser l'émotion d'un visage (version simplifiée)"""
-        current_time = datetime.now()
+    def analyze_emotion(self, face_img: np.ndarray, student_name: str,
+                        at: Optional[datetime] = None) -> Optional[EmotionRecord]:
+        """Analyser l'émotion d'un visage (version simplifiée)
+        
+        `at` : instant de la frame (vidéo enregistrée), maintenant par défaut
+        """
+        current_time = at or datetime.now()
         
         try:
             # Vérifier l'intervalle d'analyse
@@ -54,11 +61,11 @@ class SimplifiedEmotionAnalyzer:
                 confidence=confidence
             )
             
-            print(f"😊 Émotion {student_name}: {emotion_type.value} ({confidence:.1f}%)")
+            log.debug("Émotion %s: %s (%.1f%%)", student_name, emotion_type.value, confidence)
             return record
             
         except Exception as e:
-            print(f"⚠️ Erreur analyse émotion: {e}")
+            log.error("Erreur analyse émotion: %s", e)
             return None
     
     def _simple_emotion_analysis(self, face_img: np.ndarray) -> Tuple[EmotionType, float]:
@@ -89,6 +96,6 @@ class SimplifiedEmotionAnalyzer:
             return emotion, confidence
             
         except Exception as e:
-            print(f"Erreur analyse heuristique: {e}")
+            log.error("Erreur analyse heuristique: %s", e)
             # Retour par défaut
             return EmotionType.NEUTRAL, 75.0
\ No newline at end of file
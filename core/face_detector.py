@@ -1,45 +1,50 @@
-import cv2
-import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from config.settings import settings
+from core.detector_backends import Detection, HaarBackend, create_detector_backend
+from core.frame_context import as_context
+from core.tiled_detector import TiledDetector
 
 class FaceDetector:
-    """Détecteur de visages optimisé"""
-    
-    def __init__(self):
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
-    
-    def detect_faces(self, frame: np.ndarray, scale_factor: float = 1.3, 
+    """Détecteur de visages optimisé (backend choisi dans les Settings)"""
+
+    def __init__(self, backend: Optional[str] = None, tiled: Optional[bool] = None):
+        tiled = settings.LARGE_ROOM_MODE if tiled is None else tiled
+        if tiled:
+            # Grand amphi : tuiles pleine résolution analysées en parallèle
+            self.backend = TiledDetector(
+                lambda: create_detector_backend(backend),
+                tile_size=settings.DETECTION_TILE_SIZE,
+                overlap=settings.DETECTION_TILE_OVERLAP,
+                workers=settings.DETECTION_WORKERS,
+                iou_threshold=settings.DETECTION_NMS_IOU
+            )
+        else:
+            self.backend = create_detector_backend(backend)
+        self.backend_name = self.backend.name
+
+    def detect(self, frame) -> List[Detection]:
+        """Détecter les visages : boîtes, confiance et points (si le backend les fournit)"""
+        return self.backend.detect(frame)
+
+    def detect_faces(self, frame, scale_factor: float = 1.3,
                     min_neighbors: int = 5) -> List[Tuple[int, int, int, int]]:
-        """Détecter les visages dans une frame"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray, 
-            scaleFactor=scale_factor, 
-            minNeighbors=min_neighbors
-        )
-        return faces.tolist() if len(faces) > 0 else []
-    
-    def detect_faces_optimized(self, frame: np.ndarray, 
-                             target_width: int = 320) -> List[Tuple[int, int, int, int]]:
-        """Détection optimisée avec redimensionnement"""
-        h, w = frame.shape[:2]
-        scale = w / target_width
-        small_h = int(h * target_width / w)
-        
-        # Redimensionner pour la détection
-        small_frame = cv2.resize(frame, (target_width, small_h))
-        faces_small = self.detect_faces(small_frame)
-        
-        # Remettre à l'échelle
-        faces_full = []
-        for (x, y, w, h) in faces_small:
-            faces_full.append((
-                int(x * scale),
-                int(y * scale),
-                int(w * scale),
-                int(h * scale)
-            ))
-        
-        return faces_full
\ No newline at end of file
+        """Détecter les visages dans une frame (pleine résolution)"""
+        if type(self.backend) is HaarBackend:
+            gray = as_context(frame).gray
+            faces = self.backend.face_cascade.detectMultiScale(
+                gray,
+                scaleFactor=scale_factor,
+                minNeighbors=min_neighbors
+            )
+            return faces.tolist() if len(faces) > 0 else []
+        return [detection.box for detection in self.backend.detect(frame)]
+
+    def detect_faces_optimized(self, frame,
+                             target_width: Optional[int] = None) -> List[Tuple[int, int, int, int]]:
+        """Détection optimisée : boîtes (x, y, w, h) en coordonnées de la frame
+
+        La largeur de travail est celle du backend (320 px pour Haar,
+        640 px pour les modèles DNN) sauf si `target_width` est donné.
+        `frame` peut être un FrameContext pour partager les vues dérivées.
+        """
+        return [detection.box for detection in self.backend.detect(frame, target_width)]
@@ -1,10 +1,27 @@
 import cv2
+import logging
 import os
+import threading
+import time
 import numpy as np
 from deepface import DeepFace
 from typing import Tuple, Optional, List
 from config.settings import settings
 from data.database import FileSystemDatabase
+from core.ann_index import ExactIndex, build_index
+from data.embedding_store import EmbeddingStore, scan_dataset
+
+log = logging.getLogger(__name__)
+
+
+def embed_face(img, model_name: Optional[str] = None) -> np.ndarray:
+    """Vecteur normalisé d'un visage (image BGR ou chemin d'image)"""
+    result = DeepFace.represent(img_path=img, model_name=model_name or settings.RECOGNITION_MODEL,
+                                enforce_detection=False)
+    vector = np.asarray(result[0]["embedding"], dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
 
 class FaceRecognizer:
     """Système de reconnaissance faciale basé sur filesystem"""
@@ -14,59 +31,187 @@ class FaceRecognizer:
         self.threshold_score = settings.RECOGNITION_THRESHOLD
         self.db_path = str(settings.DATASET_PATH)
         self.database = FileSystemDatabase()
+        self.distance_threshold = settings.RECOGNITION_DISTANCE_THRESHOLD
+        
+        # Vecteurs du dataset (remplacent la recherche DeepFace.find)
+        self.embeddings = EmbeddingStore(self.model_name)
+        self.failed_images = {}  # Images non vectorisables, jusqu'à leur modification
+        self.last_sync = None
+        self.sync_lock = threading.Lock()
+        self.sync_thread = None
+        self.sync_stop = threading.Event()
+        
+        # Index approché : {'version', 'index', 'names', 'stamps'} (voir _gallery_index)
+        self.index = None
+        self.index_lock = threading.Lock()
+        self.index_building = False
+    
+    def sync_embeddings(self, force: bool = False) -> int:
+        """Vectoriser les images ajoutées au dataset depuis le dernier passage
+
+        Comparaison dataset/vecteurs au plus toutes les
+        EMBEDDING_SYNC_INTERVAL secondes ; les vecteurs écrits par un
+        import en masse (autre processus) sont relus, pas recalculés.
+        Appelée par le thread de start_sync(), jamais par la reconnaissance.
+        """
+        now = time.monotonic()
+        if not force and self.last_sync is not None and now - self.last_sync < settings.EMBEDDING_SYNC_INTERVAL:
+            return 0
+        with self.sync_lock:
+            self.last_sync = now
+            self.embeddings.reload_if_changed()
+            # Import en cours avant le parcours : une image déplacée dans le
+            # dataset après son passage n'est pas une image supprimée
+            with self.embeddings.lock:
+                held = set(self.embeddings.pending)
+            images = scan_dataset(self.db_path)
+            missing, removed = self.embeddings.diff(images)
+            removed = [key for key in removed if key not in held]
+            for key in removed:
+                self.embeddings.remove(key)
+            
+            added = 0
+            for key in missing:
+                if self.sync_stop.is_set():
+                    break
+                name, stamp = images[key]
+                if self.failed_images.get(key) == stamp:
+                    continue
+                try:
+                    self.embeddings.add(key, name, stamp, embed_face(os.path.join(self.db_path, key), self.model_name))
+                    added += 1
+                    if added % settings.ENROLL_CHECKPOINT_EVERY == 0:
+                        self.embeddings.save()  # Longue reprise : progression conservée
+                except Exception as e:
+                    self.failed_images[key] = stamp
+                    log.warning("Image %s ignorée: %s", key, e)
+            
+            if added or removed:
+                self.embeddings.save()
+                log.info("Vecteurs du dataset: %s ajouté(s), %s supprimé(s), %s au total",
+                         added, len(removed), len(self.embeddings))
+            return added
+    
+    def start_sync(self):
+        """Synchroniser dataset et vecteurs dans un thread dédié
+
+        La reconnaissance ne vectorise jamais la galerie : après une mise à
+        jour ou un enrôlement hors import en masse, les images manquantes
+        sont calculées ici, sans bloquer la file de la porte ; en attendant,
+        la recherche se fait sur les vecteurs déjà présents.
+        """
+        if self.sync_thread and self.sync_thread.is_alive():
+            return
+        self.sync_stop.clear()
+        self.sync_thread = threading.Thread(target=self._sync_loop, daemon=True, name="EmbeddingSync")
+        self.sync_thread.start()
+    
+    def stop_sync(self):
+        self.sync_stop.set()
+    
+    def _sync_loop(self):
+        while not self.sync_stop.is_set():
+            try:
+                self.sync_embeddings(force=True)
+            except Exception as e:
+                log.error("Erreur synchronisation des vecteurs: %s", e)
+            self.sync_stop.wait(settings.EMBEDDING_SYNC_INTERVAL)
+    
+    def _gallery_index(self) -> Tuple[object, List[str]]:
+        """(index, nom de chaque identifiant) pour la galerie courante
+
+        Petite galerie : recherche exacte. Sinon l'index approché est tenu
+        à jour dans un thread : les images ajoutées y sont insérées (pas de
+        reconstruction), seule une suppression ou une image modifiée le
+        reconstruit. En attendant, la recherche se fait sur l'index
+        précédent, ou en exact s'il n'y en a pas encore.
+        """
+        if settings.ANN_BACKEND == 'exact' or (settings.ANN_BACKEND == 'auto'
+                                               and len(self.embeddings) < settings.ANN_MIN_GALLERY_SIZE):
+            names, gallery, _ = self.embeddings.matrix()
+            return ExactIndex(gallery), names
+        
+        state = self.index
+        if state is None or state['version'] != self.embeddings.version:
+            with self.index_lock:
+                if not self.index_building:
+                    self.index_building = True
+                    threading.Thread(target=self._update_index, daemon=True, name="GalleryIndex").start()
+        if state is None:
+            names, gallery, _ = self.embeddings.matrix()
+            return ExactIndex(gallery), names
+        return state['index'], state['names']
+    
+    def _update_index(self):
+        """Rattraper les versions de la galerie (ajouts regroupés)"""
+        try:
+            while True:
+                with self.embeddings.lock:
+                    version = self.embeddings.version
+                    entries = dict(self.embeddings.entries)
+                state = self.index
+                if state is not None and state['version'] == version:
+                    return
+                
+                started = time.perf_counter()
+                if state is None or any(entries.get(key, (None, None))[1] != stamp
+                                        for key, stamp in state['stamps'].items()):
+                    # Suppression ou modification : recherche exacte pendant la reconstruction
+                    self.index = None
+                    keys = sorted(entries)
+                    index = build_index(np.stack([entries[key][2] for key in keys]))
+                    self.index = {'version': version, 'index': index,
+                                  'names': [entries[key][0] for key in keys],
+                                  'stamps': {key: entries[key][1] for key in keys}}
+                    log.info("Index %s de la galerie construit: %s vecteurs en %.1f s",
+                             index.name, len(keys), time.perf_counter() - started)
+                    continue
+                
+                added = [key for key in entries if key not in state['stamps']]
+                if added:
+                    # Noms d'abord : un identifiant renvoyé a toujours son nom
+                    state['names'].extend(entries[key][0] for key in added)
+                    state['index'].add(np.stack([entries[key][2] for key in added]))
+                    state['stamps'].update((key, entries[key][1]) for key in added)
+                    log.debug("Index de la galerie: %s vecteur(s) ajouté(s) en %.2f s",
+                              len(added), time.perf_counter() - started)
+                state['version'] = version
+        except Exception as e:
+            self.index = None
+            log.error("Erreur mise à jour index galerie: %s", e)
+        finally:
+            with self.index_lock:
+                self.index_building = False
+    
+    def match_embeddings(self, vectors: np.ndarray) -> List[Tuple[str, float]]:
+        """Image du dataset la plus proche pour chaque vecteur (distance cosinus)"""
+        index, names = self._gallery_index()
+        indices, distances = index.search(vectors, k=1)
+        results = []
+        for index, distance in zip(indices[:, 0], distances[:, 0]):
+            score = (1 - distance / self.distance_threshold) * 100 if index >= 0 else 0
+            if score >= self.threshold_score:
+                results.append((names[index], float(score)))
+            else:
+                results.append(("Inconnu", 0))
+        return results
     
     def recognize_face(self, face_img: np.ndarray) -> Tuple[str, float]:
-         """Reconnaître un visage avec gestion améliorée des erreurs"""
-         try:
-             # Vérifier qu'il y a des étudiants dans la base
-             students = self.database.get_all_students()
-             if not students:
-                 return "Base_vide", 0
-             
-             # Vérifier que le dossier dataset existe et contient des fichiers
-             if not os.path.exists(self.db_path) or not os.listdir(self.db_path):
-                 return "Base_vide", 0
-             
-             # Compter le nombre total d'images
-             total_images = sum(len(os.listdir(os.path.join(self.db_path, student_dir))) 
-                               for student_dir in os.listdir(self.db_path) 
-                               if os.path.isdir(os.path.join(self.db_path, student_dir)))
-             
-             if total_images == 0:
-                 return "Base_vide", 0
-             
-             results = DeepFace.find(
-                 img_path=face_img,
-                 db_path=self.db_path,
-                 model_name=self.model_name,
-                 enforce_detection=False
-             )
-             
-             if results and len(results) > 0:
-                 df = results[0]
-                 if not df.empty:
-                     df = df.sort_values(by="distance", ascending=True).reset_index(drop=True)
-                     best = df.iloc[0]
-                     identity_path = best["identity"]
-                     distance = best["distance"]
-                     threshold = best.get("threshold", 0.4)
-                     score = (1 - distance / threshold) * 100
-                     
-                     if score >= self.threshold_score:
-                         # Extraire le nom du dossier parent
-                         name = os.path.basename(os.path.dirname(identity_path))
-                         return name, score
-             
-             return "Inconnu", 0
-             
-         except Exception as e:
-             # Gestion plus spécifique des erreurs
-             error_msg = str(e).lower()
-             if "no item found" in error_msg or "empty" in error_msg:
-                 return "Base_vide", 0
-             else:
-                 print(f"Erreur reconnaissance: {e}")
-                 return "Erreur", 0
+        """Reconnaître un visage avec gestion améliorée des erreurs"""
+        return self.recognize_batch([face_img])[0]
+    
+    def recognize_batch(self, face_imgs: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """Reconnaître plusieurs visages : une seule comparaison matricielle"""
+        try:
+            if not len(self.embeddings):
+                return [("Base_vide", 0)] * len(face_imgs)
+            
+            vectors = np.stack([embed_face(face_img, self.model_name) for face_img in face_imgs])
+            return self.match_embeddings(vectors)
+            
+        except Exception as e:
+            log.error("Erreur reconnaissance: %s", e)
+            return [("Erreur", 0)] * len(face_imgs)
     
     def get_students_list(self) -> List[str]:
         """Obtenir la liste des étudiants"""
@@ -79,7 +224,11 @@ class FaceRecognizer:
     
     def delete_student(self, student_name: str) -> bool:
         """Supprimer un étudiant"""
-        return self.database.delete_student(student_name)
+        deleted = self.database.delete_student(student_name)
+        if deleted:
+            self.embeddings.remove_student(student_name)
+            self.embeddings.save()
+        return deleted
     
     def get_database_stats(self) -> dict:
         """Obtenir les statistiques de la base"""
@@ -0,0 +1,133 @@
+import cv2
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from utils.metrics import metrics
+
+# Taille d'entrée des modèles de visage (reconnaissance, émotions)
+FACE_INPUT_SIZE = (224, 224)
+
+
+def jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """(largeur, hauteur) lues dans l'en-tête SOF d'un JPEG, sans décoder"""
+    i, n = 2, len(data)
+    while i + 9 < n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # Octet de bourrage
+            i += 1
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return int.from_bytes(data[i + 7:i + 9], 'big'), int.from_bytes(data[i + 5:i + 7], 'big')
+        i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+    return None
+
+
+class FrameContext:
+    """Frame capturée et ses vues dérivées, calculées une seule fois
+
+    Le même objet circule entre la capture, le flux web, la détection,
+    la reconnaissance et l'analyse d'émotions : niveaux de gris, versions
+    réduites et visages découpés à la taille des modèles sont mémoïsés à
+    la première demande. Les vues sont partagées : ne pas les modifier.
+
+    Une frame MJPEG relayée telle quelle (`from_jpeg`) garde les octets
+    de la caméra dans `jpeg` et n'est décodée qu'au premier accès à
+    `frame` (ou à une vue dérivée).
+    """
+
+    def __init__(self, frame: Optional[np.ndarray], seq: int = 0, timestamp: Optional[float] = None,
+                 jpeg: Optional[bytes] = None):
+        self._frame = frame
+        self.jpeg = jpeg
+        self.seq = seq
+        self.timestamp = timestamp or time.time()
+
+        self._views = {}
+        self._lock = threading.RLock()  # Réentrant : une vue peut décoder la frame
+
+        size = jpeg_size(jpeg) if frame is None else None
+        if size:
+            self.width, self.height = size
+        else:
+            self.height, self.width = self.frame.shape[:2]
+
+    @classmethod
+    def from_jpeg(cls, jpeg: bytes, seq: int = 0, timestamp: Optional[float] = None) -> 'FrameContext':
+        """Contexte d'une frame compressée, décodée à la demande"""
+        return cls(None, seq, timestamp, jpeg=jpeg)
+
+    @property
+    def decoded(self) -> bool:
+        return self._frame is not None
+
+    @property
+    def frame(self) -> np.ndarray:
+        """Frame BGR (décodée au premier accès pour une source MJPEG)"""
+        if self._frame is None:
+            with self._lock:
+                if self._frame is None:
+                    with metrics.timer('decode'):
+                        self._frame = cv2.imdecode(np.frombuffer(self.jpeg, np.uint8), cv2.IMREAD_COLOR)
+        return self._frame
+
+    def _memo(self, key, compute):
+        view = self._views.get(key)
+        if view is None:
+            with self._lock:
+                view = self._views.get(key)
+                if view is None:
+                    view = self._views[key] = compute()
+        return view
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Frame en niveaux de gris"""
+        return self._memo('gray', lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY))
+
+    def scaled(self, width: Optional[int]) -> Tuple[np.ndarray, float]:
+        """Frame réduite à `width` (jamais agrandie) et facteur vers l'original"""
+        if not width or self.width <= width:
+            return self.frame, 1.0
+        image = self._memo(('scaled', width), lambda: cv2.resize(
+            self.frame, (width, int(self.height * width / self.width)),
+            interpolation=cv2.INTER_AREA))  # INTER_AREA pour downscaling
+        return image, self.width / width
+
+    def scaled_gray(self, width: Optional[int]) -> Tuple[np.ndarray, float]:
+        """Version réduite en niveaux de gris"""
+        if not width or self.width <= width:
+            return self.gray, 1.0
+        image, scale = self.scaled(width)
+        return self._memo(('scaled_gray', width), lambda: cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)), scale
+
+    def resized(self, size: Tuple[int, int]) -> np.ndarray:
+        """Frame entière à une taille fixe (entrée d'un réseau)"""
+        return self._memo(('resized', size), lambda: cv2.resize(self.frame, size))
+
+    def crop(self, box, size: Optional[Tuple[int, int]] = FACE_INPUT_SIZE) -> np.ndarray:
+        """Visage découpé, redimensionné à `size` (None = taille d'origine)"""
+        x, y, w, h = (int(v) for v in box)
+        x, y = max(0, x), max(0, y)
+
+        def compute():
+            region = self.frame[y:y + h, x:x + w]
+            return cv2.resize(region, size) if size else region.copy()
+
+        return self._memo(('crop', x, y, w, h, size), compute)
+
+    def crop_gray(self, box, size: Optional[Tuple[int, int]] = FACE_INPUT_SIZE) -> np.ndarray:
+        """Visage découpé en niveaux de gris"""
+        crop = self.crop(box, size)
+        x, y, w, h = (int(v) for v in box)
+        return self._memo(('crop_gray', max(0, x), max(0, y), w, h, size),
+                          lambda: cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY))
+
+
+def as_context(frame) -> FrameContext:
+    """Accepter une frame brute ou un FrameContext"""
+    return frame if isinstance(frame, FrameContext) else FrameContext(frame)
@@ -0,0 +1,385 @@
+import cv2
+import logging
+import sys
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Tuple
+from config.settings import settings
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FrameSource(ABC):
+    """Source de frames branchée sur OptimizedCameraManager
+
+    `live` indique une vraie caméra : le gestionnaire régule alors la
+    cadence et saute des frames en cas de retard. Une source enregistrée
+    gère sa propre cadence et livre toutes ses frames (reproductible).
+    """
+
+    name = "base"
+    live = False
+
+    def __init__(self):
+        self.exhausted = False  # Fin du fichier/dossier atteinte
+
+    @abstractmethod
+    def open(self) -> bool:
+        ...
+
+    @abstractmethod
+    def read(self) -> Tuple[bool, Optional[object]]:
+        ...
+
+    @abstractmethod
+    def is_opened(self) -> bool:
+        ...
+
+    def release(self):
+        pass
+
+    def describe(self) -> dict:
+        """Description pour les statistiques"""
+        return {'type': self.name}
+
+
+def is_jpeg(buffer) -> bool:
+    """Tampon brut renvoyé par la caméra commençant par un marqueur SOI JPEG"""
+    return buffer is not None and buffer.size > 4 and buffer.ravel()[0] == 0xFF and buffer.ravel()[1] == 0xD8
+
+
+# Backends de capture OpenCV (settings.CAMERA_BACKEND)
+CAPTURE_BACKENDS = {
+    'dshow': cv2.CAP_DSHOW,         # DirectShow (Windows)
+    'msmf': cv2.CAP_MSMF,           # Media Foundation (Windows)
+    'v4l2': cv2.CAP_V4L2,           # Video4Linux2 (Linux)
+    'gstreamer': cv2.CAP_GSTREAMER,
+    'any': cv2.CAP_ANY,
+}
+
+
+def resolve_capture_backend(name: Optional[str] = None) -> str:
+    """Nom de backend effectif ("auto" : DirectShow sous Windows, V4L2 sous Linux)"""
+    name = (name or settings.CAMERA_BACKEND).lower()
+    if name == 'auto':
+        if sys.platform.startswith('win'):
+            return 'dshow'
+        return 'v4l2' if sys.platform.startswith('linux') else 'any'
+    if name not in CAPTURE_BACKENDS:
+        raise ValueError(f"Backend caméra inconnu: {name}")
+    return name
+
+
+def enumerate_video_devices() -> List[int]:
+    """Indices des caméras présentes (/dev/video* sous Linux, 0 à 4 ailleurs)"""
+    if sys.platform.startswith('linux'):
+        return sorted(int(p.name[5:]) for p in Path('/dev').glob('video*') if p.name[5:].isdigit())
+    return list(range(5))
+
+
+def stable_device_path(index: int) -> Optional[str]:
+    """Lien /dev/v4l/by-id/... de /dev/videoN (stable si la caméra est rebranchée)"""
+    by_id = Path('/dev/v4l/by-id')
+    if not by_id.is_dir():
+        return None
+    target = Path(f'/dev/video{index}')
+    for link in sorted(by_id.iterdir()):
+        try:
+            if link.resolve() == target:
+                return str(link)
+        except OSError:
+            continue
+    return None
+
+
+class LiveCameraSource(FrameSource):
+    """Caméra USB/intégrée via cv2.VideoCapture
+
+    Le backend OpenCV est choisi par `backend` (settings.CAMERA_BACKEND) :
+    DirectShow sous Windows, V4L2 sous Linux, ou un pipeline GStreamer
+    (settings.CAMERA_GST_PIPELINE). Sous Linux, la caméra est retrouvée par
+    son lien /dev/v4l/by-id à la réouverture, même si son numéro change
+    après un débranchement.
+
+    scan=True : si la caméra est absente, essayer les autres indices. Par
+    défaut seulement avec une caméra unique ; avec des caméras nommées
+    (settings.CAMERAS), chacune n'ouvre que son propre périphérique, sinon
+    la porte pourrait reprendre la vue de salle (et inversement).
+
+    passthrough=True (V4L2 uniquement) : la caméra MJPEG livre ses JPEG
+    bruts (CAP_PROP_CONVERT_RGB=0) ; read() renvoie alors des `bytes` que
+    le gestionnaire ne décode qu'à la demande et relaie tels quels au flux.
+    Si le pilote ignore l'option, on revient aux frames décodées.
+    """
+
+    name = "camera"
+    live = True
+
+    def __init__(self, index: Optional[int] = None, width: int = 640, height: int = 480, fps: int = 30,
+                 passthrough: bool = False, backend: Optional[str] = None, scan: Optional[bool] = None):
+        super().__init__()
+        self.index = settings.CAMERA_INDEX if index is None else index
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.backend = resolve_capture_backend(backend)
+        self.passthrough = passthrough and self.backend == 'v4l2'
+        self.scan = not settings.CAMERAS if scan is None else scan
+        self.stable_path: Optional[str] = None
+        self.cap: Optional[cv2.VideoCapture] = None
+
+    def _candidates(self) -> List[int]:
+        """Indices à essayer : la caméra connue d'abord, puis les autres (scan)"""
+        preferred = self.index
+        if self.stable_path:
+            if Path(self.stable_path).exists():
+                name = Path(self.stable_path).resolve().name
+                if name[5:].isdigit():
+                    preferred = int(name[5:])
+            elif not self.scan:
+                # Caméra débranchée : son ancien numéro peut être repris par une autre
+                return []
+        if not self.scan:
+            return [preferred]
+        return [preferred] + [i for i in enumerate_video_devices() if i != preferred]
+
+    def _open_capture(self, index: int) -> cv2.VideoCapture:
+        if self.backend == 'gstreamer':
+            pipeline = settings.CAMERA_GST_PIPELINE.format(
+                device=f'/dev/video{index}', width=self.width, height=self.height, fps=self.fps)
+            return cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+        return cv2.VideoCapture(index, CAPTURE_BACKENDS[self.backend])
+
+    def open(self) -> bool:
+        self.release()
+        for i in self._candidates():
+            cap = self._open_capture(i)
+            if cap.isOpened():
+                if i != self.index:
+                    log.info("Caméra trouvée à l'index %s (%s)", i, self.backend)
+                    if self.index == settings.CAMERA_INDEX:
+                        settings.CAMERA_INDEX = i  # Caméra principale
+                    self.index = i
+                self.cap = cap
+                break
+            cap.release()
+            log.debug("Caméra index %s indisponible (%s)", i, self.backend)
+        else:
+            log.warning("Aucune caméra trouvée (index %s, %s)", self.stable_path or self.index, self.backend)
+            return False
+
+        if sys.platform.startswith('linux'):
+            self.stable_path = stable_device_path(self.index) or self.stable_path
+
+        if self.backend == 'gstreamer':
+            # Taille, cadence et format fixés par le pipeline
+            return True
+
+        # OPTIMISATIONS CRITIQUES
+        # Réduire la résolution de capture pour améliorer les performances
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+
+        # Optimiser le FPS
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+
+        # TRÈS IMPORTANT : Réduire le buffer au minimum
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Optimisations codec
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
+
+        # Optimisations pour réduire la latence
+        self.cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.25)  # Réduire l'auto-exposition
+
+        if self.passthrough:
+            # Garder le JPEG de la caméra : pas de décodage systématique
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        return True
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not self.passthrough or not ret:
+            return ret, frame
+        if is_jpeg(frame):
+            return True, frame.tobytes()
+
+        # Pilote sans MJPEG brut (ex. YUYV) : retour au décodage OpenCV
+        log.warning("Passthrough MJPEG non supporté par la caméra, frames décodées")
+        self.passthrough = False
+        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+        return self.cap.read()
+
+    def is_opened(self) -> bool:
+        return self.cap is not None and self.cap.isOpened()
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def describe(self) -> dict:
+        info = {'type': self.name, 'index': self.index, 'backend': self.backend,
+                'device': self.stable_path, 'passthrough': self.passthrough}
+        if self.is_opened():
+            info.update({
+                'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                'fps': self.cap.get(cv2.CAP_PROP_FPS)
+            })
+        return info
+
+
+class VideoFileSource(FrameSource):
+    """Relecture d'une vidéo enregistrée
+
+    realtime=True : respecte les horodatages d'origine (CAP_PROP_POS_MSEC).
+    realtime=False : livre les frames aussi vite que le pipeline les consomme.
+    """
+
+    name = "video"
+
+    def __init__(self, path, realtime: bool = True, loop: bool = False):
+        super().__init__()
+        self.path = str(path)
+        self.realtime = realtime
+        self.loop = loop
+        self.cap: Optional[cv2.VideoCapture] = None
+        self.started_at = 0.0
+        self.loop_offset = 0.0  # Durée cumulée des passages précédents (secondes)
+        self.last_pos = 0.0
+        self.frames_read = 0
+
+    def open(self) -> bool:
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            log.error("Impossible d'ouvrir la vidéo %s", self.path)
+            return False
+        self.exhausted = False
+        self.started_at = time.perf_counter()
+        self.loop_offset = self.last_pos = 0.0
+        return True
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.loop_offset += self.last_pos
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            self.exhausted = True
+            return False, None
+
+        self.frames_read += 1
+        if self.realtime:
+            position = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if position <= 0:
+                # Conteneur sans horodatage : cadence nominale
+                position = self.frames_read / (self.cap.get(cv2.CAP_PROP_FPS) or 30)
+            else:
+                self.last_pos = position
+                position += self.loop_offset
+            delay = self.started_at + position - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return True, frame
+
+    def is_opened(self) -> bool:
+        return self.cap is not None and self.cap.isOpened() and not self.exhausted
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def describe(self) -> dict:
+        info = {'type': self.name, 'path': self.path, 'realtime': self.realtime,
+                'loop': self.loop, 'frames_read': self.frames_read}
+        if self.cap is not None:
+            info.update({
+                'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                'fps': self.cap.get(cv2.CAP_PROP_FPS),
+                'frame_total': int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            })
+        return info
+
+
+class ImageDirectorySource(FrameSource):
+    """Relecture d'un dossier d'images (ordre alphabétique des noms)
+
+    fps > 0 : une image toutes les 1/fps secondes ; fps = 0 : au plus vite.
+    """
+
+    name = "images"
+
+    def __init__(self, path, fps: float = 30, loop: bool = False):
+        super().__init__()
+        self.path = Path(path)
+        self.fps = fps
+        self.loop = loop
+        self.files = []
+        self.position = 0
+        self.started_at = 0.0
+        self.frames_read = 0
+
+    def open(self) -> bool:
+        self.files = sorted(p for p in self.path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        if not self.files:
+            log.error("Aucune image dans %s", self.path)
+            return False
+        self.position = 0
+        self.exhausted = False
+        self.started_at = time.perf_counter()
+        return True
+
+    def read(self):
+        frame = None
+        while frame is None:
+            if self.position >= len(self.files):
+                if not self.loop:
+                    self.exhausted = True
+                    return False, None
+                self.position = 0
+            frame = cv2.imread(str(self.files[self.position]))
+            self.position += 1
+
+        self.frames_read += 1
+        if self.fps:
+            delay = self.started_at + self.frames_read / self.fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return True, frame
+
+    def is_opened(self) -> bool:
+        return bool(self.files) and not self.exhausted
+
+    def describe(self) -> dict:
+        return {'type': self.name, 'path': str(self.path), 'fps': self.fps, 'loop': self.loop,
+                'frame_total': len(self.files), 'frames_read': self.frames_read}
+
+
+def create_frame_source(spec=None, width: int = 640, height: int = 480, fps: int = 30) -> FrameSource:
+    """Source décrite par `spec` (défaut : settings.CAMERA_SOURCE)
+
+    "camera" ou vide : caméra settings.CAMERA_INDEX ; un entier : index de
+    caméra ; un dossier : images ; tout autre chemin : fichier vidéo.
+    """
+    spec = settings.CAMERA_SOURCE if spec is None else spec
+    if isinstance(spec, FrameSource):
+        return spec
+    if spec in (None, "", "camera"):
+        return LiveCameraSource(width=width, height=height, fps=fps,
+                                passthrough=settings.CAMERA_MJPEG_PASSTHROUGH)
+    if isinstance(spec, int) or str(spec).isdigit():
+        return LiveCameraSource(int(spec), width=width, height=height, fps=fps,
+                                passthrough=settings.CAMERA_MJPEG_PASSTHROUGH)
+
+    path = Path(spec)
+    if path.is_dir():
+        return ImageDirectorySource(path, fps=settings.CAMERA_SOURCE_FPS if settings.CAMERA_SOURCE_REALTIME else 0,
+                                    loop=settings.CAMERA_SOURCE_LOOP)
+    return VideoFileSource(path, realtime=settings.CAMERA_SOURCE_REALTIME, loop=settings.CAMERA_SOURCE_LOOP)
@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+
+class InferenceScheduler:
+    """Partage équitable du détecteur/reconnaisseur entre caméras
+
+    Chaque caméra dépose sa dernière frame à analyser dans un emplacement
+    unique : une frame pas encore traitée est remplacée par la suivante
+    (on analyse toujours l'image la plus récente). Les workers servent les
+    caméras à tour de rôle (tourniquet) et une caméra n'est jamais traitée
+    par deux workers à la fois : une caméra très active ne peut pas
+    monopoliser les modèles, la capacité est divisée entre les caméras au
+    lieu d'être dupliquée.
+
+    `handler(camera, item)` est appelé dans un thread worker.
+    """
+
+    def __init__(self, handler: Callable, workers: int = 1):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.order: List[str] = []          # Ordre du tourniquet
+        self.pending: Dict[str, tuple] = {}  # caméra -> (item, déposé à)
+        self.busy = set()
+        self.cursor = 0
+        self.condition = threading.Condition()
+        self.running = False
+        self.threads = []
+        self.stats: Dict[str, dict] = {}
+
+    def register(self, camera: str):
+        with self.condition:
+            if camera not in self.order:
+                self.order.append(camera)
+                self.stats[camera] = {'submitted': 0, 'processed': 0, 'replaced': 0,
+                                      'errors': 0, 'wait_time': 0.0, 'run_time': 0.0}
+
+    def submit(self, camera: str, item) -> bool:
+        """Déposer une frame ; False si elle remplace une frame en attente"""
+        with self.condition:
+            if camera not in self.stats:
+                raise KeyError(f"Caméra non enregistrée: {camera}")
+            replaced = camera in self.pending
+            self.pending[camera] = (item, time.perf_counter())
+            self.stats[camera]['submitted'] += 1
+            if replaced:
+                self.stats[camera]['replaced'] += 1
+            self.condition.notify()
+        return not replaced
+
+    def _next(self):
+        """Prochaine caméra servie (bloquant) ; None à l'arrêt"""
+        with self.condition:
+            while self.running:
+                count = len(self.order)
+                for offset in range(count):
+                    index = (self.cursor + offset) % count
+                    camera = self.order[index]
+                    if camera in self.pending and camera not in self.busy:
+                        self.cursor = index + 1
+                        self.busy.add(camera)
+                        item, submitted_at = self.pending.pop(camera)
+                        return camera, item, submitted_at
+                self.condition.wait()
+            return None
+
+    def _worker(self):
+        while True:
+            task = self._next()
+            if task is None:
+                break
+            camera, item, submitted_at = task
+            started = time.perf_counter()
+            stats = self.stats[camera]
+            try:
+                self.handler(camera, item)
+            except Exception as e:
+                stats['errors'] += 1
+                metrics.inc('errors')
+                log.error("Erreur inférence caméra %s: %s", camera, e)
+            finally:
+                finished = time.perf_counter()
+                metrics.observe('inference_wait', started - submitted_at)
+                with self.condition:
+                    self.busy.discard(camera)
+                    stats['processed'] += 1
+                    stats['wait_time'] += started - submitted_at
+                    stats['run_time'] += finished - started
+                    # Une frame a pu arriver pendant le traitement
+                    self.condition.notify()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.threads = [threading.Thread(target=self._worker, daemon=True, name=f"Inference-{i}")
+                        for i in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+        log.info("Ordonnanceur d'inférence démarré (%s worker(s), %s caméra(s))",
+                 self.workers, len(self.order))
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        with self.condition:
+            self.running = False
+            self.pending.clear()
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.threads = []
+
+    def get_stats(self) -> dict:
+        """Statistiques par caméra (attente et durée moyennes en ms)"""
+        with self.condition:
+            result = {}
+            for camera in self.order:
+                stats = self.stats[camera]
+                processed = stats['processed']
+                result[camera] = {
+                    'submitted': stats['submitted'],
+                    'processed': processed,
+                    'replaced': stats['replaced'],
+                    'errors': stats['errors'],
+                    'pending': camera in self.pending,
+                    'avg_wait_ms': round(stats['wait_time'] / processed * 1000, 1) if processed else 0,
+                    'avg_run_ms': round(stats['run_time'] / processed * 1000, 1) if processed else 0,
+                }
+            return result
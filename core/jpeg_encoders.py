@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+from typing import Optional
+
+SUBSAMPLING_MODES = ("444", "422", "420", "gray")
+
+
+class OpenCVJpegEncoder:
+    """Encodeur JPEG via cv2.imencode (toujours disponible)"""
+
+    name = "opencv"
+
+    # Facteurs d'échantillonnage (OpenCV >= 4.5.5)
+    _SAMPLING = {
+        "444": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_444", None),
+        "422": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_422", None),
+        "420": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_420", None),
+    }
+
+    def encode(self, frame: np.ndarray, quality: int = 75, subsampling: str = "420",
+               optimize: bool = False, progressive: bool = False) -> Optional[bytes]:
+        """Encoder une frame BGR en JPEG"""
+        if subsampling == "gray":
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        sampling = self._SAMPLING.get(subsampling)
+        if sampling is not None:
+            params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, sampling]
+        if optimize:
+            params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+        if progressive:
+            params += [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]
+
+        ret, buffer = cv2.imencode('.jpg', frame, params)
+        return buffer.tobytes() if ret else None
+
+
+class TurboJpegEncoder:
+    """Encodeur libjpeg-turbo via PyTurboJPEG (dépendance optionnelle)"""
+
+    name = "turbojpeg"
+
+    def __init__(self, lib_path: Optional[str] = None):
+        import turbojpeg
+        self._turbojpeg = turbojpeg
+        self.jpeg = turbojpeg.TurboJPEG(lib_path) if lib_path else turbojpeg.TurboJPEG()
+        self._sampling = {
+            "444": turbojpeg.TJSAMP_444,
+            "422": turbojpeg.TJSAMP_422,
+            "420": turbojpeg.TJSAMP_420,
+            "gray": turbojpeg.TJSAMP_GRAY,
+        }
+
+    def encode(self, frame: np.ndarray, quality: int = 75, subsampling: str = "420",
+               optimize: bool = False, progressive: bool = False) -> Optional[bytes]:
+        """Encoder une frame BGR en JPEG"""
+        flags = 0
+        if progressive:
+            flags |= self._turbojpeg.TJFLAG_PROGRESSIVE
+        # `optimize` (tables de Huffman optimisées) n'a pas d'équivalent
+        # direct, il est implicite en mode progressif
+        if subsampling == "gray":
+            return self.jpeg.encode(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), quality=int(quality),
+                                    pixel_format=self._turbojpeg.TJPF_GRAY,
+                                    jpeg_subsample=self._sampling["gray"], flags=flags)
+        return self.jpeg.encode(frame, quality=int(quality),
+                                pixel_format=self._turbojpeg.TJPF_BGR,
+                                jpeg_subsample=self._sampling.get(subsampling, self._sampling["420"]),
+                                flags=flags)
+
+
+ENCODERS = {
+    OpenCVJpegEncoder.name: OpenCVJpegEncoder,
+    TurboJpegEncoder.name: TurboJpegEncoder,
+}
+
+_instances = {}
+
+
+def available_encoders():
+    """Noms des encodeurs utilisables sur cette machine"""
+    names = []
+    for name in ENCODERS:
+        try:
+            get_jpeg_encoder(name)
+            names.append(name)
+        except Exception:
+            pass
+    return names
+
+
+def get_jpeg_encoder(name: str = "auto"):
+    """Obtenir un encodeur ('auto' = libjpeg-turbo si disponible, sinon OpenCV)"""
+    if name == "auto":
+        try:
+            return get_jpeg_encoder(TurboJpegEncoder.name)
+        except Exception:
+            return get_jpeg_encoder(OpenCVJpegEncoder.name)
+
+    if name not in _instances:
+        if name not in ENCODERS:
+            raise ValueError(f"Encodeur JPEG inconnu: {name}")
+        _instances[name] = ENCODERS[name]()
+    return _instances[name]
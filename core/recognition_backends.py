@@ -0,0 +1,271 @@
+import base64
+import http.client
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout, wait
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+import cv2
+import numpy as np
+
+from config.settings import settings
+from core.face_recognizer import FaceRecognizer
+
+log = logging.getLogger(__name__)
+
+
+def encode_face(face_img: np.ndarray, quality: int = 90) -> str:
+    """Visage découpé -> JPEG en base64 (transport vers le service central)"""
+    ret, buffer = cv2.imencode('.jpg', face_img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ret:
+        raise ValueError("Encodage JPEG du visage impossible")
+    return base64.b64encode(buffer.tobytes()).decode('ascii')
+
+
+def decode_face(data: str) -> np.ndarray:
+    """JPEG en base64 -> image BGR"""
+    image = cv2.imdecode(np.frombuffer(base64.b64decode(data), np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Image de visage invalide")
+    return image
+
+
+class BatchingRecognizer:
+    """Service central : un index partagé, demandes regroupées par lots
+
+    Les demandes de toutes les salles arrivent dans une même file ; le
+    thread du modèle prend ce qui arrive pendant `window` secondes (au plus
+    `batch_size` visages) et le traite en un appel à
+    `recognizer.recognize_batch`. Un seul thread utilise le modèle.
+    """
+
+    def __init__(self, recognizer: FaceRecognizer, batch_size: int = 16, window: float = 0.02):
+        self.recognizer = recognizer
+        self.batch_size = batch_size
+        self.window = window
+        self.queue = queue.Queue()
+        self.thread = None
+        self.running = False
+
+        # Statistiques
+        self.requests = 0
+        self.batches = 0
+        self.batch_time = 0.0
+        self.rooms = {}
+        self.lock = threading.Lock()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._worker, daemon=True, name="RecognitionBatch")
+        self.thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        self.running = False
+        self.queue.put(None)
+        if self.thread:
+            self.thread.join(timeout=timeout)
+
+    def submit(self, face_img: np.ndarray, room: Optional[str] = None) -> Future:
+        future = Future()
+        with self.lock:
+            self.requests += 1
+            self.rooms[room or "?"] = self.rooms.get(room or "?", 0) + 1
+        self.queue.put((face_img, future))
+        return future
+
+    def recognize_many(self, faces: List[np.ndarray], room: Optional[str] = None,
+                       timeout: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Résultats de tous les visages ; `timeout` borne l'appel entier
+
+        Délai dépassé : les demandes pas encore prises par le modèle sont
+        annulées (jamais calculées) et FutureTimeout est levée.
+        """
+        futures = [self.submit(face, room) for face in faces]
+        _, pending = wait(futures, timeout=timeout)
+        if pending:
+            for future in pending:
+                future.cancel()
+            raise FutureTimeout(f"{len(pending)}/{len(futures)} visage(s) sans résultat en {timeout}s")
+        return [future.result() for future in futures]
+
+    def _collect(self, first):
+        """Lot : la première demande et celles qui arrivent pendant la fenêtre"""
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self.running = False
+                break
+            batch.append(item)
+        return batch
+
+    def _worker(self):
+        while self.running:
+            first = self.queue.get()
+            if first is None:
+                break
+            batch = [(img, future) for img, future in self._collect(first)
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                results = self.recognizer.recognize_batch([img for img, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                log.error("Erreur lot de reconnaissance: %s", e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                self.batches += 1
+                self.batch_time += time.perf_counter() - start
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            rooms = dict(self.rooms)
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'avg_batch_size': round(self.requests / self.batches, 2) if self.batches else 0,
+            'avg_batch_ms': round(self.batch_time / self.batches * 1000, 1) if self.batches else 0,
+            'queued': self.queue.qsize(),
+            'rooms': rooms
+        }
+
+
+class RemoteFaceRecognizer(FaceRecognizer):
+    """Boîtier de salle client d'un service central de reconnaissance
+
+    Les visages découpés partent en JPEG vers RECOGNITION_SERVICE_URL
+    (connexion HTTP persistante) ; la base locale ne sert plus qu'à
+    l'enrôlement et aux statistiques de l'interface. Service injoignable :
+    résultat "Erreur", comme une erreur locale du modèle.
+    """
+
+    def __init__(self, url: Optional[str] = None, timeout: Optional[float] = None):
+        super().__init__()
+        parsed = urlparse(url or settings.RECOGNITION_SERVICE_URL)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.path = parsed.path.rstrip('/') + '/recognize'
+        self.timeout = timeout or settings.RECOGNITION_SERVICE_TIMEOUT
+        self.connection: Optional[http.client.HTTPConnection] = None
+        self.lock = threading.Lock()
+        self.failures = 0
+
+    def _post(self, payload: dict) -> dict:
+        body = json.dumps(payload).encode('utf-8')
+        with self.lock:
+            for attempt in range(2):
+                if self.connection is None:
+                    self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                try:
+                    self.connection.request('POST', self.path, body, {'Content-Type': 'application/json'})
+                    response = self.connection.getresponse()
+                    data = response.read()
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    # Connexion persistante fermée par le serveur : une seule reprise
+                    self.connection.close()
+                    self.connection = None
+                    if attempt:
+                        raise
+                    continue
+                except Exception:
+                    self.connection.close()
+                    self.connection = None
+                    raise
+                if response.status != 200:
+                    raise RuntimeError(f"Service de reconnaissance: HTTP {response.status}")
+                return json.loads(data)
+
+    def recognize_batch(self, face_imgs: List[np.ndarray]) -> List[Tuple[str, float]]:
+        try:
+            payload = {'room': settings.CLASSROOM, 'faces': [encode_face(img) for img in face_imgs]}
+            return [(r['name'], r['confidence']) for r in self._post(payload)['results']]
+        except Exception as e:
+            self.failures += 1
+            log.error("Service de reconnaissance indisponible: %s", e)
+            return [("Erreur", 0)] * len(face_imgs)
+
+    def recognize_face(self, face_img: np.ndarray) -> Tuple[str, float]:
+        return self.recognize_batch([face_img])[0]
+
+    def start_sync(self):
+        """Pas de comparaison locale : vecteurs tenus par le service"""
+
+
+_shared_service: Optional[BatchingRecognizer] = None
+_shared_lock = threading.Lock()
+
+
+def shared_recognition_service() -> BatchingRecognizer:
+    """Service central du processus (stand-in et serveur HTTP)"""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            recognizer = FaceRecognizer()
+            recognizer.start_sync()
+            _shared_service = BatchingRecognizer(recognizer, settings.RECOGNITION_BATCH_SIZE,
+                                                 settings.RECOGNITION_BATCH_WINDOW)
+            _shared_service.start()
+        return _shared_service
+
+
+class InProcessFaceRecognizer(FaceRecognizer):
+    """Service central simulé dans ce processus (tests sur une machine)
+
+    Même chemin que le client distant sans le réseau : visages encodés
+    en JPEG (mêmes pertes), puis file de regroupement partagée par toutes
+    les instances du processus.
+    """
+
+    def __init__(self, service: Optional[BatchingRecognizer] = None):
+        super().__init__()
+        self.service = service or shared_recognition_service()
+
+    def recognize_batch(self, face_imgs: List[np.ndarray]) -> List[Tuple[str, float]]:
+        # Même contrat que le client distant : délai ou erreur -> "Erreur"
+        try:
+            faces = [decode_face(encode_face(img)) for img in face_imgs]
+            return self.service.recognize_many(faces, settings.CLASSROOM,
+                                               timeout=settings.RECOGNITION_SERVICE_DEADLINE)
+        except Exception as e:
+            log.error("Service de reconnaissance indisponible: %s", e)
+            return [("Erreur", 0)] * len(face_imgs)
+
+    def recognize_face(self, face_img: np.ndarray) -> Tuple[str, float]:
+        return self.recognize_batch([face_img])[0]
+
+    def start_sync(self):
+        """Synchronisation faite par le reconnaisseur du service partagé"""
+
+
+RECOGNITION_BACKENDS = {
+    'local': FaceRecognizer,
+    'remote': RemoteFaceRecognizer,
+    'inprocess': InProcessFaceRecognizer,
+}
+
+
+def create_face_recognizer(name: Optional[str] = None) -> FaceRecognizer:
+    """Reconnaisseur choisi par settings.RECOGNITION_BACKEND"""
+    name = name or settings.RECOGNITION_BACKEND
+    if name not in RECOGNITION_BACKENDS:
+        raise ValueError(f"Backend de reconnaissance inconnu: {name}")
+    return RECOGNITION_BACKENDS[name]()
@@ -0,0 +1,125 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+from utils.metrics import Histogram, metrics
+
+log = logging.getLogger(__name__)
+
+# Voies de priorité (plus petit = servi d'abord)
+LANE_STOP = -1
+LANE_DOOR = 0
+LANE_CLASSROOM = 1
+LANE_NAMES = {LANE_DOOR: 'door', LANE_CLASSROOM: 'classroom'}
+
+
+class RecognitionScheduler:
+    """Accès unique au modèle de reconnaissance, avec voie prioritaire porte
+
+    Un seul thread appelle `recognize(face_img)` : le modèle n'est plus
+    sollicité en parallèle par le worker de salle et par les requêtes
+    HTTP de la porte. Les demandes de la porte passent devant toute
+    analyse de salle en attente ; une analyse déjà commencée n'est pas
+    interrompue (appel au modèle non préemptible), le pire cas pour la
+    porte est donc la durée d'une reconnaissance.
+
+    submit() renvoie un Future ; un Future annulé avant son tour (délai
+    dépassé côté appelant) n'est jamais exécuté. La latence de bout en
+    bout (attente + modèle) est mesurée par voie et comparée au SLO de
+    la porte (`slo_ms`, sur le p95).
+    """
+
+    def __init__(self, recognize: Callable, slo_ms: float = 500):
+        self.recognize = recognize
+        self.slo_ms = slo_ms
+        self.queue = queue.PriorityQueue()
+        self.sequence = itertools.count()  # Ordre d'arrivée dans une voie
+        self.thread = None
+        self.running = False
+        self.lock = threading.Lock()
+
+        # Statistiques
+        self.latency = {lane: Histogram() for lane in LANE_NAMES}
+        self.completed = {lane: 0 for lane in LANE_NAMES}
+        self.cancelled = {lane: 0 for lane in LANE_NAMES}
+        self.slo_violations = 0
+        self.preemptions = 0  # Demandes porte servies avant une analyse de salle en attente
+        self.classroom_waiting = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._worker, daemon=True, name="Recognition")
+        self.thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        if not self.running:
+            return
+        self.running = False
+        self.queue.put((LANE_STOP, next(self.sequence), 0.0, None, None))
+        if self.thread:
+            self.thread.join(timeout=timeout)
+
+    def submit(self, face_img, lane: int = LANE_CLASSROOM) -> Future:
+        """Demander une reconnaissance ; le Future donne (nom, confiance)"""
+        future = Future()
+        with self.lock:
+            if lane == LANE_CLASSROOM:
+                self.classroom_waiting += 1
+            elif self.classroom_waiting:
+                self.preemptions += 1
+        self.queue.put((lane, next(self.sequence), time.perf_counter(), face_img, future))
+        return future
+
+    def _worker(self):
+        while True:
+            lane, _, submitted_at, face_img, future = self.queue.get()
+            if lane == LANE_STOP:
+                break
+            if lane == LANE_CLASSROOM:
+                with self.lock:
+                    self.classroom_waiting -= 1
+
+            if not future.set_running_or_notify_cancel():
+                self.cancelled[lane] += 1
+                continue
+
+            try:
+                with metrics.timer('recognize'):
+                    result = self.recognize(face_img)
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                elapsed = time.perf_counter() - submitted_at
+                self.latency[lane].observe(elapsed)
+                self.completed[lane] += 1
+                metrics.observe(f"recognition_{LANE_NAMES[lane]}", elapsed)
+                if lane == LANE_DOOR and elapsed * 1000 > self.slo_ms:
+                    self.slo_violations += 1
+                    metrics.inc('door_slo_violations')
+                    log.warning("Reconnaissance porte lente: %.0f ms (SLO %.0f ms)", elapsed * 1000, self.slo_ms)
+
+    def get_stats(self) -> dict:
+        """Latences par voie et respect du SLO porte (p95)"""
+        lanes = {}
+        for lane, name in LANE_NAMES.items():
+            lanes[name] = dict(self.latency[lane].summary(), completed=self.completed[lane],
+                               cancelled=self.cancelled[lane])
+        door_p95 = lanes['door']['p95_ms']
+        return {
+            'lanes': lanes,
+            'queued': self.queue.qsize(),
+            'preemptions': self.preemptions,
+            'door_slo': {
+                'target_p95_ms': self.slo_ms,
+                'p95_ms': door_p95,
+                'met': door_p95 <= self.slo_ms if lanes['door']['count'] else None,
+                'violations': self.slo_violations
+            }
+        }
@@ -0,0 +1,140 @@
+import serial
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, List, Optional
+from config.settings import settings
+
+# Identifiants USB des cartes Arduino et des convertisseurs série courants
+ARDUINO_USB_VIDS = {0x2341, 0x2A03, 0x1A86, 0x0403, 0x10C4}
+
+
+def list_candidate_ports(preferred: Optional[str] = None) -> List[str]:
+    """Lister les ports série disponibles, les plus probables en premier"""
+    candidates = []
+    try:
+        from serial.tools import list_ports
+        ports = list(list_ports.comports())
+    except Exception as e:
+        print(f"Erreur énumération ports série: {e}")
+        ports = []
+
+    def score(port_info) -> int:
+        description = f"{port_info.description} {port_info.manufacturer or ''}".lower()
+        if port_info.vid in ARDUINO_USB_VIDS or "arduino" in description:
+            return 0
+        if "usb" in description or "acm" in port_info.device.lower():
+            return 1
+        return 2
+
+    for port_info in sorted(ports, key=score):
+        candidates.append(port_info.device)
+
+    # Le port configuré ou mis en cache passe toujours en premier, même
+    # s'il n'est pas énuméré (pty, URL pyserial...)
+    for port in (preferred, load_cached_port()):
+        if port and port in candidates:
+            candidates.remove(port)
+        if port:
+            candidates.insert(0, port)
+
+    return list(dict.fromkeys(candidates))
+
+
+def probe_port(port: str, timeout: Optional[float] = None) -> bool:
+    """Vérifier qu'un Arduino de porte répond au handshake sur ce port"""
+    if timeout is None:
+        timeout = settings.SERIAL_BOOT_DELAY + settings.SERIAL_ACK_TIMEOUT
+
+    try:
+        connection = serial.serial_for_url(port, settings.BAUD_RATE, timeout=0.05, write_timeout=0.5)
+    except Exception:
+        return False
+
+    handshake = f"{settings.SERIAL_HANDSHAKE}\n".encode()
+    replies = tuple(reply.upper() for reply in settings.SERIAL_HANDSHAKE_REPLIES)
+
+    try:
+        deadline = time.time() + timeout
+        next_ping = 0.0
+        while time.time() < deadline:
+            # Renvoyer le PING régulièrement : l'Arduino l'ignore pendant son boot
+            if time.time() >= next_ping:
+                connection.write(handshake)
+                next_ping = time.time() + 0.25
+            line = connection.readline()
+            if line and line.decode("utf-8", errors="replace").strip().upper().startswith(replies):
+                return True
+        return False
+    except Exception:
+        return False
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def discover_door_port(preferred: Optional[str] = None,
+                       ports: Optional[Iterable[str]] = None) -> Optional[str]:
+    """Trouver le port de l'Arduino en sondant les ports en parallèle"""
+    candidates = list(ports) if ports is not None else list_candidate_ports(preferred)
+    if not candidates:
+        return None
+
+    # Le dernier port valide est testé seul d'abord : cas le plus fréquent
+    cached = load_cached_port()
+    if cached in candidates and probe_port(cached):
+        return cached
+    remaining = [port for port in candidates if port != cached]
+    if not remaining:
+        return None
+
+    found = None
+    pool = ThreadPoolExecutor(max_workers=min(len(remaining), 8), thread_name_prefix="SerialProbe")
+    try:
+        futures = {pool.submit(probe_port, port): port for port in remaining}
+        for future in as_completed(futures):
+            if future.result():
+                found = futures[future]
+                break
+    finally:
+        # Ne pas attendre les sondes restantes, elles ferment leur port seules
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if found is None and ports is None:
+        # Firmware sans handshake : accepter une carte Arduino unique
+        arduino_ports = _arduino_usb_ports()
+        if len(arduino_ports) == 1:
+            found = arduino_ports[0]
+            print(f"⚠️ {found} ne répond pas au handshake, utilisé car seule carte Arduino détectée")
+
+    if found:
+        save_cached_port(found)
+    return found
+
+
+def _arduino_usb_ports() -> List[str]:
+    """Ports dont l'identifiant USB correspond à une carte Arduino"""
+    try:
+        from serial.tools import list_ports
+        return [port_info.device for port_info in list_ports.comports()
+                if port_info.vid in ARDUINO_USB_VIDS]
+    except Exception:
+        return []
+
+
+def load_cached_port() -> Optional[str]:
+    """Lire le dernier port valide"""
+    try:
+        port = settings.SERIAL_PORT_CACHE.read_text(encoding="utf-8").strip()
+        return port or None
+    except Exception:
+        return None
+
+
+def save_cached_port(port: str):
+    """Mémoriser le dernier port valide"""
+    try:
+        settings.SERIAL_PORT_CACHE.write_text(port, encoding="utf-8")
+    except Exception as e:
+        print(f"Erreur sauvegarde port série: {e}")
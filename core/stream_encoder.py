@@ -0,0 +1,149 @@
+import cv2
+import numpy as np
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, Optional
+from config.settings import OptimizedSettings
+from core.jpeg_encoders import get_jpeg_encoder
+from utils.metrics import metrics
+
+# Frame encodée partagée par tous les clients d'un profil
+EncodedFrame = namedtuple('EncodedFrame', ['seq', 'jpeg', 'chunk', 'profile'])
+
+
+def multipart_chunk(frame_bytes: bytes) -> bytes:
+    """Emballer une image JPEG dans un morceau multipart MJPEG"""
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n'
+            b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n'
+            b'\r\n' + frame_bytes + b'\r\n')
+
+
+def _render_status_chunk(width: int, lines, quality: int) -> bytes:
+    """Dessiner et encoder une image d'état (caméra inactive, erreur)"""
+    # Image de référence 480x360, mise à l'échelle du profil
+    width = min(width, 480)
+    scale = width / 480
+    image = np.zeros((int(360 * scale), width, 3), dtype=np.uint8)
+    for text, (x, y), font_scale, color in lines:
+        cv2.putText(image, text, (int(x * scale), int(y * scale)),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale * scale, color, 2)
+    ret, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return multipart_chunk(buffer.tobytes() if ret else b'')
+
+
+_PLACEHOLDER_LINES = [
+    ("Camera Inactive", (120, 160), 1, (255, 255, 255)),
+    ("Click 'Start Camera'", (100, 200), 0.7, (200, 200, 200)),
+]
+_ERROR_LINES = [
+    ("Stream Error", (150, 180), 1, (0, 0, 255)),
+]
+
+# Images d'état rendues une seule fois, par profil
+PLACEHOLDER_CHUNKS = {name: _render_status_chunk(config['width'], _PLACEHOLDER_LINES, 60)
+                      for name, config in OptimizedSettings.STREAM_PROFILES.items()}
+ERROR_CHUNKS = {name: _render_status_chunk(config['width'], _ERROR_LINES, 50)
+                for name, config in OptimizedSettings.STREAM_PROFILES.items()}
+
+
+def placeholder_chunk(profile: Optional[str] = None) -> bytes:
+    """Morceau multipart « caméra inactive » précalculé"""
+    return PLACEHOLDER_CHUNKS.get(profile) or PLACEHOLDER_CHUNKS[OptimizedSettings.DEFAULT_STREAM_PROFILE]
+
+
+def error_chunk(profile: Optional[str] = None) -> bytes:
+    """Morceau multipart « erreur de flux » précalculé"""
+    return ERROR_CHUNKS.get(profile) or ERROR_CHUNKS[OptimizedSettings.DEFAULT_STREAM_PROFILE]
+
+
+class StreamEncoder:
+    """Étape partagée de redimensionnement + encodage JPEG par profil
+
+    L'encodage est paresseux : un profil n'est calculé que s'il est
+    demandé, et au plus une fois par frame caméra, quel que soit le
+    nombre de clients connectés. Avec une caméra MJPEG en passthrough,
+    le JPEG d'origine est relayé sans décodage ni réencodage quand le
+    profil n'impose pas de réduction.
+    """
+
+    def __init__(self, camera_manager, profiles: Optional[Dict[str, dict]] = None, encoder=None):
+        self.camera_manager = camera_manager
+        self.profiles = profiles or OptimizedSettings.STREAM_PROFILES
+        self.encoder = encoder or get_jpeg_encoder(OptimizedSettings.JPEG_ENCODER)
+        self.cache: Dict[str, EncodedFrame] = {}
+        self.locks = {name: threading.Lock() for name in self.profiles}
+
+        # Statistiques
+        self.encodes = 0
+        self.passthrough_frames = 0
+        self.cache_hits = 0
+        self.encode_time = 0.0
+
+    def resolve_profile(self, name: Optional[str]) -> str:
+        """Nom de profil valide (profil par défaut si inconnu)"""
+        if name in self.profiles:
+            return name
+        return OptimizedSettings.DEFAULT_STREAM_PROFILE
+
+    def get_encoded(self, profile: Optional[str] = None) -> Optional[EncodedFrame]:
+        """Obtenir la frame courante encodée pour un profil"""
+        profile = self.resolve_profile(profile)
+
+        context = self.camera_manager.get_frame_context()
+        if context is None:
+            return None
+        seq = context.seq
+        cached = self.cache.get(profile)
+        if cached is not None and cached.seq == seq:
+            self.cache_hits += 1
+            return cached
+
+        with self.locks[profile]:
+            # Un autre client a pu encoder pendant l'attente du verrou
+            cached = self.cache.get(profile)
+            if cached is not None and cached.seq == seq:
+                self.cache_hits += 1
+                return cached
+
+            config = self.profiles[profile]
+            if (context.jpeg is not None and context.width <= config['width']
+                    and config.get('passthrough', True)):
+                # JPEG de la caméra relayé tel quel
+                encoded = EncodedFrame(seq, context.jpeg, multipart_chunk(context.jpeg), profile)
+                self.cache[profile] = encoded
+                self.passthrough_frames += 1
+                return encoded
+
+            frame, _ = context.scaled(config['width'])
+            start = time.perf_counter()
+            jpeg = self.encoder.encode(
+                frame,
+                quality=config.get('quality', 75),
+                subsampling=config.get('subsampling', OptimizedSettings.JPEG_SUBSAMPLING),
+                optimize=config.get('optimize', False),
+                progressive=config.get('progressive', False)
+            )
+            elapsed = time.perf_counter() - start
+            self.encode_time += elapsed
+            metrics.observe('encode', elapsed)
+            if not jpeg:
+                return None
+
+            encoded = EncodedFrame(seq, jpeg, multipart_chunk(jpeg), profile)
+            self.cache[profile] = encoded
+            self.encodes += 1
+            return encoded
+
+    def get_stats(self) -> dict:
+        """Statistiques d'encodage"""
+        return {
+            'encoder': self.encoder.name,
+            'encodes': self.encodes,
+            'passthrough_frames': self.passthrough_frames,
+            'cache_hits': self.cache_hits,
+            'avg_encode_ms': round(self.encode_time / self.encodes * 1000, 2) if self.encodes else 0,
+            'profiles': {name: {'width': config['width'], 'quality': config.get('quality')}
+                         for name, config in self.profiles.items()}
+        }
@@ -0,0 +1,109 @@
+import cv2
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from core.detector_backends import Detection
+from core.frame_context import as_context
+
+
+def tile_grid(width: int, height: int, tile: int, overlap: float) -> List[Tuple[int, int, int, int]]:
+    """Tuiles (x, y, w, h) qui se chevauchent et couvrent toute la frame"""
+    step = max(1, int(tile * (1 - overlap)))
+
+    def starts(size):
+        if size <= tile:
+            return [0]
+        positions = list(range(0, size - tile + 1, step))
+        if positions[-1] + tile < size:
+            positions.append(size - tile)
+        return positions
+
+    return [(x, y, min(tile, width - x), min(tile, height - y))
+            for y in starts(height) for x in starts(width)]
+
+
+def non_max_suppression(detections: List[Detection], iou_threshold: float) -> List[Detection]:
+    """Fusionner les doublons des zones de chevauchement (NMS OpenCV)"""
+    if len(detections) < 2:
+        return detections
+    boxes = [list(d.box) for d in detections]
+    scores = [float(d.confidence) for d in detections]
+    keep = cv2.dnn.NMSBoxes(boxes, scores, 0.0, iou_threshold)
+    return [detections[i] for i in np.array(keep).flatten()]
+
+
+class TiledDetector:
+    """Détection en tuiles sur une frame haute résolution (mode grand amphi)
+
+    La frame est découpée en tuiles de `tile_size` pixels qui se
+    chevauchent de `overlap` ; chaque tuile est analysée à pleine
+    résolution dans un pool de threads (OpenCV relâche le GIL), puis les
+    détections sont ramenées en coordonnées de la frame et fusionnées par
+    NMS. Chaque thread a sa propre instance de backend (YuNet/DNN ne sont
+    pas réentrants).
+    """
+
+    def __init__(self, backend_factory: Callable, tile_size: int = 640, overlap: float = 0.2,
+                 workers: Optional[int] = None, iou_threshold: float = 0.4):
+        self.backend_factory = backend_factory
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.iou_threshold = iou_threshold
+        self.workers = workers or os.cpu_count() or 1
+
+        self.local = threading.local()
+        self.main_backend = backend_factory()
+        self.name = f"tiled-{self.main_backend.name}"
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="TileDetect")
+
+        # Statistiques
+        self.frames = 0
+        self.tiles = 0
+
+    def _backend(self):
+        backend = getattr(self.local, 'backend', None)
+        if backend is None:
+            backend = self.local.backend = self.backend_factory()
+        return backend
+
+    def _detect_tile(self, frame: np.ndarray, tile) -> List[Detection]:
+        x, y, w, h = tile
+        found = self._backend().detect(frame[y:y + h, x:x + w], self.tile_size)
+        return [Detection((bx + x, by + y, bw, bh), confidence,
+                          tuple((px + x, py + y) for px, py in landmarks) if landmarks else None)
+                for (bx, by, bw, bh), confidence, landmarks in found]
+
+    def detect(self, frame, target_width: Optional[int] = None) -> List[Detection]:
+        """Détecter sur toute la frame ; `target_width` est ignoré (pleine résolution)"""
+        context = as_context(frame)
+        frame = context.frame
+        h, w = context.height, context.width
+        if w <= self.tile_size * 1.25 and h <= self.tile_size * 1.25:
+            # Frame déjà petite : une seule passe
+            return self.main_backend.detect(context, self.tile_size)
+
+        tiles = tile_grid(w, h, self.tile_size, self.overlap)
+        self.frames += 1
+        self.tiles += len(tiles)
+
+        detections = []
+        for found in self.pool.map(lambda tile: self._detect_tile(frame, tile), tiles):
+            detections.extend(found)
+        return non_max_suppression(detections, self.iou_threshold)
+
+    def get_stats(self) -> dict:
+        return {
+            'backend': self.main_backend.name,
+            'tile_size': self.tile_size,
+            'overlap': self.overlap,
+            'workers': self.workers,
+            'frames': self.frames,
+            'avg_tiles': round(self.tiles / self.frames, 1) if self.frames else 0
+        }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
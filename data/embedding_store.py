@@ -0,0 +1,181 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def image_stamp(path) -> Tuple[int, int]:
+    """(mtime_ns, taille) : une image modifiée doit être revectorisée"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def scan_dataset(dataset_path: Optional[Path] = None) -> Dict[str, Tuple[str, Tuple[int, int]]]:
+    """Images du dataset : {"etudiant/image.jpg": (etudiant, empreinte)}"""
+    dataset_path = Path(dataset_path or settings.DATASET_PATH)
+    images = {}
+    if not dataset_path.exists():
+        return images
+    with os.scandir(dataset_path) as students:
+        for student in students:
+            if not student.is_dir() or student.name.startswith('.'):
+                continue
+            with os.scandir(student.path) as files:
+                for entry in files:
+                    if entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        stat = entry.stat()
+                        images[f"{student.name}/{entry.name}"] = (student.name, (stat.st_mtime_ns, stat.st_size))
+    return images
+
+
+class EmbeddingStore:
+    """Vecteurs des images du dataset pour un modèle de reconnaissance
+
+    Une entrée par image ("etudiant/image.jpg") avec son empreinte
+    (mtime, taille) ; le fichier .npz est réécrit de façon atomique,
+    relu ou fusionné si un autre processus (import en masse) l'a
+    modifié. matrix() renvoie la matrice des vecteurs normalisés,
+    recalculée seulement après une modification (`version`).
+    Les entrées « en cours d'import » (hold) ont leur vecteur avant que
+    leur image n'arrive dans le dataset : diff() ne les supprime pas.
+    """
+
+    def __init__(self, model_name: str, path: Optional[Path] = None):
+        self.model_name = model_name
+        self.path = Path(path or settings.EMBEDDINGS_PATH / f"{model_name}.npz")
+        self.lock = threading.RLock()
+        self.entries: Dict[str, Tuple[str, Tuple[int, int], np.ndarray]] = {}
+        self.version = 0
+        self.dirty = False
+        self.pending = set()
+        self._loaded_mtime = None
+        self._matrix = None
+        self._matrix_version = -1
+        self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def _read(self) -> Dict[str, Tuple[str, Tuple[int, int], np.ndarray]]:
+        entries = {}
+        with np.load(self.path, allow_pickle=False) as data:
+            for key, name, stamp, vector in zip(data['keys'], data['names'], data['stamps'], data['vectors']):
+                entries[str(key)] = (str(name), (int(stamp[0]), int(stamp[1])), vector)
+        return entries
+
+    def load(self):
+        """Charger le fichier (les entrées non sauvegardées sont perdues)"""
+        with self.lock:
+            self.entries = {}
+            if self.path.exists():
+                try:
+                    self._loaded_mtime = self.path.stat().st_mtime_ns
+                    self.entries = self._read()
+                except Exception as e:
+                    log.error("Vecteurs illisibles (%s), recalcul complet: %s", self.path, e)
+            self.version += 1
+            self.dirty = False
+
+    def reload_if_changed(self) -> bool:
+        """Relire le fichier s'il a été réécrit par un autre processus"""
+        with self.lock:
+            if self.dirty or not self.path.exists():
+                return False
+            if self.path.stat().st_mtime_ns == self._loaded_mtime:
+                return False
+            self.load()
+            return True
+
+    def save(self):
+        """Écriture atomique (fichier temporaire puis remplacement)"""
+        with self.lock:
+            if not self.dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_mtime_ns != self._loaded_mtime:
+                # Réécrit entre-temps par un autre processus : garder ses entrées
+                # (les images supprimées depuis disparaissent au prochain diff)
+                try:
+                    for key, entry in self._read().items():
+                        self.entries.setdefault(key, entry)
+                    self.version += 1
+                except Exception as e:
+                    log.error("Fusion des vecteurs impossible (%s): %s", self.path, e)
+            keys = list(self.entries)
+            dimension = len(self.entries[keys[0]][2]) if keys else 0
+            temporary = self.path.with_name(self.path.stem + '.tmp.npz')
+            np.savez(
+                temporary,
+                keys=np.array(keys, dtype=str),
+                names=np.array([self.entries[key][0] for key in keys], dtype=str),
+                stamps=np.array([self.entries[key][1] for key in keys], dtype=np.int64).reshape(-1, 2),
+                vectors=np.array([self.entries[key][2] for key in keys], dtype=np.float32).reshape(-1, dimension)
+            )
+            os.replace(temporary, self.path)
+            self._loaded_mtime = self.path.stat().st_mtime_ns
+            self.dirty = False
+
+    def add(self, key: str, name: str, stamp: Tuple[int, int], vector: np.ndarray):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        with self.lock:
+            self.entries[key] = (name, tuple(stamp), vector / norm if norm else vector)
+            self.version += 1
+            self.dirty = True
+
+    def remove(self, key: str):
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self.version += 1
+                self.dirty = True
+
+    def remove_student(self, name: str):
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if entry[0] == name]:
+                del self.entries[key]
+            self.version += 1
+            self.dirty = True
+
+    def hold(self, keys):
+        """Protéger des entrées dont l'image n'est pas encore dans le dataset"""
+        with self.lock:
+            self.pending.update(keys)
+
+    def release(self, keys):
+        with self.lock:
+            self.pending.difference_update(keys)
+
+    def stamp(self, key: str) -> Optional[Tuple[int, int]]:
+        entry = self.entries.get(key)
+        return entry[1] if entry else None
+
+    def diff(self, images: Dict[str, Tuple[str, Tuple[int, int]]]) -> Tuple[List[str], List[str]]:
+        """(images à vectoriser, entrées à supprimer) par rapport à scan_dataset()"""
+        with self.lock:
+            missing = [key for key, (_, stamp) in images.items() if self.stamp(key) != stamp]
+            removed = [key for key in self.entries if key not in images and key not in self.pending]
+        return missing, removed
+
+    def matrix(self) -> Tuple[List[str], np.ndarray, int]:
+        """(noms, vecteurs normalisés N x D, version) dans un ordre stable"""
+        with self.lock:
+            if self._matrix_version != self.version:
+                keys = sorted(self.entries)
+                names = [self.entries[key][0] for key in keys]
+                vectors = (np.stack([self.entries[key][2] for key in keys])
+                           if keys else np.zeros((0, 0), dtype=np.float32))
+                self._matrix = (names, vectors, self.version)
+                self._matrix_version = self.version
+            return self._matrix
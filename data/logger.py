@@ -6,6 +6,10 @@ from datetime import datetime
 from typing import Dict, Any, List
 from config.settings import settings
 from data.models import AttendanceRecord, AttentionRecord, EmotionRecord, AccessRecord
+from utils.metrics import metrics
+from utils.log_config import setup_logging
+
+log = logging.getLogger(__name__)
 
 class SmartClassroomLogger:
     """Système de logs centralisé"""
@@ -14,15 +18,8 @@ class SmartClassroomLogger:
         self.logs_dir = settings.LOGS_PATH
         self.logs_dir.mkdir(exist_ok=True)
         
-        # Configuration du logging système
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(self.logs_dir / 'system.log'),
-                logging.StreamHandler()
-            ]
-        )
+        # Configuration du logging système (file non bloquante, niveaux par module)
+        setup_logging(self.logs_dir)
         self.logger = logging.getLogger('SmartClassroom')
         
         # Fichiers CSV pour les différents types de données
@@ -53,7 +50,7 @@ class SmartClassroomLogger:
             'course': record.course,
             'classroom': record.classroom
         })
-        self.logger.info(f"Présence: {record.student_name} - {record.course}")
+        self.logger.info("Présence: %s - %s", record.student_name, record.course)
     
     def log_attention(self, record: AttentionRecord):
         """Enregistrer une mesure d'attention - VERSION CORRIGÉE"""
@@ -65,9 +62,9 @@ class SmartClassroomLogger:
                 'std_x': f"{record.std_x:.2f}",
                 'std_y': f"{record.std_y:.2f}"
             })
-            print(f"📝 Log attention écrit: {record.student_name} - {record.status.value}")
+            log.debug("Log attention écrit: %s - %s", record.student_name, record.status.value)
         except Exception as e:
-            print(f"❌ Erreur écriture log attention: {e}")
+            log.error("Erreur écriture log attention: %s", e)
     
     def log_emotion(self, record: EmotionRecord):
         """Enregistrer une émotion - VERSION CORRIGÉE"""
@@ -78,9 +75,9 @@ class SmartClassroomLogger:
                 'emotion': record.emotion.value,
                 'confidence': f"{record.confidence:.2f}"
             })
-            print(f"📝 Log émotion écrit: {record.student_name} - {record.emotion.value}")
+            log.debug("Log émotion écrit: %s - %s", record.student_name, record.emotion.value)
         except Exception as e:
-            print(f"❌ Erreur écriture log émotion: {e}")
+            log.error("Erreur écriture log émotion: %s", e)
     
     def log_access(self, record: AccessRecord):
         """Enregistrer un accès"""
@@ -90,15 +87,17 @@ class SmartClassroomLogger:
             'action': record.action,
             'reason': record.reason
         })
-        self.logger.info(f"Accès: {record.action} - {record.student_name}")
+        self.logger.info("Accès: %s - %s", record.action, record.student_name)
     
     def _write_csv(self, filename: str, data: Dict[str, Any]):
         """Écrire dans un fichier CSV"""
         file_path = self.logs_dir / filename
-        with open(file_path, 'a', newline='', encoding='utf-8') as f:
-            fieldnames = list(data.keys())
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writerow(data)
+        with metrics.timer('log'):
+            with open(file_path, 'a', newline='', encoding='utf-8') as f:
+                fieldnames = list(data.keys())
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writerow(data)
+        metrics.inc('log_writes')
     
     def get_recent_logs(self, log_type: str, limit: int = 50) -> List[Dict]:
         """Récupérer les logs récents"""
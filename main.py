@@ -1,30 +1,44 @@
 
 
 import cv2
+import functools
+import logging
 import threading
 import time
 import queue
+from concurrent.futures import TimeoutError as FutureTimeout
 from datetime import datetime
 from config.settings import settings
 from data.logger import SmartClassroomLogger
 from data.models import AttendanceRecord, AttentionRecord, EmotionRecord
-from core.camera_manager import OptimizedCameraManager as CameraManager
+from core.camera_pipeline import create_camera_pipelines, door_camera_name
 from core.face_detector import FaceDetector
-from core.face_recognizer import FaceRecognizer
+from core.frame_context import as_context
+from core.recognition_backends import create_face_recognizer
 from core.attention_tracker import SimplifiedAttentionTracker
 from core.emotion_analyzer import SimplifiedEmotionAnalyzer
 from core.door_controller import DoorController
-from utils.helpers import ScheduleManager, ImageProcessor
+from core.inference_scheduler import InferenceScheduler
+from core.recognition_scheduler import LANE_CLASSROOM, LANE_DOOR, RecognitionScheduler
+from core.serial_discovery import discover_door_port
+from utils.helpers import ScheduleManager
+from utils.metrics import metrics
+
+log = logging.getLogger("main")
 
 class SmartClassroomSystemFixed:
     """Système principal Smart Classroom DEBUG"""
     
-    def __init__(self):
+    def __init__(self, frame_source=None):
         # Initialisation des composants
         self.logger = SmartClassroomLogger()
-        self.camera_manager = CameraManager()
+        # frame_source : None = settings.CAMERA_SOURCE (caméra, vidéo, dossier)
+        # Caméras nommées : principale + settings.CAMERAS, modèles partagés
+        self.cameras = create_camera_pipelines(frame_source)
+        self.camera_manager = self.cameras[settings.MAIN_CAMERA].camera_manager
+        self.stream_encoder = self.cameras[settings.MAIN_CAMERA].stream_encoder
         self.face_detector = FaceDetector()
-        self.face_recognizer = FaceRecognizer()
+        self.face_recognizer = create_face_recognizer()  # settings.RECOGNITION_BACKEND
         self.attention_tracker = SimplifiedAttentionTracker(self.logger)
         self.emotion_analyzer = SimplifiedEmotionAnalyzer(self.logger)
         self.door_controller = DoorController(self.logger)
@@ -33,8 +47,16 @@ class SmartClassroomSystemFixed:
         # État du système
         self.is_running = False
         self.recognized_students = set()
+        # Présences écrites : (nom, date, début du créneau de l'étudiant ou None)
+        self.attendance_logged = set()
         self.frame_count = 0
         
+        # Créneau en cours dans la salle surveillée (index inverse de l'EDT)
+        self.current_slot = None
+        self.slot_present = set()
+        self.last_absentee_report = None
+        self.last_slot_check = 0
+        
         # Files d'attente très petites
         self.face_recognition_queue = queue.Queue(maxsize=1)
         self.emotion_analysis_queue = queue.Queue(maxsize=1)
@@ -43,12 +65,32 @@ class SmartClassroomSystemFixed:
         # Statistiques
         self.successful_recognitions = 0
         self.failed_recognitions = 0
+        self.recognitions_skipped = 0      # Visages ignorés : reconnaissance déjà en cours
+        self.recognition_queue_full = 0    # Visages rejetés : file pleine
+        self.emotions_replaced = 0         # Analyses d'émotion remplacées avant traitement
         self.last_diagnostic_time = time.time()
         
+        # Présences uniques du jour (en mémoire, voir get_unique_attendance_today)
+        self.attendance_day = None
+        self.attendance_today = set()
+        
         # Threads de traitement asynchrone
         self.recognition_thread = None
         self.emotion_thread = None
         
+        # Détection partagée entre caméras, servies à tour de rôle
+        self.inference_scheduler = InferenceScheduler(self._run_inference, settings.INFERENCE_WORKERS)
+        for name in self.cameras:
+            self.inference_scheduler.register(name)
+        
+        # Accès unique au modèle de reconnaissance, la porte passe en priorité ;
+        # méthode résolue à chaque appel (chronométrage des benchmarks)
+        self.recognition_scheduler = RecognitionScheduler(lambda img: self.face_recognizer.recognize_face(img),
+                                                          settings.DOOR_RECOGNITION_SLO_MS)
+        
+        # Publication WebSocket vers les dashboards (branchée par l'API)
+        self.dashboard_publisher = None
+        
         # DEBUG: Variables pour détecter les blocages
         self.recognition_in_progress = False
         self.recognition_start_time = 0
@@ -57,7 +99,7 @@ class SmartClassroomSystemFixed:
         # Configuration
         settings.create_directories()
         
-        print(" Smart Classroom System DEBUG initialisé")
+        log.info("Smart Classroom System DEBUG initialisé")
     
     def setup_api_connection(self):
         """Connecter l'API au système principal"""
@@ -70,63 +112,82 @@ class SmartClassroomSystemFixed:
             routes.attention_tracker = self.attention_tracker
             routes.emotion_analyzer = self.emotion_analyzer
             routes.door_controller = self.door_controller
-            print(" API connectée au système principal")
+            routes.stream_encoder = self.stream_encoder
+            routes.cameras = self.cameras
+            
+            self.dashboard_publisher = routes.dashboard_publisher
+            self.dashboard_publisher.camera_stats_source = lambda: {
+                'fps': round(self.camera_manager.fps, 1),
+                'active': self.camera_manager.is_active
+            }
+            self.dashboard_publisher.start()
+            log.info("API connectée au système principal")
         except Exception as e:
-            print(f" Erreur connexion API: {e}")
+            log.error("Erreur connexion API: %s", e)
     
-    def start(self):
-        """Démarrer le système"""
-        print("🎓 Démarrage Smart Classroom System DEBUG...")
+    def start(self, connect_door=True, connect_api=True):
+        """Démarrer le système
+        
+        connect_door / connect_api : désactivables pour les benchmarks
+        (pas de sondage des ports série ni de serveur web).
+        """
+        log.info("Démarrage Smart Classroom System DEBUG...")
         
         if not self.camera_manager.start():
-            print("Erreur: Impossible de démarrer la caméra")
+            log.error("Erreur: Impossible de démarrer la caméra")
             return False
         
-        # Forcer le port COM7 pour Arduino
-        try:
-            # Changer temporairement le port pour configuration
-            original_port = settings.SERIAL_PORT
-            settings.SERIAL_PORT = "COM7"  
-            
-            if self.door_controller.connect():
-                print(f" Contrôleur de porte connecté sur {settings.SERIAL_PORT}")
-                
-                # TEST IMMÉDIAT de la porte
-                print(" Test de la porte...")
-                if self.door_controller.open_door("TEST_USER", "system_startup"):
-                    print(" Test porte réussi - Servo et LED OK")
-                else:
-                    print(" Test porte échoué")
-            else:
-                print(f" Contrôleur de porte non connecté sur {settings.SERIAL_PORT}")
-                # Essayer d'autres ports
-                for port in ["COM3", "COM4", "COM5", "COM6", "COM8"]:
-                    print(f"🔍 Essai port {port}...")
-                    settings.SERIAL_PORT = port
-                    if self.door_controller.connect():
-                        print(f" Porte trouvée sur {port}")
-                        break
-                else:
-                    print(" Aucun port série trouvé pour la porte")
-                    
-        except Exception as e:
-            print(f" Erreur contrôleur de porte: {e}")
+        # Caméras supplémentaires : une absente n'empêche pas le démarrage
+        for name, pipeline in self.cameras.items():
+            if name != settings.MAIN_CAMERA and not pipeline.start():
+                log.warning("Caméra %s indisponible", name)
         
-        print(" Calibration du système d'attention...")
+        # Découverte du port de la porte en arrière-plan : un Arduino
+        # absent ne retarde plus le démarrage
+        if connect_door:
+            threading.Thread(target=self._connect_door_controller, daemon=True, name="DoorDiscovery").start()
+        
+        # Vecteurs du dataset calculés en arrière-plan, hors de la file de reconnaissance
+        self.face_recognizer.start_sync()
+        
+        log.info("Calibration du système d'attention...")
         self._calibrate_attention_system()
         
-        self.setup_api_connection()
+        if connect_api:
+            self.setup_api_connection()
         self._start_async_processing()
-        self.camera_manager.add_callback(self._process_frame_debug)
+        self.inference_scheduler.start()
+        for name, pipeline in self.cameras.items():
+            pipeline.camera_manager.add_callback(functools.partial(self._process_frame_debug, camera=name))
         
         self.is_running = True
-        print(" Système DEBUG démarré!")
+        log.info("Système DEBUG démarré!")
         
         return True
     
+    def _connect_door_controller(self):
+        """Trouver l'Arduino de la porte (sondage parallèle) et s'y connecter"""
+        try:
+            port = discover_door_port(preferred=settings.SERIAL_PORT)
+            if port and self.door_controller.connect(port):
+                settings.SERIAL_PORT = port
+                log.info("Contrôleur de porte connecté sur %s", port)
+                
+                # Test de la porte, envoyé dès la fin du boot de l'Arduino
+                log.info("Test de la porte...")
+                if self.door_controller.open_door("TEST_USER", "system_startup"):
+                    log.info("Test porte en file - Servo et LED")
+                else:
+                    log.warning("Test porte échoué")
+            else:
+                log.warning("Aucun port série trouvé pour la porte")
+        except Exception as e:
+            log.error("Erreur contrôleur de porte: %s", e)
+    
     def _start_async_processing(self):
         """Démarrer les threads de traitement asynchrone"""
         self.processing_active = True
+        self.recognition_scheduler.start()
         
         self.recognition_thread = threading.Thread(
             target=self._debug_recognition_worker, 
@@ -142,11 +203,11 @@ class SmartClassroomSystemFixed:
         )
         self.emotion_thread.start()
         
-        print("🔄 Threads de traitement DEBUG démarrés")
+        log.info("Threads de traitement DEBUG démarrés")
     
     def _debug_recognition_worker(self):
         """Worker de reconnaissance DEBUG avec timeout forcé"""
-        print("🐛 Worker reconnaissance DEBUG démarré")
+        log.info("Worker reconnaissance DEBUG démarré")
         
         while self.processing_active:
             try:
@@ -155,56 +216,47 @@ class SmartClassroomSystemFixed:
                 if face_data is None:
                     break
                 
-                face_img, face_box, frame_id = face_data
+                context, face_box, frame_id, camera = face_data
+                face_img = context.crop(face_box)
                 
-                print(f"🐛 DEBUG: Début reconnaissance (queue: {self.face_recognition_queue.qsize()})")
+                log.debug("Début reconnaissance (queue: %s)", self.face_recognition_queue.qsize())
                 
                 self.recognition_in_progress = True
                 self.recognition_start_time = time.time()
                 
                 try:
-                    result_queue = queue.Queue()
-                    
-                    def recognition_task():
-                        try:
-                            print(" DEBUG: Appel face_recognizer.recognize_face...")
-                            name, confidence = self.face_recognizer.recognize_face(face_img)
-                            result_queue.put(('success', name, confidence))
-                            print(f" DEBUG: Reconnaissance terminée: {name} ({confidence})")
-                        except Exception as e:
-                            print(f" DEBUG: Erreur reconnaissance: {e}")
-                            result_queue.put(('error', str(e), 0))
-                    
-                    recognition_thread = threading.Thread(target=recognition_task)
-                    recognition_thread.daemon = True
-                    recognition_thread.start()
+                    # Voie salle : les demandes de la porte passent devant
+                    future = self.recognition_scheduler.submit(face_img, LANE_CLASSROOM)
                     
                     try:
-                        result = result_queue.get(timeout=3.0)
-                        status, name, confidence = result
+                        name, confidence = future.result(timeout=3.0)
                         
-                        print(f" DEBUG: Résultat reçu: {status}, {name}, {confidence}")
+                        log.debug("Résultat reçu: %s, %s", name, confidence)
                         
-                        if status == 'success' and name not in ["Inconnu", "Erreur", "Base_vide"]:
+                        if name not in ["Inconnu", "Erreur", "Base_vide"]:
                             self.successful_recognitions += 1
-                            print(f" DEBUG RECONNAISSANCE RÉUSSIE: {name} ({confidence:.1f}%)")
-                            self._force_handle_result(name, confidence, face_img)
+                            metrics.inc('recognitions_success')
+                            log.info("RECONNAISSANCE RÉUSSIE: %s (%.1f%%, caméra %s)", name, confidence, camera)
+                            self._force_handle_result(name, confidence, context, face_box)
                         else:
                             self.failed_recognitions += 1
-                            print(f" DEBUG reconnaissance échouée: {name}")
+                            metrics.inc('recognitions_failed')
+                            log.debug("Reconnaissance échouée: %s", name)
                             
-                    except queue.Empty:
-                        print(" DEBUG TIMEOUT reconnaissance - ABANDON FORCÉ")
+                    except FutureTimeout:
+                        future.cancel()  # Pas exécutée si encore en file
+                        log.warning("TIMEOUT reconnaissance - ABANDON FORCÉ")
                         self.failed_recognitions += 1
+                        metrics.inc('recognition_timeouts')
                     
                 except Exception as e:
-                    print(f" DEBUG Erreur worker: {e}")
+                    log.error("Erreur worker: %s", e)
                     self.failed_recognitions += 1
                 
                 finally:
                     self.recognition_in_progress = False
                     self.recognition_start_time = 0
-                    print("🐛 DEBUG: reconnaissance_in_progress = False")
+                    log.debug("recognition_in_progress = False")
                 
                 self.face_recognition_queue.task_done()
                 
@@ -212,7 +264,7 @@ class SmartClassroomSystemFixed:
                 if self.recognition_in_progress:
                     elapsed = time.time() - self.recognition_start_time
                     if elapsed > self.max_recognition_time:
-                        print(f"🚨 DEBUG: RECONNAISSANCE BLOQUÉE ({elapsed:.1f}s) - DÉBLOCAGE FORCÉ")
+                        log.warning("RECONNAISSANCE BLOQUÉE (%.1fs) - DÉBLOCAGE FORCÉ", elapsed)
                         self.recognition_in_progress = False
                         self.recognition_start_time = 0
                         self.failed_recognitions += 1
@@ -220,15 +272,15 @@ class SmartClassroomSystemFixed:
                 time.sleep(0.05)
                 continue
             except Exception as e:
-                print(f" DEBUG Erreur worker: {e}")
+                log.error("Erreur worker: %s", e)
                 self.recognition_in_progress = False
                 time.sleep(0.1)
         
-        print(" Worker reconnaissance DEBUG arrêté")
+        log.info("Worker reconnaissance DEBUG arrêté")
     
     def _debug_emotion_worker(self):
         """Worker émotion DEBUG"""
-        print(" Worker émotion DEBUG démarré")
+        log.info("Worker émotion DEBUG démarré")
         
         while self.processing_active:
             try:
@@ -237,55 +289,92 @@ class SmartClassroomSystemFixed:
                 if emotion_data is None:
                     break
                 
-                face_img, student_name, frame_id = emotion_data
+                context, face_box, student_name, frame_id = emotion_data
                 
-                print(f" DEBUG: Analyse émotion pour {student_name}")
+                log.debug("Analyse émotion pour %s", student_name)
                 
                 try:
-                    emotion_record = self.emotion_analyzer.analyze_emotion(face_img, student_name)
+                    with metrics.timer('emotion'):
+                        # Visage en gris déjà découpé/redimensionné par le contexte
+                        emotion_record = self.emotion_analyzer.analyze_emotion(
+                            context.crop_gray(face_box), student_name)
                     if emotion_record:
                         self.logger.log_emotion(emotion_record)
-                        print(f" DEBUG ÉMOTION: {student_name} - {emotion_record.emotion.value} ({emotion_record.confidence:.1f}%)")
-                        print(f" DEBUG: Log émotion écrit pour {student_name}")
+                        self._publish('emotion', {
+                            'student': student_name,
+                            'emotion': emotion_record.emotion.value,
+                            'confidence': round(emotion_record.confidence, 1)
+                        }, key=student_name)
+                        log.info("ÉMOTION: %s - %s (%.1f%%)", student_name,
+                                 emotion_record.emotion.value, emotion_record.confidence)
+                        log.debug("Log émotion écrit pour %s", student_name)
                     else:
-                        print(f" DEBUG: Aucune émotion retournée pour {student_name}")
+                        log.debug("Aucune émotion retournée pour %s", student_name)
                         
                 except Exception as e:
-                    print(f" DEBUG Erreur émotion: {e}")
+                    metrics.inc('errors')
+                    log.error("Erreur émotion: %s", e)
                 
                 self.emotion_analysis_queue.task_done()
                 
             except queue.Empty:
                 continue
             except Exception as e:
-                print(f" DEBUG Erreur worker émotion: {e}")
+                log.error("Erreur worker émotion: %s", e)
                 time.sleep(0.1)
         
-        print(" Worker émotion DEBUG arrêté")
+        log.info("Worker émotion DEBUG arrêté")
     
-    def _force_handle_result(self, name, confidence, face_img):
+    def _force_handle_result(self, name, confidence, context, face_box):
         """FORCER le traitement du résultat"""
         try:
-            print(f" DEBUG: Traitement forcé pour {name}")
+            log.debug("Traitement forcé pour %s", name)
+            
+            slot = self.current_slot
+            if slot and name.lower() in slot['roster']:
+                self.slot_present.add(name)
+            
+            self.recognized_students.add(name)
             
-            if name not in self.recognized_students:
-                print(f" DEBUG: Ajout {name} à recognized_students")
-                self.recognized_students.add(name)
+            # Cours et salle résolus à chaque reconnaissance par l'index de
+            # l'EDT : une présence par créneau de l'étudiant (une seule hors cours)
+            now = datetime.now()
+            entry = self.schedule_manager.get_student_slot(name, at=now)
+            course, room = (entry[2], entry[3]) if entry else (None, None)
+            attendance_key = (name, now.date(), entry[0] if entry else None)
+            
+            if attendance_key not in self.attendance_logged:
+                if any(key[1] != now.date() for key in self.attendance_logged):
+                    self.attendance_logged = {key for key in self.attendance_logged if key[1] == now.date()}
+                self.attendance_logged.add(attendance_key)
+                
+                has_class = course is not None
+                if has_class and settings.CLASSROOM and room.strip().lower() != settings.CLASSROOM.strip().lower():
+                    log.debug("%s a cours en %s, pas en %s", name, room, settings.CLASSROOM)
+                    has_class = False
                 
                 attendance_record = AttendanceRecord(
                     student_name=name,
-                    timestamp=datetime.now(),
-                    has_class=True,
-                    course="DEBUG_Course",
-                    classroom="DEBUG_Room"
+                    timestamp=now,
+                    has_class=has_class,
+                    course=course,
+                    classroom=room
                 )
                 self.logger.log_attendance(attendance_record)
-                print(f"📝 DEBUG: NOUVELLE présence enregistrée pour {name}")
+                self._mark_present_today(name)
+                log.info("NOUVELLE présence enregistrée pour %s", name)
+                self._publish('attendance', {
+                    'student': name,
+                    'course': course,
+                    'classroom': room,
+                    'has_class': has_class,
+                    'attendance_today': self.get_unique_attendance_today()
+                }, key=name)
                 
                 
-                print(f" DEBUG: {name} ajouté avec succès (pas d'ouverture automatique)")
+                log.debug("%s ajouté avec succès (pas d'ouverture automatique)", name)
             else:
-                print(f" DEBUG: {name} déjà reconnu, pas de nouvelle présence enregistrée")
+                log.debug("%s déjà présent pour ce créneau, pas de nouvelle présence enregistrée", name)
             
             # Toujours ajouter l'émotion
             try:
@@ -293,21 +382,22 @@ class SmartClassroomSystemFixed:
                     try:
                         self.emotion_analysis_queue.get_nowait()
                         self.emotion_analysis_queue.task_done()
+                        self.emotions_replaced += 1
                     except queue.Empty:
                         break
                 
-                self.emotion_analysis_queue.put_nowait((face_img.copy(), name, time.time()))
-                print(f" DEBUG: Émotion forcée pour {name}")
+                self.emotion_analysis_queue.put_nowait((context, face_box, name, time.time()))
+                log.debug("Émotion forcée pour %s", name)
                 
             except Exception as e:
-                print(f" DEBUG Erreur ajout émotion: {e}")
+                log.error("Erreur ajout émotion: %s", e)
                 
         except Exception as e:
-            print(f" DEBUG Erreur traitement forcé: {e}")
+            log.error("Erreur traitement forcé: %s", e)
     
     def _calibrate_attention_system(self):
         """Calibrer le système de suivi d'attention"""
-        print(" DEBUG: Calibration attention...")
+        log.debug("Calibration attention...")
         
         frame = self.camera_manager.get_frame()
         if frame is not None:
@@ -317,40 +407,133 @@ class SmartClassroomSystemFixed:
             else:
                 self.attention_tracker.is_calibrated = True
         
-        print(" DEBUG: Attention calibrée")
+        log.info("Attention calibrée")
     
-    def _process_frame_debug(self, frame):
-        """Traiter chaque frame - VERSION DEBUG"""
+    def _process_frame_debug(self, context, camera=settings.MAIN_CAMERA):
+        """Traiter chaque frame - VERSION DEBUG
+        
+        `context` (FrameContext) porte la frame et ses vues dérivées,
+        partagées par la détection, la reconnaissance et les émotions.
+        Appelé dans le thread de capture de `camera` : l'analyse est
+        confiée à l'ordonnanceur d'inférence partagé.
+        """
         if not self.is_running:
             return
         
         try:
             self.frame_count += 1
+            pipeline = self.cameras[camera]
+            pipeline.frame_count += 1
             current_time = time.time()
             
             if current_time - self.last_diagnostic_time > 5.0:
-                self.print_diagnostic()
+                # Rien n'est calculé si le niveau DEBUG est désactivé
+                if log.isEnabledFor(logging.DEBUG):
+                    self.print_diagnostic()
                 self.last_diagnostic_time = current_time
             
-            if self.frame_count % 90 == 1:
-                faces = self.face_detector.detect_faces_optimized(frame)
-                
-                if faces:
-                    print(f" DEBUG: {len(faces)} visage(s) détecté(s)")
-                    self._force_attention_processing(frame, faces)
-                    
-                    if not self.recognition_in_progress and self.face_recognition_queue.empty():
-                        self._try_recognition(frame, faces)
-                    else:
-                        print(f" DEBUG: Skip reconnaissance (en_cours: {self.recognition_in_progress}, queue: {self.face_recognition_queue.qsize()})")
+            if current_time - self.last_slot_check > 1.0:
+                self._update_room_slot()
+                self.last_slot_check = current_time
+            
+            if pipeline.frame_count % 90 == 1:
+                self.inference_scheduler.submit(camera, context)
                         
         except Exception as e:
-            print(f" DEBUG Erreur frame: {e}")
+            metrics.inc('errors')
+            log.error("Erreur frame: %s", e)
+    
+    def _run_inference(self, camera, context):
+        """Détection, attention et reconnaissance d'une frame (worker d'inférence)"""
+        if not self.is_running:
+            return
+        
+        with metrics.timer('detect'):
+            faces = self.face_detector.detect_faces_optimized(context)
+        
+        if faces:
+            metrics.inc('faces_detected', len(faces))
+            log.debug("%s visage(s) détecté(s) (caméra %s)", len(faces), camera)
+            if self.cameras[camera].attention:
+                self._force_attention_processing(context.frame, faces)
+            
+            if not self.recognition_in_progress and self.face_recognition_queue.empty():
+                self._try_recognition(context, faces, camera)
+            else:
+                self.recognitions_skipped += 1
+                metrics.inc('recognitions_skipped')
+                log.debug("Skip reconnaissance (en_cours: %s, queue: %s)",
+                          self.recognition_in_progress, self.face_recognition_queue.qsize())
+    
+    def _publish(self, event_type, data, key=None, only_changes=False):
+        """Pousser un delta vers les dashboards abonnés"""
+        if self.dashboard_publisher:
+            self.dashboard_publisher.publish(event_type, data, key=key, only_changes=only_changes)
+    
+    def _update_room_slot(self):
+        """Suivre le créneau de la salle et signaler les absents à sa fin"""
+        if not settings.CLASSROOM:
+            return
+        
+        try:
+            slot = self.schedule_manager.get_current_slot(settings.CLASSROOM)
+            current = self.current_slot
+            
+            if current and (slot is None or slot['key'] != current['key']):
+                self._report_absentees(current)
+                self.current_slot = None
+            
+            if slot and self.current_slot is None:
+                self.current_slot = slot
+                # Les inscrits déjà reconnus aujourd'hui, en avance, comptent comme présents
+                today = datetime.now().date()
+                self.slot_present = {name for name, day, _ in self.attendance_logged
+                                     if day == today and name.lower() in slot['roster']}
+                log.info("Créneau %s (%s-%s) en %s: %s étudiant(s) attendu(s)",
+                         slot['course'], slot['start'], slot['end'], slot['room'], len(slot['roster']))
+        except Exception as e:
+            log.error("Erreur suivi créneau: %s", e)
+    
+    def _report_absentees(self, slot):
+        """Enregistrer le rapport d'absences d'un créneau terminé"""
+        absentees = self.schedule_manager.get_absentees(slot, self.slot_present)
+        self.last_absentee_report = {
+            'course': slot['course'],
+            'room': slot['room'],
+            'date': slot['date'],
+            'start': slot['start'],
+            'end': slot['end'],
+            'expected': sorted(slot['roster']),
+            'present': sorted(self.slot_present),
+            'absent': absentees
+        }
+        self.logger.logger.info(
+            "Fin de créneau %s %s-%s (%s): %s absent(s) %s",
+            slot['course'], slot['start'], slot['end'], slot['room'], len(absentees), absentees
+        )
+        self.slot_present = set()
+    
+    def get_slot_status(self):
+        """Obtenir le créneau en cours, les présents et les absents provisoires"""
+        slot = self.current_slot
+        status = {'classroom': settings.CLASSROOM, 'slot': None,
+                  'last_report': self.last_absentee_report}
+        if slot:
+            status['slot'] = {
+                'course': slot['course'],
+                'room': slot['room'],
+                'start': slot['start'],
+                'end': slot['end'],
+                'expected': sorted(slot['roster']),
+                'present': sorted(self.slot_present),
+                'missing': self.schedule_manager.get_absentees(slot, self.slot_present)
+            }
+        return status
     
     def _force_attention_processing(self, frame, faces):
         """FORCER le traitement de l'attention"""
         try:
-            print(" DEBUG: Traitement attention forcé")
+            log.debug("Traitement attention forcé")
             
             face_names = []
             for i, face in enumerate(faces):
@@ -359,23 +542,28 @@ class SmartClassroomSystemFixed:
                 else:
                     face_names.append(f"Face_{i}")
             
-            print(f" DEBUG: Appel attention_tracker.update_tracking avec {len(faces)} visages et noms: {face_names}")
+            log.debug("Appel attention_tracker.update_tracking avec %s visages et noms: %s", len(faces), face_names)
             
             try:
                 attention_records = self.attention_tracker.update_tracking(frame, faces, face_names)
-                print(f" DEBUG: attention_tracker retourné {len(attention_records)} records")
+                log.debug("attention_tracker a retourné %s records", len(attention_records))
                 
                 for record in attention_records:
-                    print(f" DEBUG: Traitement record attention pour {record.student_name}")
+                    log.debug("Traitement record attention pour %s", record.student_name)
                     self.logger.log_attention(record)
-                    print(f" DEBUG ATTENTION: {record.student_name} - {record.status.value}")
-                    print(f" DEBUG: Log attention écrit pour {record.student_name}")
+                    # Seuls les changements de statut sont poussés
+                    self._publish('attention', {
+                        'student': record.student_name,
+                        'status': record.status.value
+                    }, key=record.student_name, only_changes=True)
+                    log.debug("ATTENTION: %s - %s", record.student_name, record.status.value)
+                    log.debug("Log attention écrit pour %s", record.student_name)
                     
                 if len(attention_records) == 0:
-                    print(" DEBUG: Aucun record d'attention retourné par le tracker")
+                    log.debug("Aucun record d'attention retourné par le tracker")
                     
                     if len(face_names) > 0 and len(faces) > 0:
-                        print(" DEBUG: CRÉATION FORCÉE d'un record d'attention")
+                        log.debug("CRÉATION FORCÉE d'un record d'attention")
                         from data.models import AttentionRecord, AttentionStatus
                         from datetime import datetime
                         import random
@@ -389,44 +577,45 @@ class SmartClassroomSystemFixed:
                         )
                         
                         self.logger.log_attention(forced_record)
-                        print(f"📊 DEBUG ATTENTION FORCÉE: {forced_record.student_name} - {forced_record.status.value}")
-                        print(f"📝 DEBUG: Log attention forcé écrit pour {forced_record.student_name}")
+                        log.debug("ATTENTION FORCÉE: %s - %s", forced_record.student_name, forced_record.status.value)
+                        log.debug("Log attention forcé écrit pour %s", forced_record.student_name)
                     
             except Exception as attention_error:
-                print(f" DEBUG Erreur dans attention_tracker.update_tracking: {attention_error}")
-                import traceback
-                traceback.print_exc()
+                log.exception("Erreur dans attention_tracker.update_tracking: %s", attention_error)
                 
         except Exception as e:
-            print(f" DEBUG Erreur attention forcée: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Erreur attention forcée: %s", e)
     
-    def _try_recognition(self, frame, faces):
+    def _try_recognition(self, context, faces, camera=settings.MAIN_CAMERA):
         """Essayer la reconnaissance"""
         try:
-            largest_face = max(faces, key=lambda f: f[2] * f[3])
-            x, y, w, h = largest_face
-            face_img = frame[y:y+h, x:x+w]
-            face_img = ImageProcessor.resize_face(face_img)
+            with metrics.timer('crop'):
+                largest_face = tuple(int(v) for v in max(faces, key=lambda f: f[2] * f[3]))
+                context.crop(largest_face)  # Découpe mémoïsée, réutilisée par les workers
             
-            face_data = (face_img.copy(), (x, y, w, h), self.frame_count)
+            # Le contexte est immuable : pas de copie du visage
+            face_data = (context, largest_face, self.frame_count, camera)
             self.face_recognition_queue.put_nowait(face_data)
-            print(f"🐛 DEBUG: Visage ajouté pour reconnaissance")
+            log.debug("Visage ajouté pour reconnaissance")
             
         except queue.Full:
-            print(" DEBUG: File reconnaissance pleine")
+            self.recognition_queue_full += 1
+            metrics.inc('recognition_queue_full')
+            log.debug("File reconnaissance pleine")
         except Exception as e:
-            print(f" DEBUG Erreur ajout reconnaissance: {e}")
+            log.error("Erreur ajout reconnaissance: %s", e)
     
     def manual_recognition_and_door_test(self):
         """Fonction appelée par le bouton Test de l'interface web"""
         try:
-            print(" DEBUG: Test manuel déclenché depuis l'interface web")
+            log.info("Test manuel déclenché depuis l'interface web")
+            
+            # Caméra de la porte (settings.DOOR_CAMERA, défaut : principale)
+            camera_manager = self.cameras[door_camera_name(self.cameras)].camera_manager
             
             # Vérifier que la caméra est active
-            if not self.camera_manager.is_active:
-                print(" DEBUG: Caméra non active pour le test")
+            if not camera_manager.is_active:
+                log.warning("Caméra non active pour le test")
                 return {
                     'success': False, 
                     'message': 'Caméra non active',
@@ -434,9 +623,9 @@ class SmartClassroomSystemFixed:
                 }
             
             # Prendre une photo actuelle
-            frame = self.camera_manager.get_frame()
+            frame = camera_manager.get_frame()
             if frame is None:
-                print("❌ DEBUG: Aucune image disponible")
+                log.warning("Aucune image disponible")
                 return {
                     'success': False, 
                     'message': 'Aucune image disponible',
@@ -444,9 +633,10 @@ class SmartClassroomSystemFixed:
                 }
             
             # Détecter les visages
-            faces = self.face_detector.detect_faces_optimized(frame)
+            context = as_context(frame)
+            faces = self.face_detector.detect_faces_optimized(context)
             if not faces:
-                print("❌ DEBUG: Aucun visage détecté pour le test")
+                log.warning("Aucun visage détecté pour le test")
                 return {
                     'success': False, 
                     'message': 'Aucun visage détecté. Positionnez-vous face à la caméra.',
@@ -455,20 +645,23 @@ class SmartClassroomSystemFixed:
             
             # Prendre le plus grand visage
             largest_face = max(faces, key=lambda f: f[2] * f[3])
-            x, y, w, h = largest_face
-            face_img = frame[y:y+h, x:x+w]
-            face_img = ImageProcessor.resize_face(face_img)
+            face_img = context.crop(largest_face)
             
-            print(" DEBUG: Reconnaissance manuelle en cours...")
+            log.info("Reconnaissance manuelle en cours...")
             
-            # Reconnaissance IMMÉDIATE
+            # Reconnaissance IMMÉDIATE : voie prioritaire, devant l'analyse de salle
             try:
-                name, confidence = self.face_recognizer.recognize_face(face_img)
-                print(f" DEBUG: Résultat reconnaissance manuelle: {name} ({confidence:.1f}%)")
+                future = self.recognition_scheduler.submit(face_img, LANE_DOOR)
+                try:
+                    name, confidence = future.result(timeout=settings.DOOR_RECOGNITION_TIMEOUT)
+                except FutureTimeout:
+                    future.cancel()
+                    raise TimeoutError(f"aucun résultat en {settings.DOOR_RECOGNITION_TIMEOUT:.0f}s") from None
+                log.info("Résultat reconnaissance manuelle: %s (%.1f%%)", name, confidence)
                 
                 if name not in ["Inconnu", "Erreur", "Base_vide"]:
                     # PERSONNE RECONNUE
-                    print(f" DEBUG: {name} reconnu, ouverture de la porte")
+                    log.info("%s reconnu, ouverture de la porte", name)
                     
                     # Ouvrir la porte
                     door_success = False
@@ -476,13 +669,13 @@ class SmartClassroomSystemFixed:
                         try:
                             door_success = self.door_controller.open_door(name, "manual_test")
                             if door_success:
-                                print(f" DEBUG: Porte ouverte avec succès pour {name}")
+                                log.info("Porte ouverte avec succès pour %s", name)
                             else:
-                                print(f" DEBUG: Échec ouverture porte pour {name}")
+                                log.warning("Échec ouverture porte pour %s", name)
                         except Exception as door_error:
-                            print(f" DEBUG: Erreur ouverture porte: {door_error}")
+                            log.error("Erreur ouverture porte: %s", door_error)
                     else:
-                        print("⚠ DEBUG: Contrôleur de porte non connecté")
+                        log.warning("Contrôleur de porte non connecté")
                     
                     return {
                         'success': True,
@@ -495,15 +688,15 @@ class SmartClassroomSystemFixed:
                 
                 else:
                     # PERSONNE NON RECONNUE
-                    print(f" DEBUG: Personne non reconnue: {name}")
+                    log.info("Personne non reconnue: %s", name)
                     
                     # Envoyer une alerte à l'Arduino (LED rouge)
                     if self.door_controller.is_connected:
                         try:
                             self.door_controller.send_alert("unknown")
-                            print(" DEBUG: Alerte envoyée à l'Arduino (LED rouge)")
+                            log.info("Alerte envoyée à l'Arduino (LED rouge)")
                         except Exception as alert_error:
-                            print(f" DEBUG: Erreur envoi alerte: {alert_error}")
+                            log.error("Erreur envoi alerte: %s", alert_error)
                     
                     return {
                         'success': True,
@@ -515,7 +708,7 @@ class SmartClassroomSystemFixed:
                     }
                     
             except Exception as recognition_error:
-                print(f" DEBUG: Erreur reconnaissance manuelle: {recognition_error}")
+                log.error("Erreur reconnaissance manuelle: %s", recognition_error)
                 return {
                     'success': False,
                     'message': f'Erreur lors de la reconnaissance: {str(recognition_error)}',
@@ -523,7 +716,7 @@ class SmartClassroomSystemFixed:
                 }
                 
         except Exception as e:
-            print(f" DEBUG: Erreur test manuel: {e}")
+            log.error("Erreur test manuel: %s", e)
             return {
                 'success': False,
                 'message': f'Erreur système: {str(e)}',
@@ -531,53 +724,50 @@ class SmartClassroomSystemFixed:
             }
     
     def get_unique_attendance_today(self):
-        """Obtenir le nombre UNIQUE d'étudiants présents aujourd'hui"""
+        """Obtenir le nombre UNIQUE d'étudiants présents aujourd'hui
+        
+        Ensemble tenu en mémoire : le CSV n'est relu qu'au premier appel
+        de la journée (présences d'avant un redémarrage).
+        """
         try:
-            from datetime import datetime
             today = datetime.now().strftime('%Y-%m-%d')
-            
-            attendance_logs = self.logger.get_recent_logs('attendance', 1000)
-            
-            unique_students_today = set()
-            for log in attendance_logs:
-                if log.get('timestamp', '').startswith(today):
-                    student_name = log.get('student_name')
-                    if student_name:
-                        unique_students_today.add(student_name)
-            
-            print(f" DEBUG: Étudiants UNIQUES présents aujourd'hui: {len(unique_students_today)} - {list(unique_students_today)}")
-            return len(unique_students_today)
+            if self.attendance_day != today:
+                attendance_logs = self.logger.get_recent_logs('attendance', 1000)
+                self.attendance_today = {
+                    entry['student_name'] for entry in attendance_logs
+                    if entry.get('timestamp', '').startswith(today) and entry.get('student_name')
+                }
+                self.attendance_day = today
+            return len(self.attendance_today)
             
         except Exception as e:
-            print(f" DEBUG Erreur calcul présence unique: {e}")
+            log.error("Erreur calcul présence unique: %s", e)
             return len(self.recognized_students)
     
+    def _mark_present_today(self, name):
+        """Ajouter une présence à l'ensemble du jour"""
+        self.get_unique_attendance_today()
+        self.attendance_today.add(name)
+    
     def print_diagnostic(self):
-        """Diagnostic DEBUG"""
+        """Diagnostic DEBUG (niveau DEBUG du logger "main")"""
         status = self.get_queue_status()
-        unique_today = self.get_unique_attendance_today()
-        
-        print("\n" + "="*60)
-        print("🐛 DIAGNOSTIC DEBUG")
-        print("="*60)
-        print(f" File reconnaissance: {status['recognition_queue_size']}/1")
-        print(f" File émotions: {status['emotion_queue_size']}/1")
-        print(f" Reconnaissances réussies: {status['successful_recognitions']}")
-        print(f" Reconnaissances échouées: {status['failed_recognitions']}")
-        print(f" Étudiants reconnus: {list(self.recognized_students)}")
-        print(f" Étudiants UNIQUES aujourd'hui: {unique_today}")
-        print(f" Reconnaissance en cours: {'🟢 Oui' if status['recognition_in_progress'] else '🔴 Non'}")
-        print(f" Porte connectée: {'🟢 Oui' if self.door_controller.is_connected else '🔴 Non'}")
-        
-        if status['recognition_in_progress']:
-            elapsed = time.time() - self.recognition_start_time if self.recognition_start_time > 0 else 0
-            print(f"⏱ Temps reconnaissance: {elapsed:.1f}s")
-        
-        print("="*60 + "\n")
+        elapsed = 0
+        if status['recognition_in_progress'] and self.recognition_start_time > 0:
+            elapsed = time.time() - self.recognition_start_time
+        
+        log.debug(
+            "Diagnostic: file reconnaissance %s/1, file émotions %s/1, réussies %s, échouées %s, "
+            "reconnus %s, uniques aujourd'hui %s, reconnaissance en cours %s (%.1fs), porte connectée %s",
+            status['recognition_queue_size'], status['emotion_queue_size'],
+            status['successful_recognitions'], status['failed_recognitions'],
+            sorted(self.recognized_students), self.get_unique_attendance_today(),
+            status['recognition_in_progress'], elapsed, self.door_controller.is_connected
+        )
     
     def stop(self):
         """Arrêter le système"""
-        print(" DEBUG: Arrêt du système...")
+        log.info("Arrêt du système...")
         self.is_running = False
         self.processing_active = False
         
@@ -609,18 +799,32 @@ class SmartClassroomSystemFixed:
         if self.emotion_thread and self.emotion_thread.is_alive():
             self.emotion_thread.join(timeout=1.0)
         
-        self.camera_manager.stop()
+        self.inference_scheduler.stop()
+        self.recognition_scheduler.stop()
+        self.face_recognizer.stop_sync()
+        for pipeline in self.cameras.values():
+            pipeline.stop()
+        
+        if self.dashboard_publisher:
+            self.dashboard_publisher.stop()
         
         try:
             self.door_controller.disconnect()
         except:
             pass
         
-        print(" DEBUG: Système arrêté")
+        log.info("Système arrêté")
     
     def run_web_interface(self):
         """Lancer l'interface web"""
-        print(" DEBUG: Interface web...")
+        log.info("Interface web...")
+        
+        if settings.WEB_SERVER_MODE == "asgi":
+            # Flux et WebSocket servis par des coroutines (uvicorn)
+            from api import asgi_app
+            asgi_app.run(settings.API_HOST, settings.API_PORT)
+            return
+        
         from api.routes import app, socketio
         
         socketio.run(
@@ -639,7 +843,12 @@ class SmartClassroomSystemFixed:
             'emotion_queue_size': self.emotion_analysis_queue.qsize(),
             'successful_recognitions': self.successful_recognitions,
             'failed_recognitions': self.failed_recognitions,
+            'recognitions_skipped': self.recognitions_skipped,
+            'recognition_queue_full': self.recognition_queue_full,
+            'emotions_replaced': self.emotions_replaced,
             'processing_active': self.processing_active,
+            'inference': self.inference_scheduler.get_stats(),
+            'recognition': self.recognition_scheduler.get_stats(),
             'recognition_thread_alive': self.recognition_thread and self.recognition_thread.is_alive(),
             'emotion_thread_alive': self.emotion_thread and self.emotion_thread.is_alive(),
             'recognized_students_count': len(self.recognized_students),
@@ -189,12 +189,14 @@ function updateCameraStatusIndicators(isActive) {
 
 async function takeSnapshot() {
     try {
-        const response = await api.get('/api/camera/snapshot');
+        // Image JPEG brute (pas de base64 ni de JSON)
+        const response = await fetch('/api/camera/snapshot?format=jpeg', { cache: 'no-cache' });
         
-        if (response.success) {
+        if (response.ok) {
             // Créer un lien de téléchargement
+            const imageUrl = URL.createObjectURL(await response.blob());
             const link = document.createElement('a');
-            link.href = response.image;
+            link.href = imageUrl;
             
             const timestamp = new Date().toISOString().slice(0, 19).replace(/:/g, '-');
             link.download = `smart_classroom_snapshot_${timestamp}.jpg`;
@@ -203,10 +205,12 @@ async function takeSnapshot() {
             document.body.appendChild(link);
             link.click();
             document.body.removeChild(link);
+            URL.revokeObjectURL(imageUrl);
             
             notifications.success('Snapshot sauvegardé');
         } else {
-            notifications.error(response.message || 'Erreur lors du snapshot');
+            const error = await response.json().catch(() => ({}));
+            notifications.error(error.message || 'Erreur lors du snapshot');
         }
     } catch (error) {
         console.error('Erreur snapshot:', error);
@@ -750,7 +754,7 @@ class BandwidthDetector {
         
         try {
             const startTime = Date.now();
-            const response = await fetch('/api/camera/snapshot', { 
+            const response = await fetch('/api/camera/snapshot?format=jpeg', { 
                 cache: 'no-cache',
                 method: 'GET'
             });
@@ -15,6 +15,12 @@ let autoRefreshInterval = null;
 let currentLogTab = 'attendance';
 let logsPaused = false;
 let chartInstances = {};
+let pushSocket = null;
+let pushConnected = false;
+
+// Polling de secours : lent quand les mises à jour arrivent par WebSocket
+const POLL_INTERVAL = 5000;
+const PUSH_POLL_INTERVAL = 30000;
 
 // ================================
 // INITIALISATION
@@ -32,6 +38,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Démarrer l'auto-refresh
     startAutoRefresh();
     
+    // Mises à jour poussées par le serveur
+    connectPushUpdates();
+    
     // Initialiser les graphiques si Chart.js est disponible
     if (typeof Chart !== 'undefined') {
         initializeCharts();
@@ -518,8 +527,96 @@ function startAutoRefresh() {
             if (!logsPaused) {
                 refreshAllData();
             }
-        }, 5000); // Actualisation toutes les 5 secondes
+        }, pushConnected ? PUSH_POLL_INTERVAL : POLL_INTERVAL);
+    }
+}
+
+function restartAutoRefresh() {
+    stopAutoRefresh();
+    startAutoRefresh();
+}
+
+// ================================
+// MISES À JOUR PUSH (WEBSOCKET)
+// ================================
+
+function connectPushUpdates() {
+    if (typeof io === 'undefined') {
+        console.warn('Socket.IO non disponible - polling uniquement');
+        return;
     }
+    
+    // Salle optionnelle : /dashboard?room=Salle%201
+    const room = new URLSearchParams(window.location.search).get('room');
+    
+    pushSocket = io();
+    pushSocket.on('connect', () => {
+        pushConnected = true;
+        pushSocket.emit('subscribe_dashboard', { room: room });
+        restartAutoRefresh();
+    });
+    pushSocket.on('disconnect', () => {
+        pushConnected = false;
+        restartAutoRefresh();
+    });
+    pushSocket.on('dashboard_delta', applyDashboardDelta);
+}
+
+const PUSH_LOG_TABS = {
+    attendance: 'attendance',
+    attention: 'attention',
+    emotion: 'emotions'
+};
+
+function applyDashboardDelta(delta) {
+    (delta.updates || []).forEach(update => {
+        const data = update.data || {};
+        
+        switch (update.type) {
+            case 'attendance':
+                updateElement('totalAttendance', data.attendance_today || 0);
+                break;
+            case 'camera':
+                updateElement('cameraFPS', data.fps || 0);
+                updateComponentStatus('camera', data.active);
+                break;
+        }
+        
+        const tab = PUSH_LOG_TABS[update.type];
+        if (tab && tab === currentLogTab && !logsPaused) {
+            prependLogEntry(pushUpdateToLog(update), tab);
+        }
+    });
+}
+
+function pushUpdateToLog(update) {
+    const data = update.data || {};
+    return {
+        timestamp: update.timestamp,
+        student_name: data.student,
+        course: data.course,
+        classroom: data.classroom,
+        status: data.status,
+        emotion: data.emotion,
+        confidence: data.confidence
+    };
+}
+
+function prependLogEntry(log, type) {
+    const container = document.getElementById('logContent');
+    if (!container) return;
+    
+    const emptyState = container.querySelector('.empty-state');
+    if (emptyState) emptyState.remove();
+    
+    container.insertAdjacentHTML('afterbegin', `
+        <div class="log-entry ${type}">
+            <div class="log-time">${formatLogTime(log.timestamp)}</div>
+            <div class="log-icon">${getLogIcon(type)}</div>
+            <div class="log-message">${formatLogMessage(log, type)}</div>
+            <div class="log-details">${getLogDetails(log, type)}</div>
+        </div>
+    `);
 }
 
 function stopAutoRefresh() {
@@ -0,0 +1,77 @@
+"""Import en masse pendant la synchronisation dataset/vecteurs du reconnaisseur"""
+
+import hashlib
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("deepface")
+
+from config.settings import settings
+from core import face_recognizer as face_recognizer_module
+from core.face_recognizer import FaceRecognizer
+from utils import bulk_enrollment
+from utils.bulk_enrollment import BulkEnrollment
+
+
+def fake_vector(path, model_name=None):
+    """Vecteur déterministe par image (pas de modèle chargé)"""
+    seed = int(hashlib.sha1(str(path).encode('utf-8')).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).standard_normal(16).astype(np.float32)
+
+
+class SlowExecutor:
+    """Pool remplacé par des appels directs, lents : la synchronisation
+    du reconnaisseur passe pendant la vectorisation de chaque lot"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def map(self, function, items):
+        for item in items:
+            time.sleep(self.delay)
+            yield function(item)
+
+
+def test_import_while_sync_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'DATASET_PATH', tmp_path / 'dataset')
+    monkeypatch.setattr(settings, 'EMBEDDINGS_PATH', tmp_path / 'embeddings')
+    monkeypatch.setattr(settings, 'IMPORTS_PATH', tmp_path / 'imports')
+    monkeypatch.setattr(settings, 'EMBEDDING_SYNC_INTERVAL', 0.005)
+    monkeypatch.setattr(settings, 'ENROLL_CHECKPOINT_EVERY', 5)
+    settings.DATASET_PATH.mkdir()
+
+    recomputed = []
+    def embed_face(img, model_name=None):
+        recomputed.append(img)
+        return fake_vector(img)
+    monkeypatch.setattr(face_recognizer_module, 'embed_face', embed_face)
+    monkeypatch.setattr(bulk_enrollment, 'embed_photo', fake_vector)
+
+    recognizer = FaceRecognizer()
+    importer = BulkEnrollment(None, store=recognizer.embeddings)
+    keys = [f"Etudiant_{i % 3}/Etudiant_{i % 3}_import_{i:04d}.jpg" for i in range(12)]
+    for key in keys:
+        staged = importer.staging_path / key
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        staged.write_bytes(key.encode('utf-8'))
+    importer.checkpoint['photos'] = {f"photo_{i}.jpg": ['staged', key] for i, key in enumerate(keys)}
+    importer.running = True
+
+    recognizer.start_sync()
+    try:
+        importer._embed_staged(SlowExecutor(0.02))
+        time.sleep(0.05)  # Quelques passages de la synchronisation après l'import
+    finally:
+        recognizer.stop_sync()
+        recognizer.sync_thread.join(timeout=1.0)
+
+    assert importer.status['errors'] == 0
+    assert importer.status['embedded'] == len(keys)
+    assert all((settings.DATASET_PATH / key).exists() for key in keys)
+    assert all(key in recognizer.embeddings for key in keys)
+    assert not recognizer.embeddings.pending
+    # Vecteurs de l'import conservés : rien de recalculé par la synchronisation
+    assert recomputed == []
@@ -0,0 +1,399 @@
+"""Import en masse d'étudiants (zip ou arborescence de photos)
+
+    python -m utils.bulk_enrollment promo2026.zip --workers 8
+    python -m utils.bulk_enrollment /srv/photos/promo2026/
+    python -m utils.bulk_enrollment --reindex
+
+L'étudiant est le dossier parent de la photo (« Nom_Prenom/photo1.jpg »)
+ou, à la racine, le nom du fichier sans numéro final (« Nom_Prenom_2.jpg »).
+
+1. Pool de processus : décodage, détection, découpe 224x224 du plus
+   grand visage et dHash (détecteur chargé une fois par processus).
+2. Dédoublonnage par étudiant (distance de Hamming des dHash), visages
+   retenus écrits dans un dossier de préparation.
+3. Pool de processus : vecteurs des visages retenus ajoutés à
+   l'EmbeddingStore du reconnaisseur, puis images déplacées dans le
+   dataset (déjà vectorisées, la reconnaissance ne les recalcule pas).
+
+Un point de reprise (IMPORTS_PATH/<id>.json) est écrit toutes les
+ENROLL_CHECKPOINT_EVERY photos : relancer la même commande reprend là
+où l'import s'est arrêté. --reindex vectorise en parallèle les images
+du dataset absentes de l'EmbeddingStore (dataset existant, changement
+de modèle).
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config.settings import settings
+from data.embedding_store import IMAGE_EXTENSIONS, EmbeddingStore, image_stamp, scan_dataset
+
+log = logging.getLogger(__name__)
+
+# Modèles du processus worker (chargés par _init_worker)
+_worker = {}
+
+
+def _init_worker(model_name):
+    """Charger le détecteur une fois par processus du pool"""
+    from core.face_detector import FaceDetector
+
+    # Un thread OpenCV par processus : le parallélisme vient du pool
+    cv2.setNumThreads(1)
+    _worker.update({'detector': FaceDetector(), 'model_name': model_name, 'archives': {}})
+
+
+def dhash(image: np.ndarray, size: int = 8) -> int:
+    """Empreinte perceptuelle 64 bits (gradient horizontal d'une vignette)"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _read_photo(archive: Optional[str], member: str) -> Optional[np.ndarray]:
+    if archive:
+        archives = _worker['archives']
+        if archive not in archives:
+            archives[archive] = zipfile.ZipFile(archive)
+        data = archives[archive].read(member)
+    else:
+        data = Path(member).read_bytes()
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def prepare_photo(photo: Tuple[Optional[str], str]):
+    """(statut, visage JPEG, dHash) d'une photo - exécuté dans le pool"""
+    from core.frame_context import FACE_INPUT_SIZE
+
+    try:
+        image = _read_photo(*photo)
+        if image is None:
+            return 'unreadable', None, None
+        faces = _worker['detector'].detect_faces_optimized(image)
+        if not faces:
+            return 'no_face', None, None
+        x, y, w, h = (int(v) for v in max(faces, key=lambda f: f[2] * f[3]))
+        face = cv2.resize(image[y:y + h, x:x + w], FACE_INPUT_SIZE, interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode('.jpg', face, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        if not ok:
+            return 'unreadable', None, None
+        return 'ok', buffer.tobytes(), dhash(face)
+    except Exception as e:
+        log.warning("Photo %s ignorée: %s", photo[1], e)
+        return 'error', None, None
+
+
+def embed_photo(path: str):
+    """Vecteur d'une image (None si échec) - exécuté dans le pool"""
+    from core.face_recognizer import embed_face
+
+    try:
+        return embed_face(path, _worker['model_name'])
+    except Exception as e:
+        log.warning("Vectorisation impossible %s: %s", path, e)
+        return None
+
+
+def student_name(parts: List[str]) -> str:
+    """Nom d'étudiant d'un chemin relatif (dossier parent ou nom de fichier)"""
+    if len(parts) >= 2:
+        name = parts[-2]
+    else:
+        name = re.sub(r'[\s_-]*\d+$', '', Path(parts[-1]).stem)
+    return name.strip().replace(' ', '_')
+
+
+def list_photos(source: Path) -> List[Tuple[Tuple[Optional[str], str], str]]:
+    """Photos d'un zip ou d'un dossier : [((archive, membre ou chemin), étudiant)]"""
+    photos = []
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            members = [info.filename for info in archive.infolist()
+                       if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+                       and not any(part.startswith(('.', '__MACOSX')) for part in info.filename.split('/'))]
+        split = [member.split('/') for member in members]
+        # Dossier racine unique (« promo2026/Nom/photo.jpg ») ignoré
+        roots = {parts[0] for parts in split if len(parts) > 1}
+        strip = 1 if len(roots) == 1 and all(len(parts) > 1 for parts in split) else 0
+        for member, parts in zip(members, split):
+            photos.append(((str(source), member), student_name(parts[strip:])))
+    else:
+        for path in source.rglob('*'):
+            relative = path.relative_to(source).parts
+            if (path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+                    and not any(part.startswith('.') for part in relative)):
+                photos.append(((None, str(path)), student_name(list(relative))))
+    return sorted(photos, key=lambda photo: photo[0][1])
+
+
+class BulkEnrollment:
+    """Import d'un zip ou d'un dossier de photos d'étudiants avec reprise
+
+    `callback(status)` reçoit l'avancement (même usage que le callback de
+    WebFaceCapture) ; `store` : EmbeddingStore partagé avec le
+    reconnaisseur quand l'import tourne dans le processus de l'API.
+    """
+
+    def __init__(self, source, store: Optional[EmbeddingStore] = None, workers: Optional[int] = None,
+                 callback: Optional[Callable] = None, restart: bool = False):
+        self.source = Path(source).resolve() if source else None
+        self.store = store if store is not None else EmbeddingStore(settings.RECOGNITION_MODEL)
+        self.workers = workers or settings.ENROLL_WORKERS
+        self.callback = callback
+        self.running = False
+        self.last_update = 0.0
+
+        if self.source:
+            identity = f"{self.source}:{self.source.stat().st_size if self.source.is_file() else ''}"
+            self.job_id = hashlib.sha1(identity.encode('utf-8')).hexdigest()[:12]
+        else:
+            self.job_id = 'reindex'
+        self.checkpoint_path = settings.IMPORTS_PATH / f"{self.job_id}.json"
+        self.staging_path = settings.IMPORTS_PATH / self.job_id
+        self.checkpoint = self._load_checkpoint(restart)
+
+        self.status = {
+            'active': False,
+            'job': self.job_id,
+            'source': str(self.source) if self.source else None,
+            'phase': 'pending',
+            'total': 0,
+            'processed': 0,
+            'staged': 0,
+            'duplicates': 0,
+            'no_face': 0,
+            'errors': 0,
+            'embedded': 0,
+            'students': 0,
+            'resumed': len(self.checkpoint['photos']),
+            'message': ''
+        }
+
+    def _load_checkpoint(self, restart: bool) -> dict:
+        if self.checkpoint_path.exists() and not restart:
+            try:
+                with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                    checkpoint = json.load(f)
+                log.info("Reprise de l'import %s (%s photo(s) déjà traitée(s))",
+                         self.job_id, len(checkpoint['photos']))
+                return checkpoint
+            except (OSError, ValueError, KeyError) as e:
+                log.warning("Point de reprise illisible, import recommencé: %s", e)
+        # photos : membre -> [statut, clé du dataset] ; hashes : étudiant -> dHash retenus
+        return {'source': str(self.source), 'photos': {}, 'hashes': {}, 'completed': False}
+
+    def _save_checkpoint(self):
+        settings.IMPORTS_PATH.mkdir(parents=True, exist_ok=True)
+        temporary = self.checkpoint_path.with_suffix('.tmp')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f)
+        os.replace(temporary, self.checkpoint_path)
+
+    def _update_status(self, status_update: dict, force: bool = False):
+        self.status.update(status_update)
+        now = time.monotonic()
+        # Au plus 4 événements par seconde vers l'interface
+        if self.callback and (force or now - self.last_update >= 0.25):
+            self.last_update = now
+            self.callback(dict(self.status))
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # spawn : pas de fork d'un processus multi-thread (serveur web, logs)
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_worker, initargs=(self.store.model_name,))
+
+    def stop(self):
+        self.running = False
+
+    def run(self) -> dict:
+        """Importer (ou revectoriser le dataset) ; retourne le statut final"""
+        self.running = True
+        self._update_status({'active': True, 'message': 'Import démarré'}, force=True)
+        started = time.perf_counter()
+        try:
+            with self._executor() as executor:
+                if self.source:
+                    if self.checkpoint['completed']:
+                        log.info("Import %s déjà terminé (--restart pour le recommencer)", self.job_id)
+                    else:
+                        self._prepare(executor)
+                        if self.running:
+                            self._embed_staged(executor)
+                else:
+                    self._reindex(executor)
+                if not self.running:
+                    executor.shutdown(wait=True, cancel_futures=True)
+        except Exception as e:
+            log.exception("Erreur import en masse: %s", e)
+            self._update_status({'active': False, 'phase': 'error', 'message': f'Erreur: {e}'}, force=True)
+            return dict(self.status)
+
+        elapsed = time.perf_counter() - started
+        if self.running:
+            message = (f"Import terminé en {elapsed:.0f} s : {self.status['embedded']} visage(s) ajouté(s) "
+                       f"pour {self.status['students']} étudiant(s)")
+            phase = 'done'
+        else:
+            message = "Import interrompu, relancer pour reprendre"
+            phase = 'stopped'
+        log.info(message)
+        self.running = False
+        self._update_status({'active': False, 'phase': phase, 'message': message}, force=True)
+        return dict(self.status)
+
+    def _prepare(self, executor):
+        """Détection, découpe et dédoublonnage des photos non encore traitées"""
+        photos = list_photos(self.source)
+        done = self.checkpoint['photos']
+        hashes = self.checkpoint['hashes']
+        pending = [(photo, name) for photo, name in photos if photo[1] not in done]
+        self._update_status({'phase': 'detection', 'total': len(photos), 'processed': len(photos) - len(pending),
+                             'message': f'{len(photos)} photo(s), {len(pending)} à traiter'}, force=True)
+
+        results = executor.map(prepare_photo, [photo for photo, _ in pending], chunksize=8)
+        for count, ((photo, name), (status, face, face_hash)) in enumerate(zip(pending, results), 1):
+            key = None
+            if status == 'ok' and any(hamming(face_hash, known) <= settings.ENROLL_DEDUP_DISTANCE
+                                      for known in hashes.get(name, [])):
+                status = 'duplicate'
+            elif status == 'ok':
+                # Nom dérivé de la photo d'origine : une reprise réécrit le même fichier
+                digest = hashlib.sha1(photo[1].encode('utf-8')).hexdigest()[:10]
+                key = f"{name}/{name}_import_{digest}.jpg"
+                staged = self.staging_path / key
+                staged.parent.mkdir(parents=True, exist_ok=True)
+                staged.write_bytes(face)
+                hashes.setdefault(name, []).append(face_hash)
+                status = 'staged'
+            done[photo[1]] = [status, key]
+
+            counter = {'staged': 'staged', 'duplicate': 'duplicates', 'no_face': 'no_face'}.get(status, 'errors')
+            self._update_status({'processed': self.status['processed'] + 1,
+                                 counter: self.status[counter] + 1, 'students': len(hashes)})
+            if count % settings.ENROLL_CHECKPOINT_EVERY == 0:
+                self._save_checkpoint()
+            if not self.running:
+                break
+        self._save_checkpoint()
+
+    def _embed_staged(self, executor):
+        """Vectoriser les visages retenus puis les déplacer dans le dataset"""
+        keys = [key for status, key in self.checkpoint['photos'].values() if status == 'staged']
+        self._update_status({'phase': 'embedding', 'total': len(keys), 'processed': 0,
+                             'message': f'Vectorisation de {len(keys)} visage(s)'}, force=True)
+
+        entries = {entry[1]: entry for entry in self.checkpoint['photos'].values() if entry[0] == 'staged'}
+        batch = settings.ENROLL_CHECKPOINT_EVERY
+        for offset in range(0, len(keys), batch):
+            chunk = keys[offset:offset + batch]
+            paths = [self.staging_path / key for key in chunk]
+            todo = [(key, path) for key, path in zip(chunk, paths)
+                    if path.exists() and self.store.stamp(key) != image_stamp(path)]
+            # Images pas encore dans le dataset : la synchronisation du
+            # reconnaisseur (même store) ne doit pas retirer leurs vecteurs
+            self.store.hold(chunk)
+            try:
+                vectors = executor.map(embed_photo, [str(path) for _, path in todo])
+                for (key, path), vector in zip(todo, vectors):
+                    if vector is not None:
+                        self.store.add(key, key.split('/')[0], image_stamp(path), vector)
+                # Vecteurs sauvegardés avant l'arrivée des images dans le dataset
+                self.store.save()
+
+                for key, path in zip(chunk, paths):
+                    if key in self.store and path.exists():
+                        target = settings.DATASET_PATH / key
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        os.replace(path, target)  # mtime conservé : empreinte inchangée
+                        entries[key][0] = 'added'
+                        self.status['embedded'] += 1
+                    else:
+                        entries[key][0] = 'error'
+                        self.status['errors'] += 1
+            finally:
+                self.store.release(chunk)
+            self._save_checkpoint()
+            self._update_status({'processed': min(offset + batch, len(keys))})
+            if not self.running:
+                return
+
+        self.checkpoint['completed'] = True
+        self._save_checkpoint()
+
+    def _reindex(self, executor):
+        """Vectoriser en parallèle les images du dataset absentes du store"""
+        images = scan_dataset()
+        missing, removed = self.store.diff(images)
+        for key in removed:
+            self.store.remove(key)
+        self._update_status({'phase': 'embedding', 'total': len(missing), 'processed': 0,
+                             'students': len({images[key][0] for key in missing}),
+                             'message': f'Vectorisation de {len(missing)} image(s) du dataset'}, force=True)
+
+        batch = settings.ENROLL_CHECKPOINT_EVERY
+        for offset in range(0, len(missing), batch):
+            chunk = missing[offset:offset + batch]
+            vectors = executor.map(embed_photo, [str(settings.DATASET_PATH / key) for key in chunk])
+            for key, vector in zip(chunk, vectors):
+                if vector is None:
+                    self.status['errors'] += 1
+                    continue
+                name, stamp = images[key]
+                self.store.add(key, name, stamp, vector)
+                self.status['embedded'] += 1
+            self.store.save()
+            self._update_status({'processed': min(offset + batch, len(missing))})
+            if not self.running:
+                return
+        self.store.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse de photos d'étudiants")
+    parser.add_argument('source', nargs='?', help="Fichier zip ou dossier de photos")
+    parser.add_argument('--workers', type=int, default=settings.ENROLL_WORKERS)
+    parser.add_argument('--restart', action='store_true', help="Ignorer le point de reprise")
+    parser.add_argument('--reindex', action='store_true',
+                        help="Vectoriser les images du dataset absentes de l'index")
+    args = parser.parse_args()
+    if not args.source and not args.reindex:
+        parser.error("source ou --reindex requis")
+
+    from utils.log_config import setup_logging
+    setup_logging(settings.LOGS_PATH)
+
+    def progress(status):
+        print(f"\r {status['phase']}: {status['processed']}/{status['total']} "
+              f"(retenus {status['staged']}, doublons {status['duplicates']}, "
+              f"sans visage {status['no_face']}, vecteurs {status['embedded']})", end='', flush=True)
+
+    enrollment = BulkEnrollment(None if args.reindex else args.source, workers=args.workers,
+                                callback=progress, restart=args.restart)
+    try:
+        status = enrollment.run()
+    except KeyboardInterrupt:
+        enrollment.stop()
+        status = enrollment.status
+    print(f"\n {status['message']}")
+
+
+if __name__ == '__main__':
+    main()
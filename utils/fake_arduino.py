@@ -0,0 +1,187 @@
+import os
+import random
+import select
+import threading
+import time
+from typing import Optional
+
+
+class FakeArduino:
+    """Arduino de porte simulé sur un pseudo-terminal (Linux/macOS)
+
+    Le port exposé (`self.port`) s'ouvre comme un vrai port série avec
+    pyserial. Le protocole reproduit le sketch de la porte :
+    PING -> PONG, MOVE/OK/INCONNU/ERREUR -> ACK <commande>, sinon ERR.
+    """
+
+    COMMANDS = ("MOVE", "OK", "INCONNU", "ERREUR")
+
+    def __init__(self, boot_delay: float = 0.0, reply_delay: float = 0.0,
+                 drop_rate: float = 0.0, announce_ready: bool = True):
+        self.boot_delay = boot_delay
+        self.reply_delay = reply_delay
+        self.drop_rate = drop_rate
+        self.announce_ready = announce_ready
+
+        self.port: Optional[str] = None
+        self.master_fd: Optional[int] = None
+        self.slave_fd: Optional[int] = None
+        self.thread: Optional[threading.Thread] = None
+        self.is_running = False
+
+        # Historique des commandes reçues (pour les tests)
+        self.received = []
+        self.door_moves = 0
+
+    def start(self) -> str:
+        """Créer le pseudo-terminal et démarrer la simulation"""
+        import pty
+        import tty
+
+        self.master_fd, self.slave_fd = pty.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, daemon=True, name="FakeArduino")
+        self.thread.start()
+        return self.port
+
+    def stop(self):
+        """Arrêter la simulation et fermer le pseudo-terminal"""
+        self.is_running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        for fd in (self.master_fd, self.slave_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self.master_fd = self.slave_fd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        """Boucle de la carte : lit les lignes et répond"""
+        booted_at = time.time() + self.boot_delay
+        ready_sent = False
+        buffer = b""
+
+        while self.is_running:
+            if not ready_sent and time.time() >= booted_at:
+                if self.announce_ready:
+                    self._write("READY")
+                ready_sent = True
+
+            readable, _, _ = select.select([self.master_fd], [], [], 0.02)
+            if not readable:
+                continue
+            try:
+                chunk = os.read(self.master_fd, 1024)
+            except OSError:
+                break
+            if not chunk:
+                continue
+
+            buffer += chunk
+            while b"\n" in buffer:
+                raw, buffer = buffer.split(b"\n", 1)
+                line = raw.decode("utf-8", errors="replace").strip()
+                # Pendant le boot la carte ne lit pas le port série
+                if line and time.time() >= booted_at:
+                    self._handle(line)
+
+    def _handle(self, line: str):
+        """Traiter une commande reçue"""
+        self.received.append(line)
+        command = line.upper()
+
+        if self.drop_rate and random.random() < self.drop_rate:
+            return
+        if self.reply_delay:
+            time.sleep(self.reply_delay)
+
+        if command == "PING":
+            self._write("PONG")
+        elif command in self.COMMANDS:
+            if command == "MOVE":
+                self.door_moves += 1
+            self._write(f"ACK {command}")
+        else:
+            self._write(f"ERR {command}")
+
+    def _write(self, line: str):
+        try:
+            os.write(self.master_fd, f"{line}\n".encode())
+        except OSError:
+            pass
+
+
+class _NullLogger:
+    """Logger minimal pour ne pas polluer logs/access.csv"""
+
+    def log_access(self, record):
+        pass
+
+
+def run_benchmark(commands: int = 200, boot_delay: float = 0.5, reply_delay: float = 0.002):
+    """Mesurer la découverte du port et la latence des commandes de porte"""
+    from config.settings import settings
+    from core.door_controller import DoorController
+    from core.serial_discovery import discover_door_port
+
+    with FakeArduino(boot_delay=boot_delay, reply_delay=reply_delay) as fake:
+        import tempfile
+        from pathlib import Path
+
+        original = (settings.SERIAL_BOOT_DELAY, settings.SERIAL_QUEUE_SIZE, settings.SERIAL_PORT_CACHE)
+        settings.SERIAL_BOOT_DELAY = boot_delay
+        settings.SERIAL_QUEUE_SIZE = commands * 2 + 2
+        settings.SERIAL_PORT_CACHE = Path(tempfile.gettempdir()) / "fake_arduino_port.txt"
+        try:
+            start = time.time()
+            # Ports fictifs absents + le faux Arduino : sondés en parallèle
+            port = discover_door_port(ports=["/dev/ttyDOESNOTEXIST0", "/dev/ttyDOESNOTEXIST1", fake.port])
+            discovery_time = time.time() - start
+            print(f"Découverte: {port} en {discovery_time * 1000:.0f} ms")
+
+            controller = DoorController(_NullLogger())
+            start = time.time()
+            controller.connect(port)
+            print(f"connect(): {(time.time() - start) * 1000:.1f} ms")
+
+            start = time.time()
+            for _ in range(commands):
+                controller.open_door("BENCH", "benchmark")
+            enqueue_time = time.time() - start
+            print(f"{commands} open_door() en file: {enqueue_time * 1000:.1f} ms")
+
+            last = controller.open_door("BENCH", "benchmark", wait=True)
+            stats = controller.get_stats()
+            controller.disconnect()
+        finally:
+            settings.SERIAL_BOOT_DELAY, settings.SERIAL_QUEUE_SIZE, settings.SERIAL_PORT_CACHE = original
+
+    print(f"Dernière commande acquittée: {last}")
+    print(f"Mouvements porte simulés: {fake.door_moves}")
+    for key, value in stats.items():
+        print(f"  {key}: {value}")
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Banc de test de la porte sans matériel")
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--boot-delay", type=float, default=0.5)
+    parser.add_argument("--reply-delay", type=float, default=0.002)
+    args = parser.parse_args()
+
+    run_benchmark(args.commands, args.boot_delay, args.reply_delay)
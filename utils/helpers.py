@@ -1,47 +1,189 @@
-import pandas as pd
-from datetime import datetime, time
-from typing import Optional, Tuple
+import bisect
+import csv
+import os
+import threading
+import time
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from config.settings import settings
 
+
+def _parse_minutes(value: str) -> int:
+    """Convertir 'HH:MM' en minutes depuis minuit"""
+    hours, minutes = value.strip().split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def _build_day(entries: List[Tuple[int, int, str, str]]):
+    """Trier les créneaux d'une journée pour la recherche par bisection
+
+    Retourne (débuts, fins maximales cumulées, créneaux). La fin maximale
+    cumulée permet d'arrêter le parcours arrière même si des créneaux
+    se chevauchent.
+    """
+    entries.sort()
+    starts = [entry[0] for entry in entries]
+    max_ends = []
+    current_max = -1
+    for entry in entries:
+        current_max = max(current_max, entry[1])
+        max_ends.append(current_max)
+    return starts, max_ends, entries
+
+
+def _find_entry(day, minute: int):
+    """Trouver le créneau qui contient `minute` (bornes incluses)"""
+    starts, max_ends, entries = day
+    i = bisect.bisect_right(starts, minute) - 1
+    while i >= 0 and max_ends[i] >= minute:
+        if entries[i][1] >= minute:
+            return entries[i]
+        i -= 1
+    return None
+
+
 class ScheduleManager:
-    """Gestionnaire d'emploi du temps"""
+    """Gestionnaire d'emploi du temps (index précompilé par étudiant et par jour)"""
     
-    def __init__(self):
-        self.schedule_df = None
+    def __init__(self, edt_path: Optional[Path] = None, reload_interval: float = 5.0):
+        self.edt_path = Path(edt_path) if edt_path else settings.EDT_PATH
+        self.reload_interval = reload_interval
+        
+        # {(nom en minuscules, date): (débuts, fins max, [(début, fin, cours, salle)])}
+        self.student_index: Dict[Tuple[str, date], tuple] = {}
+        # {(salle en minuscules, date): (débuts, fins max, [(début, fin, cours, salle, inscrits)])}
+        self.room_index: Dict[Tuple[str, date], tuple] = {}
+        self.entries_count = 0
+        
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
         self.load_schedule()
     
     def load_schedule(self):
-        """Charger l'emploi du temps depuis le CSV"""
+        """Charger et compiler l'emploi du temps depuis le CSV"""
+        mtime = None
         try:
-            if settings.EDT_PATH.exists():
-                self.schedule_df = pd.read_csv(settings.EDT_PATH)
+            if not self.edt_path.exists():
+                self.student_index = {}
+                self.room_index = {}
+                self.entries_count = 0
+                self._mtime = None
+                return
+            
+            mtime = os.path.getmtime(self.edt_path)
+            days: Dict[Tuple[str, date], list] = {}
+            slots: Dict[tuple, set] = {}
+            count = 0
+            
+            with open(self.edt_path, 'r', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    try:
+                        key = (row['nom'].strip().lower(), date.fromisoformat(row['date'].strip()))
+                        entry = (
+                            _parse_minutes(row['heure_debut']),
+                            _parse_minutes(row['heure_fin']),
+                            row['cours'],
+                            row['salle']
+                        )
+                    except (KeyError, ValueError, AttributeError) as e:
+                        print(f"Ligne EDT ignorée ({e}): {row}")
+                        continue
+                    days.setdefault(key, []).append(entry)
+                    # Index inverse : un créneau de salle regroupe ses inscrits
+                    slot_key = (entry[3].strip().lower(), key[1]) + entry
+                    slots.setdefault(slot_key, set()).add(key[0])
+                    count += 1
+            
+            # Remplacement atomique : les lectures concurrentes voient
+            # l'ancien ou le nouvel index, jamais un index partiel
+            rooms: Dict[Tuple[str, date], list] = {}
+            for (room_key, day, start, end, course, room), roster in slots.items():
+                rooms.setdefault((room_key, day), []).append((start, end, course, room, frozenset(roster)))
+            
+            self.student_index = {key: _build_day(entries) for key, entries in days.items()}
+            self.room_index = {key: _build_day(entries) for key, entries in rooms.items()}
+            self.entries_count = count
+            self._mtime = mtime
+            
         except Exception as e:
+            # Ancien index conservé ; nouvel essai seulement si le fichier change encore
+            self._mtime = mtime
             print(f"Erreur chargement EDT: {e}")
-            self.schedule_df = None
     
-    def check_student_schedule(self, student_name: str) -> Tuple[Optional[str], Optional[str]]:
-        """Vérifier si un étudiant a cours maintenant"""
-        if self.schedule_df is None:
+    def _reload_if_changed(self):
+        """Recharger l'EDT si le fichier a été modifié (vérifié périodiquement)"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_check = now
+            try:
+                mtime = os.path.getmtime(self.edt_path)
+            except OSError:
+                mtime = None
+            if mtime != self._mtime:
+                print("🔄 EDT modifié, rechargement")
+                self.load_schedule()
+        finally:
+            self._reload_lock.release()
+    
+    def get_student_slot(self, student_name: str,
+                         at: Optional[datetime] = None) -> Optional[Tuple[int, int, str, str]]:
+        """Créneau de l'étudiant maintenant (ou à `at`) : (début, fin, cours, salle), minutes"""
+        self._reload_if_changed()
+        
+        now = at or datetime.now()
+        day = self.student_index.get((student_name.lower(), now.date()))
+        if day is None:
+            return None
+        return _find_entry(day, now.hour * 60 + now.minute)
+    
+    def check_student_schedule(self, student_name: str,
+                               at: Optional[datetime] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Vérifier si un étudiant a cours maintenant (ou à l'instant `at`)"""
+        entry = self.get_student_slot(student_name, at)
+        if entry is None:
             return None, None
+        return entry[2], entry[3]
+
+    def get_current_slot(self, room: str, at: Optional[datetime] = None) -> Optional[Dict]:
+        """Obtenir le créneau en cours dans une salle avec la liste des inscrits"""
+        self._reload_if_changed()
         
-        now = datetime.now()
-        current_date = now.strftime("%Y-%m-%d")
-        current_time = now.strftime("%H:%M")
+        now = at or datetime.now()
+        day = self.room_index.get((room.strip().lower(), now.date()))
+        if day is None:
+            return None
         
-        try:
-            student_courses = self.schedule_df[
-                (self.schedule_df['nom'].str.lower() == student_name.lower()) &
-                (self.schedule_df['date'] == current_date)
-            ]
-            
-            for _, row in student_courses.iterrows():
-                if row['heure_debut'] <= current_time <= row['heure_fin']:
-                    return row['cours'], row['salle']
-                    
-        except Exception as e:
-            print(f"Erreur vérification EDT: {e}")
+        entry = _find_entry(day, now.hour * 60 + now.minute)
+        if entry is None:
+            return None
         
-        return None, None
+        start, end, course, room_name, roster = entry
+        return {
+            'key': (now.date(), start, end, course),
+            'date': now.date().isoformat(),
+            'start': f"{start // 60:02d}:{start % 60:02d}",
+            'end': f"{end // 60:02d}:{end % 60:02d}",
+            'course': course,
+            'room': room_name,
+            'roster': roster
+        }
+    
+    def get_expected_roster(self, room: str, at: Optional[datetime] = None) -> frozenset:
+        """Étudiants attendus dans la salle (noms en minuscules)"""
+        slot = self.get_current_slot(room, at)
+        return slot['roster'] if slot else frozenset()
+    
+    @staticmethod
+    def get_absentees(slot: Dict, present) -> List[str]:
+        """Inscrits du créneau qui n'ont pas été reconnus"""
+        present_lower = {name.lower() for name in present}
+        return sorted(slot['roster'] - present_lower)
 
 class ImageProcessor:
     """Utilitaires de traitement d'image"""
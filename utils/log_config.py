@@ -0,0 +1,103 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from config.settings import settings
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+class RateLimitFilter(logging.Filter):
+    """Limiter les messages répétitifs
+
+    Au plus `burst` enregistrements par `interval` secondes pour un même
+    gabarit de message (logger + format, avant interpolation). Le nombre de
+    messages supprimés est ajouté au premier message accepté ensuite.
+    """
+
+    def __init__(self, burst: int = 5, interval: float = 10.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.windows: Dict[tuple, list] = {}  # clé -> [début fenêtre, acceptés, supprimés]
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Les erreurs passent toujours
+        if record.levelno >= logging.ERROR:
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} messages similaires supprimés)"
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+def setup_logging(logs_dir: Optional[Path] = None, level: Optional[str] = None,
+                  module_levels: Optional[Dict[str, str]] = None) -> logging.Logger:
+    """Configurer le logging du processus (idempotent)
+
+    Les appels de log ne font que déposer l'enregistrement dans une file
+    (QueueHandler) ; l'écriture fichier/console se fait dans le thread du
+    QueueListener. Niveaux : settings.LOG_LEVEL, et settings.LOG_LEVELS par
+    module (ex. {"core.camera_manager": "WARNING", "main": "DEBUG"}).
+    """
+    global _listener
+
+    root = logging.getLogger()
+    with _setup_lock:
+        if _listener is not None:
+            return root
+
+        logs_dir = Path(logs_dir or settings.LOGS_PATH)
+        logs_dir.mkdir(parents=True, exist_ok=True)
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        file_handler = logging.FileHandler(logs_dir / 'system.log', encoding='utf-8')
+        file_handler.setFormatter(formatter)
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(-1)
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        burst, interval = settings.LOG_RATE_LIMIT
+        queue_handler.addFilter(RateLimitFilter(burst, interval))
+
+        root.setLevel(level or settings.LOG_LEVEL)
+        root.addHandler(queue_handler)
+        for name, module_level in (module_levels or settings.LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(module_level)
+
+        _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler,
+                                                   respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    return root
+
+
+def stop_logging():
+    """Vider la file et arrêter le thread d'écriture"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,198 @@
+import bisect
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from config.settings import settings
+
+# Bornes des histogrammes (secondes), de 1 ms à 10 s
+DEFAULT_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+
+class Histogram:
+    """Histogramme de durées à seaux fixes + fenêtre récente pour les percentiles"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 1024):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # Dernier seau = +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self.lock:
+            self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            self.recent.append(seconds)
+
+    def summary(self) -> dict:
+        """Résumé en millisecondes (percentiles sur la fenêtre récente)"""
+        with self.lock:
+            recent = sorted(self.recent)
+            count, total, maximum = self.count, self.total, self.max
+
+        def pct(p):
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(p / 100 * len(recent)))] * 1000, 3)
+
+        return {
+            'count': count,
+            'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+            'p50_ms': pct(50),
+            'p95_ms': pct(95),
+            'p99_ms': pct(99),
+            'max_ms': round(maximum * 1000, 3)
+        }
+
+
+class Counter:
+    """Compteur cumulatif avec historique récent pour les débits"""
+
+    def __init__(self, history: int = 10000):
+        self.value = 0
+        self.events = deque(maxlen=history)  # (horodatage, incrément)
+        self.lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self.lock:
+            self.value += amount
+            self.events.append((time.time(), amount))
+
+    def rate(self, window: float) -> int:
+        """Total des incréments sur les `window` dernières secondes"""
+        since = time.time() - window
+        with self.lock:
+            return sum(amount for stamp, amount in self.events if stamp >= since)
+
+
+class _Timer:
+    """Chronomètre d'une étape (gestionnaire de contexte)"""
+
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    """Chronomètre inactif (métriques désactivées)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Registre des latences par étape et des compteurs
+
+    Étapes du pipeline : capture, callback, detect, crop, recognize,
+    emotion, log, encode. Désactivé, chaque appel se réduit à un test de
+    booléen (timer() renvoie un contexte vide partagé).
+    """
+
+    def __init__(self, enabled: bool = True, prefix: str = "smartclassroom"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, Counter] = {}
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+
+    def histogram(self, stage: str) -> Histogram:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, Histogram())
+        return histogram
+
+    def counter(self, name: str) -> Counter:
+        counter = self.counters.get(name)
+        if counter is None:
+            with self.lock:
+                counter = self.counters.setdefault(name, Counter())
+        return counter
+
+    def timer(self, stage: str):
+        """with metrics.timer('detect'): ..."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(stage))
+
+    def observe(self, stage: str, seconds: float):
+        """Enregistrer une durée mesurée ailleurs"""
+        if self.enabled:
+            self.histogram(stage).observe(seconds)
+
+    def inc(self, name: str, amount: int = 1):
+        if self.enabled:
+            self.counter(name).inc(amount)
+
+    def rate(self, name: str, window: float) -> int:
+        """Incréments d'un compteur sur les `window` dernières secondes"""
+        counter = self.counters.get(name)
+        return counter.rate(window) if counter else 0
+
+    def snapshot(self) -> dict:
+        """Résumé JSON de toutes les étapes et compteurs"""
+        return {
+            'enabled': self.enabled,
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'stages': {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())},
+            'counters': {name: counter.value for name, counter in sorted(self.counters.items())}
+        }
+
+    def render_prometheus(self) -> str:
+        """Exposition au format texte Prometheus"""
+        name = f"{self.prefix}_stage_duration_seconds"
+        lines = [f"# HELP {name} Durée des étapes du pipeline",
+                 f"# TYPE {name} histogram"]
+        for stage, histogram in sorted(self.histograms.items()):
+            with histogram.lock:
+                counts = list(histogram.bucket_counts)
+                count, total = histogram.count, histogram.total
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        for counter_name, counter in sorted(self.counters.items()):
+            full_name = f"{self.prefix}_{counter_name}_total"
+            lines.append(f"# TYPE {full_name} counter")
+            lines.append(f"{full_name} {counter.value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+            self.started_at = time.time()
+
+
+# Registre partagé par tout le processus
+metrics = MetricsRegistry(enabled=settings.METRICS_ENABLED)